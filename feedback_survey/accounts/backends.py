@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+PRINCIPAL_CACHE_KEY = 'auth-principal:v2:{}'
+PRINCIPAL_CACHE_TIMEOUT = 15 * 60
+# What request handling reads from request.user (navbar, role checks, admin
+# access); the rest, notably ``password``, is deferred on a cached principal.
+CACHED_FIELDS = (
+    'id',
+    'username',
+    'first_name',
+    'last_name',
+    'email',
+    'role',
+    'faculty',
+    'academic_group',
+    'is_active',
+    'is_staff',
+    'is_superuser',
+    'last_login',
+    'date_joined',
+)
+
+
+def _cached_attnames() -> list[str]:
+    # from_db() expects the values in the model's field order.
+    return [field.attname for field in get_user_model()._meta.concrete_fields if field.attname in CACHED_FIELDS]
+
+
+def invalidate_cached_principal(user_id) -> None:
+    cache.delete(PRINCIPAL_CACHE_KEY.format(user_id))
+
+
+def invalidate_cached_principals(user_ids) -> None:
+    cache.delete_many([PRINCIPAL_CACHE_KEY.format(user_id) for user_id in user_ids])
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend that serves the per-request user lookup from the cache.
+
+    The cached principal holds CACHED_FIELDS and the user's session auth hash,
+    so session verification works without the password hash ever reaching
+    the cache. It is dropped by accounts.signals whenever the user is saved,
+    deleted or logs out.
+    """
+
+    def get_user(self, user_id):
+        key = PRINCIPAL_CACHE_KEY.format(user_id)
+        values = cache.get(key)
+        if values is not None:
+            return self._user_from_values(values)
+        user = super().get_user(user_id)
+        if user is not None:
+            cache.set(key, self._values_from_user(user), PRINCIPAL_CACHE_TIMEOUT)
+        return user
+
+    async def aget_user(self, user_id):
+        key = PRINCIPAL_CACHE_KEY.format(user_id)
+        values = await cache.aget(key)
+        if values is not None:
+            return self._user_from_values(values)
+        user = await super().aget_user(user_id)
+        if user is not None:
+            await cache.aset(key, self._values_from_user(user), PRINCIPAL_CACHE_TIMEOUT)
+        return user
+
+    def _values_from_user(self, user):
+        return {
+            'fields': [getattr(user, name) for name in _cached_attnames()],
+            'session_auth_hash': user.get_session_auth_hash(),
+        }
+
+    def _user_from_values(self, values):
+        user = get_user_model().from_db('default', _cached_attnames(), values['fields'])
+        session_auth_hash = values['session_auth_hash']
+        user.get_session_auth_hash = lambda: session_auth_hash
+        return user if self.user_can_authenticate(user) else None
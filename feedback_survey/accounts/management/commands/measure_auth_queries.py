@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.backends import invalidate_cached_principal
+
+User = get_user_model()
+
+# The pre-optimization request path: DB sessions, an uncached user lookup
+# and session-backed messages.
+BASELINE_SETTINGS = {
+    'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+    'AUTHENTICATION_BACKENDS': ['django.contrib.auth.backends.ModelBackend'],
+    'MESSAGE_STORAGE': 'django.contrib.messages.storage.fallback.FallbackStorage',
+}
+
+PAGES = [
+    ('RoleRedirectView', 'home', User.Role.STUDENT),
+    ('StudentSurveyListView', 'surveys:student-survey-list', User.Role.STUDENT),
+    ('TeacherDashboardView', 'surveys:teacher-dashboard', User.Role.TEACHER),
+    ('SurveyManageListView', 'surveys:manage-list', User.Role.TEACHER),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Count DB queries per authenticated request with the baseline and the '
+        'cached auth/session path. Runs inside a transaction that is rolled back.'
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            users = {
+                role: User.objects.create_user(username=f'__measure_{role}', password=None, role=role)
+                for role in (User.Role.STUDENT, User.Role.TEACHER)
+            }
+            baseline = self.measure(users, BASELINE_SETTINGS)
+            optimized = self.measure(users, {})
+            transaction.set_rollback(True)
+        for user in users.values():
+            invalidate_cached_principal(user.pk)
+
+        self.stdout.write(f"{'View':<24}{'baseline':>10}{'cached':>10}{'removed':>10}")
+        for name, _, _ in PAGES:
+            self.stdout.write(
+                f'{name:<24}{baseline[name]:>10}{optimized[name]:>10}{baseline[name] - optimized[name]:>10}'
+            )
+
+    def measure(self, users, overrides):
+        counts = {}
+        with override_settings(ALLOWED_HOSTS=['*', *settings.ALLOWED_HOSTS], **overrides):
+            clients = {}
+            for role, user in users.items():
+                clients[role] = Client()
+                clients[role].force_login(user)
+            for name, url_name, role in PAGES:
+                client = clients[role]
+                # Warm caches first; steady-state requests are what matter.
+                client.get(reverse(url_name))
+                with CaptureQueriesContext(connection) as queries:
+                    client.get(reverse(url_name))
+                counts[name] = len(queries)
+        return counts
@@ -0,0 +1,65 @@
+import csv
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.provisioning import ProvisionStats, provision, read_roster
+
+MAX_REPORTED_ERRORS = 50
+
+
+class Command(BaseCommand):
+    help = (
+        'Create and update accounts by username from a registrar CSV (username, first_name/last_name '
+        'or name, email, faculty, academic_group, role, optional password). New accounts without a '
+        'password get an activation link, written to the links file.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Registrar CSV export (UTF-8).')
+        parser.add_argument('--links', help='Activation links CSV (default: <path>.activation.csv).')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Processes hashing the passwords given in the file (default: one per core).',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Validate only; nothing is written to the database.')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.is_file():
+            raise CommandError(f'{path} does not exist.')
+        stats = ProvisionStats()
+        started = time.perf_counter()
+        try:
+            rows, update_fields = read_roster(path, stats)
+        except (ValueError, UnicodeDecodeError) as exc:
+            raise CommandError(str(exc))
+
+        for line, message in stats.errors[:MAX_REPORTED_ERRORS]:
+            self.stderr.write(f'line {line}: {message}')
+        if len(stats.errors) > MAX_REPORTED_ERRORS:
+            self.stderr.write(f'... and {len(stats.errors) - MAX_REPORTED_ERRORS} more.')
+        if options['dry_run']:
+            self.stdout.write(f'{stats.rows} rows: {len(rows)} valid, {len(stats.errors)} rejected.')
+            return
+
+        provision(rows, update_fields, stats, workers=options['workers'])
+        elapsed = time.perf_counter() - started
+
+        links_path = Path(options['links'] or f'{path}.activation.csv')
+        if stats.activation_links:
+            with open(links_path, 'w', newline='', encoding='utf-8') as file:
+                writer = csv.writer(file)
+                writer.writerow(['username', 'email', 'activation_url'])
+                writer.writerows(stats.activation_links)
+
+        self.stdout.write(
+            f'{stats.rows} rows in {elapsed:.1f} s: {stats.created} accounts created '
+            f'({stats.hashed} with a password), {stats.updated} updated, {len(stats.errors)} rejected.'
+        )
+        if stats.activation_links:
+            self.stdout.write(
+                self.style.WARNING(f'{len(stats.activation_links)} accounts await activation; links are in {links_path}.')
+            )
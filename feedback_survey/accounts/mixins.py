@@ -1,5 +1,5 @@
 from django.contrib.auth import get_user_model
-from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.contrib.auth.mixins import AccessMixin, LoginRequiredMixin, UserPassesTestMixin
 
 User = get_user_model()
 
@@ -21,3 +21,31 @@ class StudentRequiredMixin(RolesRequiredMixin):
 
 class TeacherOrAdminRequiredMixin(RolesRequiredMixin):
     allowed_roles = (User.Role.TEACHER, User.Role.ADMIN)
+
+
+class AsyncRolesRequiredMixin(AccessMixin):
+    """Role check for async views; loads the user with ``request.auser()``."""
+
+    allowed_roles: tuple[str, ...] = ()
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Replace the lazy sync user so templates and handle_no_permission()
+        # never touch the ORM from the event loop.
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+        if not (self.allowed_roles and request.user.role in self.allowed_roles):
+            return self.handle_no_permission()
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncStudentRequiredMixin(AsyncRolesRequiredMixin):
+    allowed_roles = (User.Role.STUDENT,)
+
+
+class AsyncTeacherOrAdminRequiredMixin(AsyncRolesRequiredMixin):
+    allowed_roles = (User.Role.TEACHER, User.Role.ADMIN)
+
+
+class AsyncAdminRequiredMixin(AsyncRolesRequiredMixin):
+    allowed_roles = (User.Role.ADMIN,)
@@ -0,0 +1,183 @@
+"""Bulk provisioning of accounts from registrar CSV exports.
+
+One row is one account: ``username`` and optionally ``first_name`` and
+``last_name`` (or ``name``, surname first), ``email``, ``faculty``,
+``academic_group``, ``role`` (default student) and ``password``. Accounts are
+created and updated by username with batched
+``INSERT ... ON CONFLICT (username) DO UPDATE``. Existing accounts only get
+the fields of the columns present in the file, keep their role where the
+file leaves it empty, and never have their password touched.
+
+New accounts get the row's password, hashed across a process pool, or an
+unusable password and an activation link to set one. The link is a password
+reset token, so it expires after ``PASSWORD_RESET_TIMEOUT`` and stops
+working once the password is set.
+"""
+
+import csv
+import os
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX, make_password
+from django.contrib.auth.tokens import default_token_generator
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from analytics.pool import worker_pool
+
+from .backends import invalidate_cached_principals
+
+User = get_user_model()
+
+# Field updated on existing accounts per column of the file.
+UPDATE_FIELDS = {
+    'first_name': ['first_name'],
+    'last_name': ['last_name'],
+    'name': ['first_name', 'last_name'],
+    'email': ['email'],
+    'faculty': ['faculty'],
+    'academic_group': ['academic_group'],
+    'role': ['role'],
+}
+BATCH_SIZE = 2000
+
+
+@dataclass
+class ProvisionStats:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    hashed: int = 0
+    # (line, message) of every rejected row.
+    errors: list = field(default_factory=list)
+    # (username, email, url) for every account still waiting for activation.
+    activation_links: list = field(default_factory=list)
+
+
+def _role(value: str) -> str | None:
+    """The role named by ``value``; '' if it is empty, None if it names no role."""
+    value = value.strip().casefold()
+    if not value:
+        return ''
+    for role, label in User.Role.choices:
+        if value in (role, label.casefold()):
+            return role
+    return None
+
+
+def read_roster(path, stats: ProvisionStats) -> tuple[list[tuple[User, str]], list[str]]:
+    """Valid rows of the CSV as unsaved users with their plain-text password ('' for none),
+    and the fields the file's columns update on existing accounts.
+    """
+    rows = []
+    seen = set()
+    with open(path, newline='', encoding='utf-8-sig') as file:
+        reader = csv.DictReader(file)
+        if 'username' not in (reader.fieldnames or []):
+            raise ValueError('The file has no "username" column.')
+        update_fields = list(dict.fromkeys(
+            name for column in reader.fieldnames for name in UPDATE_FIELDS.get(column, [])
+        ))
+        for line, row in enumerate(reader, start=2):
+            stats.rows += 1
+            row = {key: (value or '').strip() for key, value in row.items() if key}
+            username = row['username']
+            if 'name' in row and not (row.get('first_name') or row.get('last_name')):
+                row['last_name'], _, row['first_name'] = row['name'].partition(' ')
+            user = User(
+                username=username,
+                first_name=row.get('first_name', ''),
+                last_name=row.get('last_name', ''),
+                email=User.objects.normalize_email(row.get('email', '')),
+                faculty=row.get('faculty', ''),
+                academic_group=row.get('academic_group', ''),
+                role=_role(row.get('role', '')),
+            )
+            try:
+                if username in seen:
+                    raise ValidationError(f'Повторюване ім’я користувача {username}.')
+                if user.role is None:
+                    raise ValidationError(f"Невідома роль {row['role']}.")
+                if user.email:
+                    validate_email(user.email)
+                user.clean_fields(exclude=['password', 'role'])
+            except ValidationError as exc:
+                stats.errors.append((line, ' '.join(exc.messages)))
+                continue
+            seen.add(username)
+            rows.append((user, row.get('password', '')))
+    return rows, update_fields
+
+
+def hash_passwords(passwords: list[str], workers: int | None = None) -> list[str]:
+    """PBKDF2 hashes of ``passwords``, computed in a pool of ``workers`` processes."""
+    workers = workers or os.cpu_count()
+    if workers == 1 or len(passwords) < 2:
+        return [make_password(password) for password in passwords]
+    with worker_pool(workers) as pool:
+        return list(pool.map(make_password, passwords, chunksize=max(1, len(passwords) // (workers * 4))))
+
+
+def activation_url(user) -> str:
+    path = reverse(
+        'accounts:activate',
+        kwargs={'uidb64': urlsafe_base64_encode(force_bytes(user.pk)), 'token': default_token_generator.make_token(user)},
+    )
+    return settings.SITE_URL.rstrip('/') + path
+
+
+def provision(
+    rows: list[tuple[User, str]],
+    update_fields: list[str],
+    stats: ProvisionStats,
+    workers: int | None = None,
+) -> None:
+    usernames = [user.username for user, _ in rows]
+    existing = dict(User.objects.filter(username__in=usernames).values_list('username', 'role'))
+    new = [(user, password) for user, password in rows if user.username not in existing]
+    for user, _ in rows:
+        if not user.role:
+            user.role = existing.get(user.username, User.Role.STUDENT)
+
+    with_password = [(user, password) for user, password in new if password]
+    for (user, _), hashed in zip(with_password, hash_passwords([password for _, password in with_password], workers)):
+        user.password = hashed
+    stats.hashed = len(with_password)
+    for user, password in new:
+        if not password:
+            user.set_unusable_password()
+
+    users = [user for user, _ in rows]
+    with transaction.atomic():
+        # Updated rows keep their password: it is never among the update fields.
+        if update_fields:
+            User.objects.bulk_create(
+                users,
+                batch_size=BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=['username'],
+                update_fields=update_fields,
+            )
+        else:
+            User.objects.bulk_create([user for user, _ in new], batch_size=BATCH_SIZE)
+    stats.created = len(new)
+    stats.updated = len(rows) - len(new) if update_fields else 0
+    # bulk_create skips post_save, which drops cached principals otherwise.
+    invalidate_cached_principals([user.pk for user in users if user.pk is not None])
+
+    pending = (
+        User.objects.filter(
+            username__in=usernames,
+            is_active=True,
+            password__startswith=UNUSABLE_PASSWORD_PREFIX,
+        )
+        .only('pk', 'username', 'email', 'password', 'last_login')
+        .order_by('username')
+    )
+    stats.activation_links = [(user.username, user.email, activation_url(user)) for user in pending]
@@ -0,0 +1,19 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .backends import invalidate_cached_principal
+
+User = get_user_model()
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user(sender, instance, **kwargs):
+    invalidate_cached_principal(instance.pk)
+
+
+@receiver(user_logged_out)
+def invalidate_on_logout(sender, request, user, **kwargs):
+    if user is not None:
+        invalidate_cached_principal(user.pk)
@@ -1,7 +1,7 @@
 from django.contrib.auth.views import LogoutView
 from django.urls import path
 
-from .views import RegisterView, RoleBasedLoginView, RoleRedirectView
+from .views import AccountActivationView, RegisterView, RoleBasedLoginView, RoleRedirectView
 
 app_name = 'accounts'
 
@@ -9,5 +9,6 @@ urlpatterns = [
     path('login/', RoleBasedLoginView.as_view(), name='login'),
     path('logout/', LogoutView.as_view(), name='logout'),
     path('register/', RegisterView.as_view(), name='register'),
+    path('activate/<uidb64>/<token>/', AccountActivationView.as_view(), name='activate'),
     path('redirect-after-login/', RoleRedirectView.as_view(), name='post-login-redirect'),
 ]
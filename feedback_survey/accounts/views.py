@@ -1,8 +1,8 @@
 from django.contrib.auth import get_user_model, login
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.contrib.auth.views import LoginView
+from django.contrib.auth.views import LoginView, PasswordResetConfirmView
 from django.shortcuts import redirect
-from django.urls import reverse
+from django.urls import reverse, reverse_lazy
 from django.views import View
 from django.views.generic import FormView
 
@@ -37,6 +37,15 @@ class RegisterView(FormView):
         return redirect(get_role_redirect_url(user))
 
 
+class AccountActivationView(PasswordResetConfirmView):
+    """Sets the first password of an account from provision_students' activation link."""
+
+    template_name = 'accounts/activate.html'
+    post_reset_login = True
+    post_reset_login_backend = 'accounts.backends.CachedModelBackend'
+    success_url = reverse_lazy('accounts:post-login-redirect')
+
+
 class RoleRedirectView(LoginRequiredMixin, View):
     def get(self, request):
         return redirect(get_role_redirect_url(request.user))
@@ -1,3 +1,14 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import SurveyAggregate
+
+
+@admin.register(SurveyAggregate)
+class SurveyAggregateAdmin(admin.ModelAdmin):
+    list_display = ('survey', 'completed_sessions', 'answer_count', 'computed_at', 'compute_seconds')
+    list_select_related = ('survey',)
+    readonly_fields = [field.name for field in SurveyAggregate._meta.fields]
+    search_fields = ('survey__title',)
+
+    def has_add_permission(self, request):
+        return False
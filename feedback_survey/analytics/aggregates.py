@@ -0,0 +1,236 @@
+"""Answer aggregations that read both multiple-choice layouts.
+
+Until every row is packed (migration responses 0004, and archived partitions
+which are never rewritten) a multiple-choice answer is either one row per
+choice in ``selected_choice_id`` or a single row with ``selected_choices``.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+
+from feedback_survey.db_routers import read_alias
+from responses.models import Answer, ArchivedAnswer, ResponseSession
+
+from .lazy import np
+
+SCALE_RANGE = range(1, 11)
+
+_CHOICE_IDS_SQL = """
+SELECT answer.selected_choice_id
+FROM {table} answer JOIN surveys_question question ON question.id = answer.question_id
+WHERE question.survey_id = %s AND answer.selected_choice_id IS NOT NULL{quality}
+UNION ALL
+SELECT unnest(answer.selected_choices)
+FROM {table} answer JOIN surveys_question question ON question.id = answer.question_id
+WHERE question.survey_id = %s AND answer.selected_choices <> '{{}}'{quality}
+"""
+
+# Appended to answer queries to drop sessions flagged by ``detect_low_quality``.
+LOW_QUALITY_EXCLUSION_SQL = """
+AND NOT EXISTS (
+    SELECT 1 FROM analytics_sessionqualityflag flag
+    WHERE flag.session_id = answer.response_session_id AND flag.is_low_quality
+)"""
+
+
+# Question and choice edits never touch survey.updated_at; this digests their
+# rows so that any edit (text, type, order, added or removed options) shows.
+_STRUCTURE_DIGEST_SQL = """
+SELECT question.survey_id, md5(string_agg(
+    concat_ws(':', question.id, question.question_type, question."order", question.text,
+              choice.id, choice."order", choice.text),
+    '|' ORDER BY question.id, choice.id
+))
+FROM surveys_question question LEFT JOIN surveys_choice choice ON choice.question_id = question.id
+WHERE question.survey_id = ANY(%s)
+GROUP BY question.survey_id
+"""
+
+_SESSION_CHOICE_IDS_SQL = """
+SELECT choice_id, count(*) FROM (
+    SELECT selected_choice_id FROM responses_answer
+    WHERE response_session_id = ANY(%(sessions)s) AND created_at >= %(since)s AND selected_choice_id IS NOT NULL
+    UNION ALL
+    SELECT unnest(selected_choices) FROM responses_answer
+    WHERE response_session_id = ANY(%(sessions)s) AND created_at >= %(since)s AND selected_choices <> '{}'
+) AS selected (choice_id)
+GROUP BY choice_id
+"""
+
+
+def exclude_low_quality() -> bool:
+    """Whether reports and aggregates leave out sessions flagged by ``detect_low_quality``."""
+    return settings.ANALYTICS_EXCLUDE_LOW_QUALITY
+
+
+def response_watermarks(surveys) -> dict[int, str]:
+    """A short digest per survey that changes whenever a response completes or the survey is edited.
+
+    Built from the completed sessions' count, latest id and latest completion
+    time, the survey's ``updated_at`` and a digest of its questions and
+    choices; with :func:`exclude_low_quality`, also from the survey's flagged
+    sessions.
+    """
+    surveys = {survey.pk: survey for survey in surveys}
+    states = {survey_id: (0, None, None) for survey_id in surveys}
+    flags = {}
+    with connections[read_alias()].cursor() as cursor:
+        cursor.execute(
+            'SELECT survey_id, count(*), max(id), max(completed_at) FROM responses_responsesession '
+            'WHERE survey_id = ANY(%s) AND status = %s GROUP BY survey_id',
+            [list(surveys), ResponseSession.Status.COMPLETED],
+        )
+        for survey_id, *state in cursor.fetchall():
+            states[survey_id] = tuple(state)
+        cursor.execute(_STRUCTURE_DIGEST_SQL, [list(surveys)])
+        structures = dict(cursor.fetchall())
+        if exclude_low_quality():
+            cursor.execute(
+                'SELECT survey_id, count(*) FILTER (WHERE is_low_quality), max(computed_at) '
+                'FROM analytics_sessionqualityflag WHERE survey_id = ANY(%s) GROUP BY survey_id',
+                [list(surveys)],
+            )
+            flags = {survey_id: f'{flagged}:{computed_at.isoformat()}' for survey_id, flagged, computed_at in cursor.fetchall()}
+    watermarks = {}
+    for survey_id, (completed, last_id, last_completed_at) in states.items():
+        state = (
+            f'{completed}:{last_id}:{last_completed_at and last_completed_at.isoformat()}:'
+            f'{surveys[survey_id].updated_at.isoformat()}:{structures.get(survey_id, "")}:{flags.get(survey_id, "")}'
+        )
+        watermarks[survey_id] = hashlib.sha1(state.encode()).hexdigest()[:16]
+    return watermarks
+
+
+def response_watermark(survey) -> str:
+    return response_watermarks([survey])[survey.pk]
+
+
+def choice_counts(
+    survey_id: int,
+    include_archived: bool = True,
+    exclude_low_quality: bool = False,
+    using: str | None = None,
+) -> dict[int, int]:
+    """How many times each choice of the survey was selected."""
+    tables = [Answer._meta.db_table]
+    if include_archived:
+        tables.append(ArchivedAnswer._meta.db_table)
+    quality = LOW_QUALITY_EXCLUSION_SQL if exclude_low_quality else ''
+    union = '\nUNION ALL\n'.join(_CHOICE_IDS_SQL.format(table=table, quality=quality) for table in tables)
+    with connections[using or read_alias()].cursor() as cursor:
+        cursor.execute(
+            f'SELECT choice_id, count(*) FROM ({union}) AS selected (choice_id) GROUP BY choice_id',
+            [survey_id, survey_id] * len(tables),
+        )
+        return dict(cursor.fetchall())
+
+
+def session_choice_counts(session_ids: list[int], since, using: str | None = None) -> dict[int, int]:
+    """Per-choice counts over the answers of ``session_ids``.
+
+    ``since`` must not be later than the earliest ``started_at`` of the
+    sessions; it only lets Postgres skip older answer partitions.
+    """
+    if not session_ids:
+        return {}
+    with connections[using or read_alias()].cursor() as cursor:
+        cursor.execute(_SESSION_CHOICE_IDS_SQL, {'sessions': list(session_ids), 'since': since})
+        return dict(cursor.fetchall())
+
+
+def scale_values(
+    question_ids: list[int],
+    include_archived: bool = True,
+    exclude_low_quality: bool = False,
+    using: str | None = None,
+) -> dict[int, list[int]]:
+    """The numeric answers given to each scale question."""
+    tables = [Answer._meta.db_table]
+    if include_archived:
+        tables.append(ArchivedAnswer._meta.db_table)
+    quality = LOW_QUALITY_EXCLUSION_SQL if exclude_low_quality else ''
+    union = '\nUNION ALL\n'.join(
+        f'SELECT answer.question_id, answer.text_answer FROM {table} answer '
+        f"WHERE answer.question_id = ANY(%s) AND answer.text_answer ~ '^[0-9]{{1,3}}$'{quality}"
+        for table in tables
+    )
+    values = {question_id: [] for question_id in question_ids}
+    with connections[using or read_alias()].cursor() as cursor:
+        cursor.execute(union, [list(question_ids)] * len(tables))
+        for question_id, value in cursor.fetchall():
+            values[question_id].append(int(value))
+    return values
+
+
+def scale_summary(values: list[int]) -> dict:
+    """Count, mean, median, standard deviation and 1–10 distribution of scale answers."""
+    if not values:
+        return {'count': 0}
+    array = np.asarray(values)
+    histogram = np.bincount(array.clip(SCALE_RANGE.start, SCALE_RANGE.stop - 1), minlength=SCALE_RANGE.stop)
+    top = histogram.max()
+    return {
+        'count': len(values),
+        'mean': float(array.mean()),
+        'median': float(np.median(array)),
+        'std': float(array.std()),
+        'distribution': [
+            {'value': value, 'count': int(histogram[value]), 'width': round(100 * histogram[value] / top)}
+            for value in SCALE_RANGE
+        ],
+    }
+
+
+def text_themes(
+    question_id: int,
+    limit: int = 10,
+    include_archived: bool = True,
+    exclude_low_quality: bool = False,
+    using: str | None = None,
+) -> list[tuple[str, int]]:
+    """Most common words of a text question's answers as ``(word, answers using it)``.
+
+    Reads the ``search_vector`` lexemes with ``ts_stat``; short words are
+    skipped because the default 'simple' configuration keeps every stop word.
+    """
+    tables = [Answer._meta.db_table]
+    if include_archived:
+        tables.append(ArchivedAnswer._meta.db_table)
+    quality = LOW_QUALITY_EXCLUSION_SQL if exclude_low_quality else ''
+    # ts_stat() takes the query as text; question_id is an int, never user input.
+    vectors = ' UNION ALL '.join(
+        f'SELECT answer.search_vector FROM {table} answer '
+        f'WHERE answer.question_id = {int(question_id)} AND answer.search_vector IS NOT NULL{quality}'
+        for table in tables
+    )
+    with connections[using or read_alias()].cursor() as cursor:
+        cursor.execute(
+            'SELECT word, ndoc FROM ts_stat(%s) WHERE char_length(word) > 3 ORDER BY ndoc DESC, word LIMIT %s',
+            [vectors, limit],
+        )
+        return cursor.fetchall()
+
+
+def low_quality_filter() -> Q:
+    """Answers of sessions flagged as low quality; use with ``.exclude()``."""
+    return Q(response_session__quality_flag__is_low_quality=True)
+
+
+def selected_choice_filter(choice_id: int) -> Q:
+    """Answers that selected ``choice_id`` in either layout; the array test uses the GIN index."""
+    return Q(selected_choice_id=choice_id) | Q(selected_choices__contains=[choice_id])
+
+
+def sessions_selecting(choice_id: int, include_archived: bool = False) -> set[int]:
+    """Ids of the response sessions in which ``choice_id`` was selected."""
+    sessions = set(
+        Answer.objects.filter(selected_choice_filter(choice_id)).values_list('response_session_id', flat=True)
+    )
+    if include_archived:
+        sessions.update(
+            ArchivedAnswer.objects.filter(selected_choice_filter(choice_id)).values_list('response_session_id', flat=True)
+        )
+    return sessions
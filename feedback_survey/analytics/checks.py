@@ -0,0 +1,20 @@
+import sys
+
+from django.core.checks import Warning, register
+
+HEAVY_MODULES = ('numpy', 'pandas', 'sklearn', 'scipy')
+
+
+@register()
+def heavy_modules_not_imported_at_startup(app_configs, **kwargs):
+    # Runs right after django.setup(); anything listed here was imported at
+    # module level somewhere and slows down every worker boot.
+    return [
+        Warning(
+            f'{name} is imported while the project loads.',
+            hint='Import it inside the job or view, or through analytics.lazy.',
+            id='analytics.W001',
+        )
+        for name in HEAVY_MODULES
+        if name in sys.modules
+    ]
@@ -0,0 +1,403 @@
+"""Near-duplicate detection of free-text answers with MinHash and LSH.
+
+Each answer is normalized (lowercase, punctuation folded to spaces), cut into
+overlapping ``SHINGLE_SIZE``-character shingles and summarized by a
+``NUM_PERM``-value MinHash signature, whose share of equal values estimates
+the Jaccard similarity of two answers' shingle sets. The signature is split
+into ``BANDS`` bands; answers sharing a band hash are candidates, and only
+candidates are compared, so a survey is grouped in near-linear time instead
+of comparing every pair.
+
+:func:`index_survey` rebuilds a survey's signatures and groups in bulk
+(``manage.py build_duplicate_index``); :func:`index_new_sessions` adds the text
+answers of sessions completed since the survey's last run and merges them into
+existing groups (``build_duplicate_index --incremental``), so submissions never
+wait for the index.
+"""
+
+import csv
+import io
+import re
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from functools import cache
+
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from feedback_survey.db_routers import read_alias
+from responses.models import Answer, ArchivedAnswer, ResponseSession
+from surveys.models import Question
+
+from .lazy import np
+from .models import DuplicateIndexState, TextAnswerSignature
+
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+# Estimated Jaccard similarity from which two answers count as near-duplicates;
+# with 16 bands of 4 rows, pairs at this similarity become candidates 98.8% of the time.
+SIMILARITY_THRESHOLD = 0.7
+# Shorter answers ("ні", "все добре") repeat naturally and are not indexed.
+MIN_TEXT_LENGTH = 20
+SHINGLE_CHUNK_SIZE = 5000
+# Fixed, so that signatures computed by different runs stay comparable.
+PERMUTATION_SEED = 20240901
+# pg_advisory_xact_lock namespace serializing index updates of one survey.
+LOCK_NAMESPACE = 4501
+# Incremental runs look back this far past the previous run's start, for
+# sessions that were still being committed then; re-indexing one is harmless.
+INCREMENTAL_OVERLAP = timedelta(minutes=5)
+
+_NON_WORD = re.compile(r'[\W_]+')
+
+SIGNATURE_COLUMNS = ('answer_id', 'session_id', 'survey_id', 'question_id', 'signature', 'bands', 'group_id', 'indexed_at')
+
+
+@dataclass
+class DuplicateStats:
+    survey_id: int
+    answers: int
+    grouped: int
+    groups: int
+    seconds: float = 0.0
+
+
+def normalize_text(text: str) -> str:
+    return _NON_WORD.sub(' ', text.lower()).strip()
+
+
+@cache
+def _permutations():
+    rng = np.random.default_rng(PERMUTATION_SEED)
+    # Odd multipliers keep the multiply-shift hashes universal.
+    multipliers = rng.integers(1, 2**63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+    offsets = rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64)
+    return multipliers, offsets
+
+
+def shingle_hashes(texts: list[str]):
+    """32-bit hashes of every shingle of ``texts``, concatenated, and each text's first index.
+
+    Texts shorter than a shingle are padded to one shingle.
+    """
+    codes = [np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32) for text in texts]
+    lengths = np.array([max(len(code), SHINGLE_SIZE) for code in codes], dtype=np.int64)
+    starts = np.cumsum(lengths) - lengths
+    buffer = np.zeros(int(lengths.sum()), dtype=np.uint64)
+    for code, start in zip(codes, starts):
+        buffer[start:start + len(code)] = code
+    windows = np.lib.stride_tricks.sliding_window_view(buffer, SHINGLE_SIZE)
+    # Only windows lying inside one text are shingles.
+    counts = lengths - SHINGLE_SIZE + 1
+    offsets = np.cumsum(counts) - counts
+    window_index = np.repeat(starts - offsets, counts) + np.arange(int(counts.sum()))
+    powers = np.uint64(1_000_003) ** np.arange(SHINGLE_SIZE, dtype=np.uint64)
+    hashes = (windows[window_index] * powers).sum(axis=1, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    return hashes >> np.uint64(32), offsets
+
+
+def minhash_signatures(texts: list[str]):
+    """``len(texts)`` × ``NUM_PERM`` MinHash signatures of already normalized texts."""
+    signatures = np.empty((len(texts), NUM_PERM), dtype=np.uint64)
+    multipliers, offsets = _permutations()
+    for chunk_start in range(0, len(texts), SHINGLE_CHUNK_SIZE):
+        chunk = texts[chunk_start:chunk_start + SHINGLE_CHUNK_SIZE]
+        hashes, text_offsets = shingle_hashes(chunk)
+        for index in range(NUM_PERM):
+            permuted = (multipliers[index] * hashes + offsets[index]) >> np.uint64(32)
+            signatures[chunk_start:chunk_start + len(chunk), index] = np.minimum.reduceat(permuted, text_offsets)
+    return signatures
+
+
+def band_hashes(signatures, survey_id: int):
+    """One 64-bit hash per band of each signature, salted with the survey id."""
+    prime = np.uint64(0x100000001B3)
+    bands = np.empty((len(signatures), BANDS), dtype=np.uint64)
+    for band in range(BANDS):
+        hashed = np.full(len(signatures), np.uint64(survey_id) * np.uint64(BANDS) + np.uint64(band), dtype=np.uint64)
+        for row in range(band * ROWS_PER_BAND, (band + 1) * ROWS_PER_BAND):
+            hashed = (hashed ^ signatures[:, row]) * prime
+        bands[:, band] = hashed
+    return bands.view(np.int64)
+
+
+def similarities(left, right):
+    return (left == right).mean(axis=-1)
+
+
+def components(size: int, left, right):
+    """Smallest member index of each node's connected component, by label propagation."""
+    labels = np.arange(size)
+    while True:
+        lowest = np.minimum(labels[left], labels[right])
+        updated = labels.copy()
+        np.minimum.at(updated, left, lowest)
+        np.minimum.at(updated, right, lowest)
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+def candidate_pairs(bands):
+    """Index pairs sharing a band hash; each bucket is linked to its first member only."""
+    left, right = [], []
+    positions = np.arange(len(bands))
+    for band in range(bands.shape[1]):
+        order = np.argsort(bands[:, band], kind='stable')
+        values = bands[order, band]
+        run_start = np.r_[True, values[1:] != values[:-1]]
+        first = order[np.maximum.accumulate(np.where(run_start, positions, 0))]
+        left.append(first[~run_start])
+        right.append(order[~run_start])
+    pairs = np.unique(np.concatenate(left) * len(bands) + np.concatenate(right))
+    return pairs // len(bands), pairs % len(bands)
+
+
+def group_ids(answer_ids, signatures, bands):
+    """Near-duplicate group of each answer (smallest answer id in it), or -1 if it has none.
+
+    ``answer_ids`` must be sorted ascending.
+    """
+    left, right = candidate_pairs(bands)
+    keep = np.zeros(len(left), dtype=bool)
+    for start in range(0, len(left), 200_000):
+        part = slice(start, start + 200_000)
+        keep[part] = similarities(signatures[left[part]], signatures[right[part]]) >= SIMILARITY_THRESHOLD
+    labels = components(len(answer_ids), left[keep], right[keep])
+    sizes = np.bincount(labels, minlength=len(answer_ids))
+    return np.where(sizes[labels] > 1, answer_ids[labels], -1)
+
+
+def _text_question_ids(survey_id: int) -> list[int]:
+    return list(
+        Question.objects.filter(survey_id=survey_id, question_type=Question.QuestionType.TEXT).values_list('pk', flat=True)
+    )
+
+
+def _indexable(rows):
+    """``(answer_id, session_id, question_id, normalized text)`` of rows long enough to index."""
+    for answer_id, session_id, question_id, text in rows:
+        text = normalize_text(text)
+        if len(text) >= MIN_TEXT_LENGTH:
+            yield answer_id, session_id, question_id, text
+
+
+def _array(values) -> str:
+    return '{' + ','.join(map(str, values)) + '}'
+
+
+def _lock_survey(cursor, survey_id: int) -> None:
+    cursor.execute('SELECT pg_advisory_xact_lock(%s, %s)', [LOCK_NAMESPACE, survey_id])
+
+
+def _regroup(cursor, survey_id: int, group_ids: list[int]) -> None:
+    """Renumber the groups after some of their members were removed; a group left with one member is dissolved."""
+    table = TextAnswerSignature._meta.db_table
+    cursor.execute(
+        f"""
+        UPDATE {table} signature
+        SET group_id = CASE WHEN remaining.size > 1 THEN remaining.first_id END
+        FROM (
+            SELECT group_id, min(answer_id) AS first_id, count(*) AS size
+            FROM {table}
+            WHERE survey_id = %s AND group_id = ANY(%s)
+            GROUP BY group_id
+        ) remaining
+        WHERE signature.survey_id = %s AND signature.group_id = remaining.group_id
+        """,
+        [survey_id, group_ids, survey_id],
+    )
+
+
+def _mark_indexed(survey_id: int, until) -> None:
+    DuplicateIndexState.objects.update_or_create(survey_id=survey_id, defaults={'indexed_until': until})
+
+
+def index_survey(survey_id: int) -> DuplicateStats:
+    """Rebuild the survey's signatures and near-duplicate groups from scratch."""
+    started = time.perf_counter()
+    started_at = timezone.now()
+    question_ids = _text_question_ids(survey_id)
+    rows = []
+    fields = ('pk', 'response_session_id', 'question_id', 'text_answer')
+    for model in (Answer, ArchivedAnswer):
+        answers = model.objects.filter(
+            question_id__in=question_ids,
+            response_session__status=ResponseSession.Status.COMPLETED,
+        ).exclude(text_answer='')
+        rows.extend(_indexable(answers.values_list(*fields).iterator(chunk_size=5000)))
+    rows.sort()
+
+    buffer = io.StringIO()
+    groups = np.empty(0, dtype=np.int64)
+    if rows:
+        answer_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        signatures = minhash_signatures([row[3] for row in rows])
+        bands = band_hashes(signatures, survey_id)
+        groups = group_ids(answer_ids, signatures, bands)
+        indexed_at = timezone.now().isoformat()
+        # One hex dump of the whole matrix, sliced per row.
+        hex_signatures = signatures.astype('<u4').tobytes().hex()
+        width = NUM_PERM * 8
+        csv.writer(buffer).writerows(
+            (
+                answer_id, session_id, survey_id, question_id, '\\x' + hex_signatures[index * width:(index + 1) * width],
+                _array(band), '' if group < 0 else group, indexed_at,
+            )
+            for index, ((answer_id, session_id, question_id, _), band, group) in enumerate(
+                zip(rows, bands.tolist(), groups.tolist())
+            )
+        )
+        buffer.seek(0)
+    with transaction.atomic(), connection.cursor() as cursor:
+        _lock_survey(cursor, survey_id)
+        TextAnswerSignature.objects.filter(survey_id=survey_id).delete()
+        if rows:
+            cursor.copy_expert(
+                f"COPY {TextAnswerSignature._meta.db_table} ({', '.join(SIGNATURE_COLUMNS)}) FROM STDIN WITH (FORMAT csv, NULL '')",
+                buffer,
+            )
+        _mark_indexed(survey_id, started_at)
+    grouped = groups[groups >= 0]
+    return DuplicateStats(survey_id, len(rows), len(grouped), len(np.unique(grouped)), time.perf_counter() - started)
+
+
+def index_session(session_id: int) -> list[int | None]:
+    """Index the text answers of a completed session and merge them into the survey's groups.
+
+    Returns the group of each indexed answer, None for answers in none.
+    """
+    session = ResponseSession.objects.filter(pk=session_id, status=ResponseSession.Status.COMPLETED).first()
+    if session is None:
+        return []
+    answers = Answer.objects.filter(
+        response_session_id=session_id,
+        question_id__in=_text_question_ids(session.survey_id),
+    ).exclude(text_answer='')
+    rows = sorted(_indexable(answers.values_list('pk', 'response_session_id', 'question_id', 'text_answer')))
+    with transaction.atomic(), connection.cursor() as cursor:
+        _lock_survey(cursor, session.survey_id)
+        # A resubmission replaces the session's answers, and with them their ids,
+        # which may be the ids of the groups they were in.
+        previous = TextAnswerSignature.objects.filter(session_id=session_id)
+        affected = list(previous.exclude(group_id=None).values_list('group_id', flat=True).distinct())
+        previous.delete()
+        if affected:
+            _regroup(cursor, session.survey_id, affected)
+        if not rows:
+            return []
+        signatures = minhash_signatures([row[3] for row in rows])
+        bands = band_hashes(signatures, session.survey_id)
+        candidates = list(
+            TextAnswerSignature.objects.filter(
+                survey_id=session.survey_id,
+                bands__overlap=np.unique(bands).tolist(),
+            ).values_list('answer_id', 'signature', 'group_id')
+        )
+        # Nodes are the session's answers followed by the candidates.
+        new_count = len(rows)
+        node_ids = np.array([row[0] for row in rows] + [row[0] for row in candidates], dtype=np.int64)
+        node_signatures = signatures
+        if candidates:
+            stored = np.frombuffer(b''.join(bytes(row[1]) for row in candidates), dtype='<u4').reshape(-1, NUM_PERM)
+            node_signatures = np.vstack([signatures, stored.astype(np.uint64)])
+        matches = similarities(signatures[:, None, :], node_signatures[None, :, :]) >= SIMILARITY_THRESHOLD
+        left, right = np.nonzero(matches)
+        labels = components(len(node_ids), left, right)
+        existing_groups = [None] * new_count + [row[2] for row in candidates]
+
+        new_groups = [None] * new_count
+        for label in np.unique(labels[:new_count]):
+            members = np.flatnonzero(labels == label)
+            if len(members) == 1:
+                continue
+            merged = {existing_groups[member] for member in members} - {None}
+            group = min(merged | set(node_ids[members].tolist()))
+            TextAnswerSignature.objects.filter(survey_id=session.survey_id, group_id__in=merged).update(group_id=group)
+            TextAnswerSignature.objects.filter(
+                answer_id__in=node_ids[members[members >= new_count]].tolist(),
+            ).update(group_id=group)
+            for member in members[members < new_count]:
+                new_groups[member] = group
+
+        indexed_at = timezone.now()
+        TextAnswerSignature.objects.bulk_create(
+            TextAnswerSignature(
+                answer_id=answer_id,
+                session_id=session_id,
+                survey_id=session.survey_id,
+                question_id=question_id,
+                signature=signature.astype('<u4').tobytes(),
+                bands=band,
+                group_id=group,
+                indexed_at=indexed_at,
+            )
+            for (answer_id, _, question_id, _), signature, band, group in zip(
+                rows, signatures, bands.tolist(), new_groups
+            )
+        )
+    return new_groups
+
+
+def index_new_sessions(survey_id: int) -> DuplicateStats:
+    """Index the sessions completed since the survey's last run; the first run rebuilds the survey."""
+    state = DuplicateIndexState.objects.filter(survey_id=survey_id).first()
+    if state is None:
+        return index_survey(survey_id)
+    started = time.perf_counter()
+    started_at = timezone.now()
+    session_ids = ResponseSession.objects.filter(
+        survey_id=survey_id,
+        status=ResponseSession.Status.COMPLETED,
+        completed_at__gte=state.indexed_until - INCREMENTAL_OVERLAP,
+    ).order_by('pk').values_list('pk', flat=True)
+    groups = [group for session_id in session_ids for group in index_session(session_id)]
+    _mark_indexed(survey_id, started_at)
+    grouped = [group for group in groups if group is not None]
+    return DuplicateStats(survey_id, len(groups), len(grouped), len(set(grouped)), time.perf_counter() - started)
+
+
+def duplicate_groups(survey_id: int, limit: int = 50, sample: int = 5) -> list[dict]:
+    """Largest near-duplicate groups of the survey, with up to ``sample`` of their answers."""
+    with connections[read_alias()].cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT group_id, count(*), (array_agg(answer_id ORDER BY answer_id))[1:%s]
+            FROM {TextAnswerSignature._meta.db_table}
+            WHERE survey_id = %s AND group_id IS NOT NULL
+            GROUP BY group_id HAVING count(*) > 1
+            ORDER BY count(*) DESC, group_id LIMIT %s
+            """,
+            [sample, survey_id, limit],
+        )
+        groups = cursor.fetchall()
+    answer_ids = [answer_id for _, _, sample_ids in groups for answer_id in sample_ids]
+    texts = {}
+    for model in (Answer, ArchivedAnswer):
+        for answer_id, text, question in model.objects.filter(pk__in=answer_ids).values_list('pk', 'text_answer', 'question__text'):
+            texts[answer_id] = (text, question)
+    return [
+        {
+            'group_id': group_id,
+            'size': size,
+            'answers': [texts[answer_id] for answer_id in sample_ids if answer_id in texts],
+        }
+        for group_id, size, sample_ids in groups
+    ]
+
+
+def duplicate_summary(survey_id: int) -> dict:
+    with connections[read_alias()].cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT count(*), count(group_id), count(DISTINCT group_id)
+            FROM {TextAnswerSignature._meta.db_table} WHERE survey_id = %s
+            """,
+            [survey_id],
+        )
+        indexed, grouped, groups = cursor.fetchone()
+    return {'indexed': indexed, 'grouped': grouped, 'groups': groups}
@@ -0,0 +1,22 @@
+from django import forms
+
+GROUP_BY_CHOICES = [
+    ('discipline', 'Дисципліна'),
+    ('author', 'Викладач'),
+    ('faculty', 'Факультет'),
+]
+
+
+class ComparisonForm(forms.Form):
+    question_template = forms.TypedChoiceField(coerce=int, label='Питання')
+    group_by = forms.ChoiceField(choices=GROUP_BY_CHOICES, initial='discipline', label='Рядки')
+    discipline = forms.ChoiceField(required=False, label='Дисципліна')
+    author = forms.TypedChoiceField(coerce=int, empty_value=None, required=False, label='Викладач')
+    faculty = forms.ChoiceField(required=False, label='Факультет')
+
+    def __init__(self, *args, templates=(), disciplines=(), authors=(), faculties=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['question_template'].choices = list(templates)
+        self.fields['discipline'].choices = [('', 'Усі дисципліни'), *((value, value) for value in disciplines)]
+        self.fields['author'].choices = [('', 'Усі викладачі'), *authors]
+        self.fields['faculty'].choices = [('', 'Усі факультети'), *((value, value) for value in faculties)]
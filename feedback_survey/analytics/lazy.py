@@ -0,0 +1,28 @@
+import importlib
+
+
+class LazyModule:
+    """Module proxy that performs the real import on first attribute access.
+
+    pandas, NumPy and scikit-learn together take seconds to import; analytics
+    code binds them through this proxy at module level (``pd = LazyModule('pandas')``)
+    so that worker boot and unrelated ``manage.py`` commands never pay for them.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f'<LazyModule {self._name!r} ({state})>'
+
+
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+sklearn_ensemble = LazyModule('sklearn.ensemble')
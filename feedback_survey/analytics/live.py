@@ -0,0 +1,230 @@
+"""Live per-choice counts of a survey, shared by every viewer in the process.
+
+One :class:`LiveResultsFeed` per survey and event loop takes a full snapshot
+once, then every LIVE_RESULTS_INTERVAL seconds looks only at the sessions
+completed since its previous batch and fans the per-choice deltas out to all
+subscribed streams. However many teachers watch a survey, the database sees
+one small incremental query per interval.
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import weakref
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections, transaction
+
+from feedback_survey.db_routers import read_alias, replica_reads
+from responses.models import ResponseSession
+
+from .aggregates import choice_counts, session_choice_counts
+
+logger = logging.getLogger(__name__)
+
+# Sessions commit a little after their completed_at is taken (and reach the
+# replica later still), so each batch re-reads this much history and skips
+# the session ids it has already counted.
+LATE_COMMIT_WINDOW = timedelta(seconds=30)
+# A feed with no subscribers keeps polling this long, so reloads reuse it.
+IDLE_LINGER_SECONDS = 10
+SUBSCRIBER_QUEUE_SIZE = 32
+# How often a browser re-requests the one-off snapshot served outside ASGI.
+SNAPSHOT_RETRY_SECONDS = 10
+
+_RECENT_SESSIONS_SQL = """
+SELECT id, started_at, completed_at FROM responses_responsesession
+WHERE survey_id = %s AND status = %s AND completed_at >= %s
+"""
+
+_feeds: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[int, LiveResultsFeed]]' = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _read_alias() -> str:
+    with replica_reads():
+        return read_alias()
+
+
+class LiveResultsFeed:
+    def __init__(self, survey_id: int):
+        self.survey_id = survey_id
+        self.subscribers: set[asyncio.Queue] = set()
+        self.ready = asyncio.Event()
+        self.failed = False
+        self.version = 0
+        self.completed = 0
+        self.counts: dict[int, int] = {}
+        # Session id -> completed_at of the sessions inside the late-commit window.
+        self.recent: dict[int, object] = {}
+        self.watermark = None
+        self.task = None
+
+    def start(self) -> None:
+        # A fresh context: the feed outlives the request that started it and
+        # must not inherit its replica routing or slow-query attribution.
+        self.task = asyncio.get_running_loop().create_task(self.run(), context=contextvars.Context())
+
+    async def subscribe(self) -> tuple[asyncio.Queue, dict]:
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.subscribers.add(queue)
+        await self.ready.wait()
+        return queue, self.snapshot()
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self.subscribers.discard(queue)
+
+    def snapshot(self) -> dict:
+        return {
+            'version': self.version,
+            'completed': self.completed,
+            'counts': {str(choice_id): count for choice_id, count in self.counts.items()},
+        }
+
+    async def run(self) -> None:
+        interval = settings.LIVE_RESULTS_INTERVAL
+        try:
+            await sync_to_async(self.load_snapshot)()
+        except Exception:
+            logger.exception('Live results snapshot for survey %s failed', self.survey_id)
+            self.failed = True
+            self.ready.set()
+            self._forget()
+            return
+        self.ready.set()
+        idle = 0.0
+        while True:
+            await asyncio.sleep(interval)
+            if not self.subscribers:
+                idle += interval
+                if idle >= IDLE_LINGER_SECONDS:
+                    break
+                continue
+            idle = 0.0
+            try:
+                completed, deltas = await sync_to_async(self.load_batch)()
+            except Exception:
+                logger.exception('Live results update for survey %s failed', self.survey_id)
+                continue
+            if completed:
+                self.publish(completed, deltas)
+        self._forget()
+
+    def _forget(self) -> None:
+        feeds = _feeds.get(asyncio.get_running_loop(), {})
+        if feeds.get(self.survey_id) is self:
+            del feeds[self.survey_id]
+
+    def load_snapshot(self) -> None:
+        using = _read_alias()
+        with transaction.atomic(using=using), connections[using].cursor() as cursor:
+            # One snapshot for all three reads, so every session is either in
+            # the totals or still ahead of the watermark, never both.
+            cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY')
+            cursor.execute('SELECT transaction_timestamp()')
+            now = cursor.fetchone()[0]
+            cursor.execute(
+                _RECENT_SESSIONS_SQL,
+                [self.survey_id, ResponseSession.Status.COMPLETED, now - LATE_COMMIT_WINDOW],
+            )
+            self.recent = {session_id: completed_at for session_id, _, completed_at in cursor.fetchall()}
+            cursor.execute(
+                'SELECT count(*) FROM responses_responsesession WHERE survey_id = %s AND status = %s',
+                [self.survey_id, ResponseSession.Status.COMPLETED],
+            )
+            self.completed = cursor.fetchone()[0]
+            self.counts = choice_counts(self.survey_id, using=using)
+        self.watermark = max([now, *self.recent.values()])
+
+    def load_batch(self) -> tuple[int, dict[int, int]]:
+        using = _read_alias()
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                _RECENT_SESSIONS_SQL,
+                [self.survey_id, ResponseSession.Status.COMPLETED, self.watermark - LATE_COMMIT_WINDOW],
+            )
+            new_sessions = [row for row in cursor.fetchall() if row[0] not in self.recent]
+        if not new_sessions:
+            return 0, {}
+        deltas = session_choice_counts(
+            [session_id for session_id, _, _ in new_sessions],
+            since=min(started_at for _, started_at, _ in new_sessions),
+            using=using,
+        )
+        self.recent.update((session_id, completed_at) for session_id, _, completed_at in new_sessions)
+        self.watermark = max(self.watermark, *self.recent.values())
+        horizon = self.watermark - LATE_COMMIT_WINDOW
+        self.recent = {session_id: at for session_id, at in self.recent.items() if at >= horizon}
+        return len(new_sessions), deltas
+
+    def publish(self, completed: int, deltas: dict[int, int]) -> None:
+        self.version += 1
+        self.completed += completed
+        for choice_id, count in deltas.items():
+            self.counts[choice_id] = self.counts.get(choice_id, 0) + count
+        update = {
+            'version': self.version,
+            'completed': completed,
+            'counts': {str(choice_id): count for choice_id, count in deltas.items()},
+        }
+        for queue in self.subscribers:
+            if queue.full():
+                # A stalled client gets the current totals instead of a backlog.
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(('snapshot', self.snapshot()))
+            else:
+                queue.put_nowait(('update', update))
+
+
+def get_feed(survey_id: int) -> LiveResultsFeed:
+    feeds = _feeds.setdefault(asyncio.get_running_loop(), {})
+    feed = feeds.get(survey_id)
+    if feed is None:
+        feed = feeds[survey_id] = LiveResultsFeed(survey_id)
+        feed.start()
+    return feed
+
+
+def format_event(event: str, data: dict) -> str:
+    return f'event: {event}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'
+
+
+def snapshot_event(survey_id: int) -> str:
+    """A single ``snapshot`` event, for servers that can't hold a stream open.
+
+    The browser reconnects after SNAPSHOT_RETRY_SECONDS, so the page degrades
+    to polling instead of pinning a worker thread.
+    """
+    feed = LiveResultsFeed(survey_id)
+    feed.load_snapshot()
+    return f'retry: {SNAPSHOT_RETRY_SECONDS * 1000}\n' + format_event('snapshot', feed.snapshot())
+
+
+async def stream_results(survey_id: int):
+    """Server-sent events: one ``snapshot`` with the totals, then ``update`` deltas."""
+    feed = get_feed(survey_id)
+    queue, snapshot = await feed.subscribe()
+    try:
+        if feed.failed:
+            yield format_event('error', {})
+            return
+        yield 'retry: 3000\n' + format_event('snapshot', snapshot)
+        version = snapshot['version']
+        while True:
+            try:
+                event, data = await asyncio.wait_for(queue.get(), settings.LIVE_RESULTS_KEEPALIVE)
+            except TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            # Updates queued before the snapshot was taken are already in it.
+            if data['version'] <= version:
+                continue
+            version = data['version']
+            yield format_event(event, data)
+    finally:
+        feed.unsubscribe(queue)
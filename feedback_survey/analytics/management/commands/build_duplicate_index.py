@@ -0,0 +1,65 @@
+import time
+from concurrent.futures import as_completed
+
+from django.core.management.base import BaseCommand
+
+from analytics.duplicates import index_new_sessions, index_survey
+from analytics.pool import worker_pool
+from feedback_survey.db_routers import replica_reads
+from surveys.models import Question, Survey
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the MinHash signatures of free-text answers and their near-duplicate groups; run this '
+        'after imports or to start over. Schedule --incremental every few minutes to add the sessions '
+        'completed since the last run.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--survey', type=int, action='append', dest='surveys', help='Survey id; repeatable.')
+        parser.add_argument('--workers', type=int, default=1, help='Worker processes; 0 for one per core.')
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Only index sessions completed since the last run (surveys never indexed are rebuilt).',
+        )
+
+    @replica_reads()
+    def handle(self, *args, **options):
+        survey_ids = options['surveys'] or list(
+            Survey.objects.filter(questions__question_type=Question.QuestionType.TEXT)
+            .distinct()
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        if not survey_ids:
+            self.stdout.write('No surveys with text questions.')
+            return
+
+        index = index_new_sessions if options['incremental'] else index_survey
+        started = time.perf_counter()
+        results = []
+        if options['workers'] == 1:
+            for survey_id in survey_ids:
+                results.append(index(survey_id))
+                self.report(results[-1], options['verbosity'])
+        else:
+            with worker_pool(options['workers'] or None) as executor:
+                futures = [executor.submit(index, survey_id) for survey_id in survey_ids]
+                for future in as_completed(futures):
+                    results.append(future.result())
+                    self.report(results[-1], options['verbosity'])
+
+        self.stdout.write(
+            f'Indexed {sum(result.answers for result in results)} answer(s) in {len(results)} survey(s): '
+            f'{sum(result.grouped for result in results)} in {sum(result.groups for result in results)} '
+            f'near-duplicate group(s), in {time.perf_counter() - started:.1f}s'
+        )
+
+    def report(self, result, verbosity):
+        if verbosity > 1:
+            self.stdout.write(
+                f'survey {result.survey_id}: {result.answers} answers, {result.grouped} in {result.groups} groups, '
+                f'{result.seconds:.2f}s'
+            )
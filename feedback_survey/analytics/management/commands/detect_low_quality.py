@@ -0,0 +1,61 @@
+import time
+from concurrent.futures import as_completed
+
+from django.core.management.base import BaseCommand
+
+from analytics.pool import worker_pool
+from analytics.quality import detect_survey, surveys_needing_scores
+from feedback_survey.db_routers import replica_reads
+from surveys.models import Survey
+
+
+class Command(BaseCommand):
+    help = (
+        'Score completed sessions for straight-lining, speed and answer patterns (optionally '
+        'IsolationForest outliers) and store the results as SessionQualityFlag rows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--survey', type=int, action='append', dest='surveys', help='Survey id; repeatable.')
+        parser.add_argument('--all', action='store_true', help='Rescore every survey, not only those with unscored sessions.')
+        parser.add_argument('--isolation-forest', action='store_true', help='Also compute IsolationForest outlier scores.')
+        parser.add_argument('--workers', type=int, default=1, help='Worker processes; 0 for one per core.')
+
+    @replica_reads()
+    def handle(self, *args, **options):
+        if options['surveys']:
+            survey_ids = options['surveys']
+        elif options['all']:
+            survey_ids = list(Survey.objects.order_by('pk').values_list('pk', flat=True))
+        else:
+            survey_ids = surveys_needing_scores()
+        if not survey_ids:
+            self.stdout.write('No sessions to score.')
+            return
+
+        started = time.perf_counter()
+        results = []
+        if options['workers'] == 1:
+            for survey_id in survey_ids:
+                results.append(detect_survey(survey_id, options['isolation_forest']))
+                self.report(results[-1], options['verbosity'])
+        else:
+            with worker_pool(options['workers'] or None) as executor:
+                futures = [executor.submit(detect_survey, survey_id, options['isolation_forest']) for survey_id in survey_ids]
+                for future in as_completed(futures):
+                    results.append(future.result())
+                    self.report(results[-1], options['verbosity'])
+
+        sessions = sum(result.sessions for result in results)
+        flagged = sum(result.flagged for result in results)
+        share = f' ({100 * flagged / sessions:.1f}%)' if sessions else ''
+        self.stdout.write(
+            f'Scored {sessions} session(s) in {len(results)} survey(s), {flagged} flagged as low quality{share}, '
+            f'in {time.perf_counter() - started:.1f}s'
+        )
+
+    def report(self, result, verbosity):
+        if verbosity > 1:
+            self.stdout.write(
+                f'survey {result.survey_id}: {result.sessions} sessions, {result.flagged} flagged, {result.seconds:.2f}s'
+            )
@@ -0,0 +1,84 @@
+import time
+from concurrent.futures import as_completed
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from analytics.pool import worker_pool
+from analytics.recompute import default_checkpoint, recompute_chunk
+from feedback_survey.db_routers import replica_reads
+from surveys.models import Survey
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the precomputed aggregates of every survey whose responses changed, '
+        'fanning chunks of surveys out across a process pool. Resumes an interrupted run.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=50, help='Surveys per worker task.')
+        parser.add_argument('--workers', type=int, help='Worker processes (defaults to the number of cores).')
+        parser.add_argument('--force', action='store_true', help='Recompute surveys whose watermark has not moved, and final aggregates of closed surveys.')
+        parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint of an interrupted run.')
+        parser.add_argument('--slowest', type=int, default=10, help='How many of the slowest surveys to list.')
+
+    @replica_reads()
+    def handle(self, *args, **options):
+        checkpoint = default_checkpoint()
+        if options['restart']:
+            checkpoint.clear()
+        if checkpoint.load():
+            self.stdout.write(f'Resuming the run started {checkpoint.started_at}: {len(checkpoint.done)} survey(s) done.')
+        else:
+            checkpoint.started_at = timezone.now().isoformat()
+
+        survey_ids = [
+            survey_id
+            for survey_id in Survey.objects.order_by('pk').values_list('pk', flat=True)
+            if survey_id not in checkpoint.done
+        ]
+        size = options['chunk_size']
+        chunks = [survey_ids[start:start + size] for start in range(0, len(survey_ids), size)]
+        verbose = options['verbosity'] > 1
+        counts = {'computed': 0, 'unchanged': 0, 'final': 0, 'missing': 0}
+        computed = []
+        failed = []
+        started = time.perf_counter()
+
+        with worker_pool(options['workers']) as executor:
+            futures = {executor.submit(recompute_chunk, chunk, options['force']): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                chunk = futures[future]
+                try:
+                    timings = future.result()
+                except Exception as exc:
+                    failed.append(chunk)
+                    self.stderr.write(f'Chunk {chunk[0]}–{chunk[-1]} failed: {type(exc).__name__}: {exc}')
+                    continue
+                for timing in timings:
+                    counts[timing.status] += 1
+                    if timing.status == 'computed':
+                        computed.append(timing)
+                        if verbose:
+                            self.stdout.write(
+                                f'survey {timing.survey_id}: {timing.answers} answers in {timing.seconds:.2f}s'
+                            )
+                checkpoint.done.update(chunk)
+                checkpoint.save()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{counts["computed"]} computed, {counts["unchanged"]} unchanged, {counts["final"]} final, '
+            f'{counts["missing"]} missing, '
+            f'{sum(len(chunk) for chunk in failed)} failed in {elapsed:.1f}s'
+        )
+        if computed:
+            total = sum(timing.seconds for timing in computed)
+            self.stdout.write(f'Survey compute time: {total:.1f}s total, {total / len(computed):.3f}s mean')
+            for timing in sorted(computed, key=lambda timing: timing.seconds, reverse=True)[:options['slowest']]:
+                self.stdout.write(f'  survey {timing.survey_id}: {timing.seconds:.2f}s ({timing.answers} answers)')
+        if failed:
+            self.stderr.write('Run incomplete; run the command again to resume.')
+        else:
+            checkpoint.clear()
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from analytics.rollups import refresh_rollups
+from feedback_survey.db_routers import replica_reads
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the comparison rollup facts of surveys whose responses changed since the last refresh.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rebuild the facts of every survey.')
+
+    @replica_reads()
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        def progress(surveys, facts):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{surveys} survey(s) refreshed, {facts} fact row(s)')
+
+        surveys, facts = refresh_rollups(force=options['force'], progress=progress)
+        self.stdout.write(f'Refreshed {surveys} survey(s), wrote {facts} fact row(s) in {time.perf_counter() - started:.1f}s')
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from analytics.reports import pending_survey_ids, render_reports
+from feedback_survey.db_routers import replica_reads
+from surveys.models import Survey
+
+
+class Command(BaseCommand):
+    help = 'Render the HTML report of closed (or the given) surveys across a process pool.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--survey', type=int, action='append', dest='surveys', help='Survey id; repeatable.')
+        parser.add_argument('--pending', action='store_true', help='Only surveys whose report was requested from the web.')
+        parser.add_argument('--workers', type=int, help='Worker processes (defaults to the number of cores).')
+        parser.add_argument('--force', action='store_true', help='Re-render even if the cached report is current.')
+
+    @replica_reads()
+    def handle(self, *args, **options):
+        if options['surveys'] and options['pending']:
+            raise CommandError('Use either --survey or --pending.')
+        if options['surveys']:
+            survey_ids = options['surveys']
+        elif options['pending']:
+            survey_ids = pending_survey_ids()
+        else:
+            survey_ids = list(
+                Survey.objects.filter(status=Survey.Status.CLOSED).order_by('pk').values_list('pk', flat=True)
+            )
+        if not survey_ids:
+            self.stdout.write('Nothing to render.')
+            return
+
+        verbose = options['verbosity'] > 1
+
+        def progress(survey_id, status, seconds):
+            if verbose:
+                self.stdout.write(f'survey {survey_id}: {status} in {seconds:.2f}s')
+
+        started = time.perf_counter()
+        stats = render_reports(survey_ids, workers=options['workers'], force=options['force'], progress=progress)
+        for survey_id, error in sorted(stats.failed.items()):
+            self.stderr.write(f'survey {survey_id}: {error}')
+        self.stdout.write(
+            f'{stats.rendered} rendered, {stats.cached} up to date, {stats.missing} missing, '
+            f'{len(stats.failed)} failed in {time.perf_counter() - started:.1f}s'
+        )
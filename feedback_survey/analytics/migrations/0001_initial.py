@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('surveys', '0003_survey_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SurveyAggregate',
+            fields=[
+                ('survey', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='aggregate', serialize=False, to='surveys.survey')),
+                ('watermark', models.CharField(max_length=16)),
+                ('completed_sessions', models.PositiveIntegerField(default=0)),
+                ('answer_count', models.PositiveIntegerField(default=0)),
+                ('choice_counts', models.JSONField(default=dict)),
+                ('scale_stats', models.JSONField(default=dict)),
+                ('text_answer_counts', models.JSONField(default=dict)),
+                ('computed_at', models.DateTimeField()),
+                ('compute_seconds', models.FloatField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:13
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+        ('surveys', '0003_survey_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=40, unique=True)),
+                ('text', models.TextField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RollupState',
+            fields=[
+                ('survey', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='surveys.survey')),
+                ('watermark', models.CharField(max_length=16)),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ScaleFact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('discipline', models.CharField(blank=True, max_length=255)),
+                ('faculty', models.CharField(blank=True, max_length=255)),
+                ('semester', models.DateField()),
+                ('responses', models.PositiveIntegerField()),
+                ('value_sum', models.BigIntegerField()),
+                ('value_square_sum', models.BigIntegerField()),
+                ('histogram', django.contrib.postgres.fields.ArrayField(base_field=models.PositiveIntegerField(), size=10)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('question_template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='facts', to='analytics.questiontemplate')),
+                ('survey', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='surveys.survey')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['question_template', 'semester'], name='analytics_fact_template_sem'), models.Index(fields=['discipline', 'semester'], name='analytics_fact_discipline_sem')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:16
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_scale_rollups'),
+        ('responses', '0005_responsesession_history_index'),
+        ('surveys', '0003_survey_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionQualityFlag',
+            fields=[
+                ('session', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='quality_flag', serialize=False, to='responses.responsesession')),
+                ('straightline_score', models.FloatField()),
+                ('seconds_per_question', models.FloatField()),
+                ('speed_score', models.FloatField()),
+                ('pattern_score', models.FloatField()),
+                ('outlier_score', models.FloatField(blank=True, null=True)),
+                ('reasons', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(choices=[('straightline', 'Straight-lining'), ('speed', 'Too fast'), ('pattern', 'Answer pattern'), ('outlier', 'Outlier')], max_length=20), blank=True, default=list, size=None)),
+                ('is_low_quality', models.BooleanField(default=False)),
+                ('computed_at', models.DateTimeField()),
+                ('survey', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='surveys.survey')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['survey', 'is_low_quality'], name='analytics_quality_survey')],
+            },
+        ),
+    ]
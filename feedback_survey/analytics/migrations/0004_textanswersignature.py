@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:33
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0003_sessionqualityflag'),
+        ('responses', '0005_responsesession_history_index'),
+        ('surveys', '0003_survey_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TextAnswerSignature',
+            fields=[
+                ('answer_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('signature', models.BinaryField()),
+                ('bands', django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), size=None)),
+                ('group_id', models.BigIntegerField(blank=True, null=True)),
+                ('indexed_at', models.DateTimeField()),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='surveys.question')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='responses.responsesession')),
+                ('survey', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='surveys.survey')),
+            ],
+            options={
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['bands'], name='analytics_signature_bands'), models.Index(fields=['survey', 'group_id'], name='analytics_signature_group')],
+            },
+        ),
+    ]
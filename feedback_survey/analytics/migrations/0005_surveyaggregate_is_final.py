@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0004_textanswersignature'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='surveyaggregate',
+            name='is_final',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 20:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0005_surveyaggregate_is_final'),
+        ('surveys', '0004_survey_schedule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DuplicateIndexState',
+            fields=[
+                ('survey', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='surveys.survey')),
+                ('indexed_until', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -1,3 +1,164 @@
+from django.conf import settings
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 
-# Create your models here.
+
+class SurveyAggregate(models.Model):
+    """Precomputed totals of a survey, rebuilt by ``manage.py recompute_analytics``.
+
+    ``watermark`` is the survey's response watermark at the time of the
+    rebuild (see ``analytics.aggregates.response_watermarks``); the job skips
+    surveys whose watermark has not moved since, and final aggregates of
+    closed surveys unless forced.
+    """
+
+    survey = models.OneToOneField(
+        'surveys.Survey',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='aggregate',
+    )
+    watermark = models.CharField(max_length=16)
+    completed_sessions = models.PositiveIntegerField(default=0)
+    answer_count = models.PositiveIntegerField(default=0)
+    # {choice id: times selected}
+    choice_counts = models.JSONField(default=dict)
+    # {question id: analytics.aggregates.scale_summary()}
+    scale_stats = models.JSONField(default=dict)
+    # {question id: non-empty text answers}
+    text_answer_counts = models.JSONField(default=dict)
+    computed_at = models.DateTimeField()
+    compute_seconds = models.FloatField(default=0)
+    # Frozen when surveys.scheduler closed the survey.
+    is_final = models.BooleanField(default=False)
+
+    def __str__(self) -> str:
+        return f'Aggregate of survey #{self.survey_id}'
+
+
+class QuestionTemplate(models.Model):
+    """Dimension of scale questions asked with the same wording in different surveys.
+
+    ``key`` is a digest of the normalized question text, see
+    ``analytics.rollups.template_key``.
+    """
+
+    key = models.CharField(max_length=40, unique=True)
+    text = models.TextField()
+
+    def __str__(self) -> str:
+        return self.text[:80]
+
+
+class ScaleFact(models.Model):
+    """Pre-aggregated scale answers of one survey question, respondent faculty and semester.
+
+    Rebuilt per survey by ``manage.py refresh_rollups``; comparison queries sum
+    these rows and never touch the answers themselves.
+    """
+
+    survey = models.ForeignKey('surveys.Survey', on_delete=models.CASCADE, related_name='+')
+    question_template = models.ForeignKey(QuestionTemplate, on_delete=models.CASCADE, related_name='facts')
+    discipline = models.CharField(max_length=255, blank=True)
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    faculty = models.CharField(max_length=255, blank=True)
+    # First day of the semester (1 February or 1 August), see responses.partitions.
+    semester = models.DateField()
+    responses = models.PositiveIntegerField()
+    value_sum = models.BigIntegerField()
+    value_square_sum = models.BigIntegerField()
+    # Answers per scale value 1–10.
+    histogram = ArrayField(models.PositiveIntegerField(), size=10)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['question_template', 'semester'], name='analytics_fact_template_sem'),
+            models.Index(fields=['discipline', 'semester'], name='analytics_fact_discipline_sem'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.question_template_id} / {self.discipline} / {self.semester:%Y-%m}'
+
+
+class RollupState(models.Model):
+    """Response watermark of each survey as of its last ``refresh_rollups``."""
+
+    survey = models.OneToOneField('surveys.Survey', on_delete=models.CASCADE, primary_key=True, related_name='+')
+    watermark = models.CharField(max_length=16)
+    refreshed_at = models.DateTimeField()
+
+
+class SessionQualityFlag(models.Model):
+    """Response-quality scores of a completed session, computed by ``manage.py detect_low_quality``."""
+
+    class Reason(models.TextChoices):
+        STRAIGHTLINE = 'straightline', 'Straight-lining'
+        SPEED = 'speed', 'Too fast'
+        PATTERN = 'pattern', 'Answer pattern'
+        OUTLIER = 'outlier', 'Outlier'
+
+    session = models.OneToOneField(
+        'responses.ResponseSession',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='quality_flag',
+    )
+    survey = models.ForeignKey('surveys.Survey', on_delete=models.CASCADE, related_name='+')
+    # Share of the scale/single-choice answers equal to the session's most common one.
+    straightline_score = models.FloatField()
+    seconds_per_question = models.FloatField()
+    # seconds_per_question relative to the survey's median session.
+    speed_score = models.FloatField()
+    # Share of consecutive answers following a step or zigzag pattern.
+    pattern_score = models.FloatField()
+    # IsolationForest anomaly score (higher is more anomalous); null when not run.
+    outlier_score = models.FloatField(null=True, blank=True)
+    reasons = ArrayField(models.CharField(max_length=20, choices=Reason.choices), default=list, blank=True)
+    is_low_quality = models.BooleanField(default=False)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['survey', 'is_low_quality'], name='analytics_quality_survey'),
+        ]
+
+    def __str__(self) -> str:
+        return f'Quality of session #{self.session_id}'
+
+
+class TextAnswerSignature(models.Model):
+    """MinHash signature of a free-text answer, for near-duplicate search (see ``analytics.duplicates``).
+
+    ``answer_id`` is not a foreign key: answers live in the partitioned
+    ``responses_answer`` table or in the archive. Rows go away with their session.
+    """
+
+    answer_id = models.BigIntegerField(primary_key=True)
+    session = models.ForeignKey('responses.ResponseSession', on_delete=models.CASCADE, related_name='+')
+    survey = models.ForeignKey('surveys.Survey', on_delete=models.CASCADE, related_name='+')
+    question = models.ForeignKey('surveys.Question', on_delete=models.CASCADE, related_name='+')
+    # NUM_PERM little-endian uint32 MinHash values.
+    signature = models.BinaryField()
+    # One hash per LSH band (salted with the survey id); answers sharing any
+    # of them are near-duplicate candidates.
+    bands = ArrayField(models.BigIntegerField())
+    # Smallest answer id of the near-duplicate group; null for unique answers.
+    group_id = models.BigIntegerField(null=True, blank=True)
+    indexed_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['bands'], name='analytics_signature_bands'),
+            models.Index(fields=['survey', 'group_id'], name='analytics_signature_group'),
+        ]
+
+    def __str__(self) -> str:
+        return f'Signature of answer #{self.answer_id}'
+
+
+class DuplicateIndexState(models.Model):
+    """When ``build_duplicate_index`` last started indexing the survey; later sessions are indexed next."""
+
+    survey = models.OneToOneField('surveys.Survey', on_delete=models.CASCADE, primary_key=True, related_name='+')
+    indexed_until = models.DateTimeField()
@@ -0,0 +1,39 @@
+"""Process pools for batch analytics jobs.
+
+Workers are spawned rather than forked, so they never share the parent's
+database connections or threads, and run ``django.setup()`` themselves. They
+inherit the caller's :func:`~feedback_survey.db_routers.replica_reads` state.
+This module must stay importable before Django is set up: the initializer is
+unpickled in the child before anything else.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+
+def _init_django_worker(settings_module: str, replica_reads: bool = False) -> None:
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+    if replica_reads:
+        from feedback_survey.db_routers import activate_replica_reads
+
+        # Tasks run in this thread, so the setting holds for the worker's lifetime.
+        activate_replica_reads()
+
+
+def worker_pool(workers: int | None = None) -> ProcessPoolExecutor:
+    """A pool of ``workers`` Django-ready processes (default: one per core)."""
+    from django.db import connections
+
+    from feedback_survey.db_routers import replica_reads_active
+
+    connections.close_all()
+    return ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count(),
+        mp_context=get_context('spawn'),
+        initializer=_init_django_worker,
+        initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'feedback_survey.settings'), replica_reads_active()),
+    )
@@ -0,0 +1,243 @@
+"""Vectorized response-quality scoring of completed sessions, one survey at a time.
+
+Each survey's scale and single-choice answers are laid out as a session ×
+question matrix (scale value, or the 1-based position of the chosen option;
+NaN when unanswered), and every score is computed over the whole matrix:
+
+* straight-lining: share of a session's answers equal to its most common one;
+* speed: seconds per question, absolute and relative to the survey median;
+* pattern: share of consecutive answers continuing a constant step
+  (1-2-3-4, 5-5-5) or a zigzag (1-5-1-5);
+* optionally an IsolationForest anomaly score over those features.
+
+Scores are written with COPY into ``SessionQualityFlag``, replacing the
+survey's previous rows.
+"""
+
+import csv
+import io
+import time
+from dataclasses import dataclass
+
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from feedback_survey.db_routers import read_alias
+from responses.models import ResponseSession
+from surveys.models import Question
+
+from .lazy import np, sklearn_ensemble
+from .models import SessionQualityFlag
+
+STRAIGHTLINE_MIN_ANSWERS = 4
+STRAIGHTLINE_THRESHOLD = 1.0
+MIN_SECONDS_PER_QUESTION = 2.0
+SPEED_RATIO_THRESHOLD = 0.25
+PATTERN_MIN_ANSWERS = 5
+PATTERN_THRESHOLD = 0.9
+OUTLIER_MIN_SESSIONS = 100
+OUTLIER_CONTAMINATION = 0.02
+
+_SESSIONS_SQL = """
+SELECT id, extract(epoch FROM completed_at - started_at) FROM responses_responsesession
+WHERE survey_id = %s AND status = %s AND completed_at IS NOT NULL
+ORDER BY id
+"""
+
+# Scale value, or the 1-based position of the selected option among the
+# question's choices.
+_ANSWERS_SQL = """
+WITH answers AS (
+    SELECT response_session_id, question_id, selected_choice_id, text_answer FROM responses_answer
+    WHERE question_id = ANY(%(questions)s)
+    UNION ALL
+    SELECT response_session_id, question_id, selected_choice_id, text_answer FROM responses_answer_archive
+    WHERE question_id = ANY(%(questions)s)
+), positions AS (
+    SELECT id, row_number() OVER (PARTITION BY question_id ORDER BY "order", id) AS position
+    FROM surveys_choice WHERE question_id = ANY(%(questions)s)
+)
+SELECT answer.response_session_id, answer.question_id,
+       CASE WHEN answer.text_answer ~ '^[0-9]{1,3}$' THEN answer.text_answer::int ELSE positions.position END
+FROM answers answer
+LEFT JOIN positions ON positions.id = answer.selected_choice_id
+WHERE answer.text_answer ~ '^[0-9]{1,3}$' OR positions.position IS NOT NULL
+"""
+
+FLAG_COLUMNS = (
+    'session_id', 'survey_id', 'straightline_score', 'seconds_per_question', 'speed_score',
+    'pattern_score', 'outlier_score', 'reasons', 'is_low_quality', 'computed_at',
+)
+
+
+@dataclass
+class SurveyQuality:
+    survey_id: int
+    sessions: int
+    flagged: int
+    seconds: float
+
+
+def answer_matrix(session_ids, question_ids, rows):
+    """Session × question float matrix from ``(session_id, question_id, value)`` rows; NaN if unanswered."""
+    matrix = np.full((len(session_ids), len(question_ids)), np.nan)
+    if not rows:
+        return matrix
+    data = np.asarray(rows, dtype=np.float64)
+    row_index = np.searchsorted(session_ids, data[:, 0])
+    known = (row_index < len(session_ids)) & (session_ids[row_index.clip(max=len(session_ids) - 1)] == data[:, 0])
+    question_order = np.argsort(question_ids)
+    sorted_questions = question_ids[question_order]
+    col_index = question_order[np.searchsorted(sorted_questions, data[known, 1])]
+    matrix[row_index[known], col_index] = data[known, 2]
+    return matrix
+
+
+def straightline_scores(matrix):
+    answered = (~np.isnan(matrix)).sum(axis=1)
+    values = np.nan_to_num(matrix, nan=-1).astype(np.int64)
+    counts = np.zeros((matrix.shape[0], int(values.max(initial=0)) + 2), dtype=np.int64)
+    rows, cols = np.nonzero(values >= 0)
+    np.add.at(counts, (rows, values[rows, cols]), 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        scores = np.where(answered > 0, counts.max(axis=1) / answered, 0.0)
+    return scores, answered
+
+
+def pattern_scores(matrix):
+    steps = np.diff(matrix, axis=1)
+    # A step repeating the previous one: 1-2-3, 5-5-5, 4-3-2.
+    same_step = steps[:, 1:] == steps[:, :-1]
+    # A zigzag: a-b-a with a != b.
+    zigzag = (matrix[:, 2:] == matrix[:, :-2]) & (steps[:, 1:] != 0)
+    comparable = ~np.isnan(steps[:, 1:]) & ~np.isnan(steps[:, :-1])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        total = comparable.sum(axis=1)
+        scores = np.maximum((same_step & comparable).sum(axis=1), (zigzag & comparable).sum(axis=1)) / total
+    return np.where(total > 0, scores, 0.0)
+
+
+def outlier_scores(features):
+    forest = sklearn_ensemble.IsolationForest(contamination=OUTLIER_CONTAMINATION, random_state=0)
+    predictions = forest.fit_predict(features)
+    return -forest.score_samples(features), predictions == -1
+
+
+def score_survey(survey_id: int, use_isolation_forest: bool = False) -> dict | None:
+    """Scores of every completed session of the survey, as column arrays; None if it has none."""
+    question_types = dict(Question.objects.filter(survey_id=survey_id).values_list('pk', 'question_type'))
+    matrix_questions = np.array(
+        sorted(
+            pk for pk, kind in question_types.items()
+            if kind in (Question.QuestionType.SCALE, Question.QuestionType.SINGLE)
+        ),
+        dtype=np.float64,
+    )
+    with connections[read_alias()].cursor() as cursor:
+        cursor.execute(_SESSIONS_SQL, [survey_id, ResponseSession.Status.COMPLETED])
+        sessions = cursor.fetchall()
+        if not sessions:
+            return None
+        rows = []
+        if len(matrix_questions):
+            cursor.execute(_ANSWERS_SQL, {'questions': matrix_questions.astype(np.int64).tolist()})
+            rows = cursor.fetchall()
+    session_ids = np.array([row[0] for row in sessions], dtype=np.float64)
+    durations = np.array([row[1] for row in sessions], dtype=np.float64)
+    # Column order follows the question order of the survey, which the pattern score relies on.
+    ordered = list(
+        Question.objects.filter(pk__in=matrix_questions.astype(np.int64).tolist()).values_list('pk', 'question_type')
+    )
+    matrix = answer_matrix(session_ids, np.array([pk for pk, _ in ordered], dtype=np.float64), rows)
+    # Scale values and option positions are not comparable; surveys with
+    # enough scale questions are judged on those alone.
+    is_scale = np.array([kind == Question.QuestionType.SCALE for _, kind in ordered], dtype=bool)
+    judged = matrix[:, is_scale] if is_scale.sum() >= STRAIGHTLINE_MIN_ANSWERS else matrix
+
+    straightline, answered = straightline_scores(judged)
+    pattern = pattern_scores(judged)
+    seconds_per_question = np.maximum(durations, 0) / max(len(question_types), 1)
+    median = np.median(seconds_per_question)
+    speed = seconds_per_question / median if median > 0 else np.ones_like(seconds_per_question)
+
+    is_straightline = (answered >= STRAIGHTLINE_MIN_ANSWERS) & (straightline >= STRAIGHTLINE_THRESHOLD)
+    is_speed = (seconds_per_question < MIN_SECONDS_PER_QUESTION) | (speed < SPEED_RATIO_THRESHOLD)
+    is_pattern = (answered >= PATTERN_MIN_ANSWERS) & (pattern >= PATTERN_THRESHOLD) & ~is_straightline
+    outlier = np.full(len(session_ids), np.nan)
+    is_outlier = np.zeros(len(session_ids), dtype=bool)
+    if use_isolation_forest and len(session_ids) >= OUTLIER_MIN_SESSIONS:
+        completeness = (~np.isnan(matrix)).sum(axis=1) / max(len(ordered), 1)
+        spread = np.nan_to_num(np.nanstd(np.where(answered[:, None] > 0, judged, 0), axis=1))
+        features = np.column_stack([straightline, pattern, np.log1p(seconds_per_question), spread, completeness])
+        outlier, is_outlier = outlier_scores(features)
+
+    return {
+        'session_id': session_ids.astype(np.int64),
+        'straightline_score': straightline,
+        'seconds_per_question': seconds_per_question,
+        'speed_score': speed,
+        'pattern_score': pattern,
+        'outlier_score': outlier,
+        'reasons': [
+            (SessionQualityFlag.Reason.STRAIGHTLINE, is_straightline),
+            (SessionQualityFlag.Reason.SPEED, is_speed),
+            (SessionQualityFlag.Reason.PATTERN, is_pattern),
+            (SessionQualityFlag.Reason.OUTLIER, is_outlier),
+        ],
+        'is_low_quality': is_straightline | is_speed | is_pattern | is_outlier,
+    }
+
+
+def _flag_rows(survey_id: int, scores: dict):
+    reason_names = np.array([''] * len(scores['session_id']), dtype=object)
+    for reason, mask in scores['reasons']:
+        reason_names[mask] = reason_names[mask] + ',' + reason.value
+    computed_at = timezone.now().isoformat()
+    outlier = ['' if np.isnan(value) else f'{value:.6f}' for value in scores['outlier_score']]
+    return zip(
+        scores['session_id'].tolist(),
+        [survey_id] * len(outlier),
+        np.round(scores['straightline_score'], 6).tolist(),
+        np.round(scores['seconds_per_question'], 3).tolist(),
+        np.round(scores['speed_score'], 6).tolist(),
+        np.round(scores['pattern_score'], 6).tolist(),
+        outlier,
+        ['{' + names.lstrip(',') + '}' for names in reason_names],
+        ['t' if flag else 'f' for flag in scores['is_low_quality']],
+        [computed_at] * len(outlier),
+    )
+
+
+def detect_survey(survey_id: int, use_isolation_forest: bool = False) -> SurveyQuality:
+    started = time.perf_counter()
+    scores = score_survey(survey_id, use_isolation_forest)
+    buffer = io.StringIO()
+    if scores is not None:
+        csv.writer(buffer).writerows(_flag_rows(survey_id, scores))
+        buffer.seek(0)
+    with transaction.atomic(), connection.cursor() as cursor:
+        SessionQualityFlag.objects.filter(survey_id=survey_id).delete()
+        if scores is not None:
+            cursor.copy_expert(
+                f"COPY {SessionQualityFlag._meta.db_table} ({', '.join(FLAG_COLUMNS)}) FROM STDIN WITH (FORMAT csv, NULL '')",
+                buffer,
+            )
+    sessions = 0 if scores is None else len(scores['session_id'])
+    flagged = 0 if scores is None else int(scores['is_low_quality'].sum())
+    return SurveyQuality(survey_id, sessions, flagged, time.perf_counter() - started)
+
+
+def surveys_needing_scores() -> list[int]:
+    """Surveys with completed sessions that have no quality flag yet."""
+    with connections[read_alias()].cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT DISTINCT session.survey_id FROM responses_responsesession session
+            WHERE session.status = %s AND NOT EXISTS (
+                SELECT 1 FROM {SessionQualityFlag._meta.db_table} flag WHERE flag.session_id = session.id
+            )
+            ORDER BY session.survey_id
+            """,
+            [ResponseSession.Status.COMPLETED],
+        )
+        return [row[0] for row in cursor.fetchall()]
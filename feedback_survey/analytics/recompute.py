@@ -0,0 +1,133 @@
+"""Batch rebuild of :class:`SurveyAggregate` rows, one chunk of surveys per worker.
+
+:func:`recompute_chunk` runs inside a :func:`analytics.pool.worker_pool`
+process with its own database connection. It streams each changed survey's
+answers through a server-side cursor, so memory stays flat however many
+answers a survey has.
+"""
+
+import json
+import os
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from responses.models import Answer, ArchivedAnswer, ResponseSession
+from surveys.models import Question, Survey
+
+from .aggregates import exclude_low_quality, low_quality_filter, response_watermarks, scale_summary
+from .models import SurveyAggregate
+
+STREAM_CHUNK_SIZE = 5000
+ANSWER_FIELDS = ('question_id', 'selected_choice_id', 'selected_choices', 'text_answer')
+
+
+@dataclass
+class SurveyTiming:
+    survey_id: int
+    status: str
+    seconds: float = 0.0
+    answers: int = 0
+
+
+def compute_aggregate(survey: Survey, watermark: str) -> SurveyAggregate:
+    question_types = dict(survey.questions.values_list('pk', 'question_type'))
+    choices = Counter()
+    scales = {pk: [] for pk, kind in question_types.items() if kind == Question.QuestionType.SCALE}
+    texts = Counter()
+    answer_count = 0
+    sessions = survey.response_sessions.filter(status=ResponseSession.Status.COMPLETED)
+    exclude = exclude_low_quality()
+    if exclude:
+        sessions = sessions.exclude(quality_flag__is_low_quality=True)
+    for model in (Answer, ArchivedAnswer):
+        rows = model.objects.filter(question_id__in=list(question_types))
+        if exclude:
+            rows = rows.exclude(low_quality_filter())
+        rows = rows.values_list(*ANSWER_FIELDS)
+        for question_id, choice_id, choice_ids, text in rows.iterator(chunk_size=STREAM_CHUNK_SIZE):
+            answer_count += 1
+            if choice_id is not None:
+                choices[choice_id] += 1
+            if choice_ids:
+                choices.update(choice_ids)
+            if question_id in scales:
+                if text.isdigit():
+                    scales[question_id].append(int(text))
+            elif text:
+                texts[question_id] += 1
+    return SurveyAggregate(
+        survey=survey,
+        watermark=watermark,
+        completed_sessions=sessions.count(),
+        answer_count=answer_count,
+        choice_counts={str(choice_id): count for choice_id, count in choices.items()},
+        scale_stats={str(question_id): scale_summary(values) for question_id, values in scales.items()},
+        text_answer_counts={str(question_id): count for question_id, count in texts.items()},
+        computed_at=timezone.now(),
+    )
+
+
+def recompute_chunk(survey_ids: list[int], force: bool = False) -> list[SurveyTiming]:
+    surveys = Survey.objects.in_bulk(survey_ids)
+    watermarks = response_watermarks(surveys.values())
+    stored = {
+        survey_id: (watermark, is_final)
+        for survey_id, watermark, is_final in SurveyAggregate.objects.filter(survey_id__in=survey_ids).values_list(
+            'survey_id', 'watermark', 'is_final',
+        )
+    }
+    timings = []
+    for survey_id in survey_ids:
+        if survey_id not in surveys:
+            timings.append(SurveyTiming(survey_id, 'missing'))
+            continue
+        watermark, is_final = stored.get(survey_id, (None, False))
+        if not force and is_final and surveys[survey_id].status == Survey.Status.CLOSED:
+            timings.append(SurveyTiming(survey_id, 'final'))
+            continue
+        if not force and watermark == watermarks[survey_id]:
+            timings.append(SurveyTiming(survey_id, 'unchanged'))
+            continue
+        started = time.perf_counter()
+        aggregate = compute_aggregate(surveys[survey_id], watermarks[survey_id])
+        aggregate.compute_seconds = time.perf_counter() - started
+        aggregate.is_final = is_final and surveys[survey_id].status == Survey.Status.CLOSED
+        aggregate.save()
+        timings.append(SurveyTiming(survey_id, 'computed', aggregate.compute_seconds, aggregate.answer_count))
+    return timings
+
+
+class Checkpoint:
+    """Ids of the surveys finished by an interrupted run, kept in a JSON file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.done: set[int] = set()
+        self.started_at = None
+
+    def load(self) -> bool:
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return False
+        self.done = set(data['done'])
+        self.started_at = data['started_at']
+        return True
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps({'started_at': self.started_at, 'done': sorted(self.done)}))
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+def default_checkpoint() -> Checkpoint:
+    return Checkpoint(Path(settings.ANALYTICS_CHECKPOINT_FILE))
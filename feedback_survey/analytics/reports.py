@@ -0,0 +1,150 @@
+"""Per-survey HTML reports, rendered in a process pool and cached on disk.
+
+A report file is named after the survey's response watermark (completed
+sessions, their latest id and completion time, and the survey's last edit),
+so it stays valid until a response or the survey changes. Web requests only
+ever serve existing files; a missing or outdated report is queued with
+:func:`request_report` and rendered by ``manage.py render_reports --pending``.
+"""
+
+import os
+import time
+from concurrent.futures import as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from responses.models import ResponseSession
+from surveys.models import Question, Survey
+
+from .aggregates import (
+    choice_counts,
+    exclude_low_quality,
+    response_watermark,
+    scale_summary,
+    scale_values,
+    text_themes,
+)
+from .pool import worker_pool
+
+THEME_COUNT = 10
+
+
+def report_dir() -> Path:
+    return Path(settings.REPORT_DIR)
+
+
+def report_path(survey_id: int, watermark: str) -> Path:
+    return report_dir() / str(survey_id) / f'{watermark}.html'
+
+
+def latest_report(survey_id: int) -> Path | None:
+    reports = sorted((report_dir() / str(survey_id)).glob('*.html'), key=lambda path: path.stat().st_mtime)
+    return reports[-1] if reports else None
+
+
+def request_report(survey_id: int) -> None:
+    pending = report_dir() / 'pending'
+    pending.mkdir(parents=True, exist_ok=True)
+    (pending / str(survey_id)).touch()
+
+
+def pending_survey_ids() -> list[int]:
+    pending = report_dir() / 'pending'
+    if not pending.is_dir():
+        return []
+    return sorted(int(path.name) for path in pending.iterdir() if path.name.isdigit())
+
+
+def build_report_context(survey: Survey) -> dict:
+    questions = list(survey.questions.prefetch_related('choices'))
+    exclude = exclude_low_quality()
+    sessions = survey.response_sessions.filter(status=ResponseSession.Status.COMPLETED)
+    completed = sessions.count()
+    excluded = sessions.filter(quality_flag__is_low_quality=True).count() if exclude else 0
+    completed -= excluded
+    counts = choice_counts(survey.pk, exclude_low_quality=exclude)
+    scales = scale_values(
+        [q.pk for q in questions if q.question_type == Question.QuestionType.SCALE],
+        exclude_low_quality=exclude,
+    )
+    sections = []
+    for question in questions:
+        section = {'question': question}
+        if question.question_type in (Question.QuestionType.SINGLE, Question.QuestionType.MULTIPLE):
+            section['choices'] = [
+                {
+                    'choice': choice,
+                    'count': counts.get(choice.pk, 0),
+                    'percent': round(100 * counts.get(choice.pk, 0) / completed, 1) if completed else 0,
+                }
+                for choice in question.choices.all()
+            ]
+        elif question.question_type == Question.QuestionType.SCALE:
+            section['scale'] = scale_summary(scales[question.pk])
+        else:
+            section['themes'] = text_themes(question.pk, limit=THEME_COUNT, exclude_low_quality=exclude)
+        sections.append(section)
+    return {
+        'survey': survey,
+        'completed': completed,
+        'excluded': excluded,
+        'sections': sections,
+        'generated_at': timezone.now(),
+    }
+
+
+def render_report(survey_id: int, force: bool = False) -> tuple[int, str, float]:
+    """Render one survey's report unless the current one is on disk; ``(survey_id, status, seconds)``."""
+    started = time.perf_counter()
+    survey = Survey.objects.select_related('author').get(pk=survey_id)
+    path = report_path(survey_id, response_watermark(survey))
+    if path.exists() and not force:
+        status = 'cached'
+    else:
+        html = render_to_string('analytics/report.html', build_report_context(survey))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+        tmp_path.write_text(html, encoding='utf-8')
+        os.replace(tmp_path, path)
+        for old in path.parent.glob('*.html'):
+            if old != path:
+                old.unlink(missing_ok=True)
+        status = 'rendered'
+    (report_dir() / 'pending' / str(survey_id)).unlink(missing_ok=True)
+    return survey_id, status, time.perf_counter() - started
+
+
+def _render_in_worker(survey_id: int, force: bool) -> tuple[int, str, float]:
+    try:
+        return render_report(survey_id, force)
+    except Survey.DoesNotExist:
+        return survey_id, 'missing', 0.0
+
+
+@dataclass
+class RenderStats:
+    rendered: int = 0
+    cached: int = 0
+    missing: int = 0
+    failed: dict[int, str] = field(default_factory=dict)
+
+
+def render_reports(survey_ids: list[int], workers: int | None = None, force: bool = False, progress=None) -> RenderStats:
+    """Render reports for ``survey_ids`` across ``workers`` processes (default: every core)."""
+    stats = RenderStats()
+    with worker_pool(workers) as executor:
+        futures = {executor.submit(_render_in_worker, survey_id, force): survey_id for survey_id in survey_ids}
+        for future in as_completed(futures):
+            try:
+                survey_id, status, seconds = future.result()
+            except Exception as exc:
+                stats.failed[futures[future]] = f'{type(exc).__name__}: {exc}'
+                continue
+            setattr(stats, status, getattr(stats, status) + 1)
+            if progress is not None:
+                progress(survey_id, status, seconds)
+    return stats
@@ -0,0 +1,144 @@
+"""Star-schema rollup of scale answers for cross-semester comparisons.
+
+Facts (:class:`ScaleFact`) are keyed by survey, question template, discipline,
+author, respondent faculty and semester, and carry the count, sum, sum of
+squares and histogram of the answers, so any slice's mean and standard
+deviation can be summed from them. :func:`refresh_rollups` rebuilds the facts
+of the surveys whose response watermark moved since the last refresh.
+"""
+
+import hashlib
+import re
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from responses.models import ResponseSession
+from responses.partitions import AUTUMN_MONTH, SPRING_MONTH
+from surveys.models import Question, Survey
+
+from .aggregates import SCALE_RANGE, response_watermarks
+from .models import QuestionTemplate, RollupState, ScaleFact
+
+REFRESH_BATCH_SIZE = 200
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+_HISTOGRAM_SQL = ', '.join(f'count(*) FILTER (WHERE value = {value})' for value in SCALE_RANGE)
+
+_SEMESTER_SQL = f"""
+CASE
+    WHEN extract(month FROM completed) >= {AUTUMN_MONTH} THEN make_date(extract(year FROM completed)::int, {AUTUMN_MONTH}, 1)
+    WHEN extract(month FROM completed) >= {SPRING_MONTH} THEN make_date(extract(year FROM completed)::int, {SPRING_MONTH}, 1)
+    ELSE make_date(extract(year FROM completed)::int - 1, {AUTUMN_MONTH}, 1)
+END
+"""
+
+INSERT_FACTS_SQL = f"""
+WITH answers AS (
+    SELECT response_session_id, question_id, text_answer FROM responses_answer
+    WHERE question_id = ANY(%(questions)s)
+    UNION ALL
+    SELECT response_session_id, question_id, text_answer FROM responses_answer_archive
+    WHERE question_id = ANY(%(questions)s)
+), scored AS (
+    SELECT question.survey_id, template.template_id, respondent.faculty,
+           session.completed_at AT TIME ZONE 'UTC' AS completed, answer.text_answer::int AS value
+    FROM answers answer
+    JOIN unnest(%(questions)s::bigint[], %(templates)s::bigint[]) AS template (question_id, template_id)
+        ON template.question_id = answer.question_id
+    JOIN surveys_question question ON question.id = answer.question_id
+    JOIN responses_responsesession session ON session.id = answer.response_session_id
+    JOIN accounts_user respondent ON respondent.id = session.user_id
+    WHERE session.status = %(completed)s AND answer.text_answer ~ '^([1-9]|10)$'
+)
+INSERT INTO analytics_scalefact (
+    survey_id, question_template_id, discipline, author_id, faculty, semester,
+    responses, value_sum, value_square_sum, histogram
+)
+SELECT scored.survey_id, scored.template_id, survey.discipline, survey.author_id, scored.faculty,
+       {_SEMESTER_SQL} AS semester,
+       count(*), sum(value), sum(value * value), ARRAY[{_HISTOGRAM_SQL}]
+FROM scored JOIN surveys_survey survey ON survey.id = scored.survey_id
+GROUP BY scored.survey_id, scored.template_id, survey.discipline, survey.author_id, scored.faculty, semester
+"""
+
+
+def semester_label(start) -> str:
+    half = 'Весна' if start.month == SPRING_MONTH else 'Осінь'
+    return f'{half} {start.year}'
+
+
+def normalize_question_text(text: str) -> str:
+    return _WHITESPACE_RE.sub(' ', text).strip().rstrip('?.:!').strip().casefold()
+
+
+def template_key(text: str) -> str:
+    return hashlib.sha1(normalize_question_text(text).encode()).hexdigest()
+
+
+def question_templates(questions) -> dict[int, int]:
+    """Template id of each question, creating the missing templates."""
+    keys = {question.pk: template_key(question.text) for question in questions}
+    texts = {keys[question.pk]: question.text.strip() for question in questions}
+    QuestionTemplate.objects.bulk_create(
+        [QuestionTemplate(key=key, text=text) for key, text in texts.items()],
+        ignore_conflicts=True,
+    )
+    template_ids = dict(QuestionTemplate.objects.filter(key__in=texts).values_list('key', 'pk'))
+    return {question_id: template_ids[key] for question_id, key in keys.items()}
+
+
+def refresh_surveys(survey_ids: list[int], watermarks: dict[int, str]) -> int:
+    """Replace the facts of ``survey_ids``; returns the number of fact rows written."""
+    questions = list(Question.objects.filter(survey_id__in=survey_ids, question_type=Question.QuestionType.SCALE))
+    with transaction.atomic():
+        templates = question_templates(questions)
+        ScaleFact.objects.filter(survey_id__in=survey_ids).delete()
+        inserted = 0
+        if templates:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    INSERT_FACTS_SQL,
+                    {
+                        'questions': list(templates),
+                        'templates': list(templates.values()),
+                        'completed': ResponseSession.Status.COMPLETED,
+                    },
+                )
+                inserted = cursor.rowcount
+        now = timezone.now()
+        RollupState.objects.bulk_create(
+            [RollupState(survey_id=survey_id, watermark=watermarks[survey_id], refreshed_at=now) for survey_id in survey_ids],
+            update_conflicts=True,
+            unique_fields=['survey'],
+            update_fields=['watermark', 'refreshed_at'],
+        )
+    return inserted
+
+
+def refresh_rollups(force: bool = False, progress=None) -> tuple[int, int]:
+    """Refresh the facts of every survey whose watermark moved; ``(surveys refreshed, facts written)``."""
+    refreshed = facts = 0
+    surveys = Survey.objects.order_by('pk').only('pk', 'updated_at')
+    last_pk = 0
+    while True:
+        batch = list(surveys.filter(pk__gt=last_pk)[:REFRESH_BATCH_SIZE])
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+        watermarks = response_watermarks(batch)
+        if not force:
+            stored = dict(
+                RollupState.objects.filter(survey_id__in=watermarks).values_list('survey_id', 'watermark')
+            )
+            watermarks = {
+                survey_id: watermark for survey_id, watermark in watermarks.items()
+                if stored.get(survey_id) != watermark
+            }
+        if watermarks:
+            facts += refresh_surveys(list(watermarks), watermarks)
+            refreshed += len(watermarks)
+            if progress is not None:
+                progress(refreshed, facts)
+    return refreshed, facts
@@ -1,9 +1,21 @@
 from django.urls import path
 
-from .views import AnalyticsOverviewView
+from .views import (
+    AnalyticsOverviewView,
+    ComparisonView,
+    DuplicateAnswersView,
+    LiveResultsStreamView,
+    LiveResultsView,
+    SurveyReportView,
+)
 
 app_name = 'analytics'
 
 urlpatterns = [
     path('', AnalyticsOverviewView.as_view(), name='overview'),
+    path('compare/', ComparisonView.as_view(), name='comparison'),
+    path('surveys/<int:survey_id>/live/', LiveResultsView.as_view(), name='live-results'),
+    path('surveys/<int:survey_id>/live/stream/', LiveResultsStreamView.as_view(), name='live-results-stream'),
+    path('surveys/<int:survey_id>/duplicates/', DuplicateAnswersView.as_view(), name='duplicate-answers'),
+    path('surveys/<int:survey_id>/report/', SurveyReportView.as_view(), name='survey-report'),
 ]
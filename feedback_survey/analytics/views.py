@@ -1,7 +1,195 @@
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef, Sum
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import redirect
+from django.views import View
 from django.views.generic import TemplateView
 
-from accounts.mixins import TeacherOrAdminRequiredMixin
+from accounts.mixins import AsyncAdminRequiredMixin, AsyncTeacherOrAdminRequiredMixin
+from surveys.models import Question, Survey
 
+from .aggregates import response_watermark
+from .duplicates import duplicate_groups, duplicate_summary
+from .forms import ComparisonForm
+from .live import snapshot_event, stream_results
+from .models import QuestionTemplate, ScaleFact
+from .reports import latest_report, report_path, request_report
+from .rollups import semester_label
 
-class AnalyticsOverviewView(TeacherOrAdminRequiredMixin, TemplateView):
+User = get_user_model()
+
+
+class AnalyticsOverviewView(AsyncTeacherOrAdminRequiredMixin, TemplateView):
     template_name = 'analytics/overview.html'
+
+    async def get(self, request, *args, **kwargs):
+        return self.render_to_response(self.get_context_data(**kwargs))
+
+
+class SurveyAnalyticsMixin(AsyncTeacherOrAdminRequiredMixin):
+    async def get_survey(self) -> Survey:
+        surveys = Survey.objects.all()
+        if self.request.user.role != User.Role.ADMIN:
+            surveys = surveys.filter(author=self.request.user)
+        try:
+            return await surveys.aget(pk=self.kwargs['survey_id'])
+        except Survey.DoesNotExist:
+            raise Http404('No Survey matches the given query.')
+
+
+class LiveResultsView(SurveyAnalyticsMixin, TemplateView):
+    """Choice questions of a survey; counts arrive from :class:`LiveResultsStreamView`."""
+
+    template_name = 'analytics/live_results.html'
+
+    async def get(self, request, *args, **kwargs):
+        context = self.get_context_data(**kwargs)
+        context['survey'] = await self.get_survey()
+        questions = context['survey'].questions.filter(
+            question_type__in=[Question.QuestionType.SINGLE, Question.QuestionType.MULTIPLE],
+        ).prefetch_related('choices')
+        context['questions'] = [question async for question in questions]
+        return self.render_to_response(context)
+
+
+class LiveResultsStreamView(SurveyAnalyticsMixin, View):
+    async def get(self, request, *args, **kwargs):
+        survey = await self.get_survey()
+        if 'wsgi.input' in request.META:
+            # Under WSGI an endless stream would hold a worker for as long as the tab is open.
+            response = HttpResponse(await sync_to_async(snapshot_event)(survey.pk), content_type='text/event-stream')
+            response['Cache-Control'] = 'no-cache'
+            return response
+        response = StreamingHttpResponse(stream_results(survey.pk), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Stop nginx from buffering the stream.
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+class DuplicateAnswersView(SurveyAnalyticsMixin, TemplateView):
+    """Largest groups of near-duplicate free-text answers, from the MinHash index."""
+
+    template_name = 'analytics/duplicates.html'
+    group_limit = 50
+
+    async def get(self, request, *args, **kwargs):
+        context = self.get_context_data(**kwargs)
+        context['survey'] = await self.get_survey()
+        context['summary'] = await sync_to_async(duplicate_summary)(context['survey'].pk)
+        context['groups'] = await sync_to_async(duplicate_groups)(context['survey'].pk, limit=self.group_limit)
+        return self.render_to_response(context)
+
+
+class SurveyReportView(SurveyAnalyticsMixin, View):
+    """Download the survey's pre-rendered report; rendering is left to ``render_reports``."""
+
+    @staticmethod
+    def open_report(survey):
+        """The current report, else the latest one while it is re-rendered; None if there is none yet."""
+        path = report_path(survey.pk, response_watermark(survey))
+        if not path.exists():
+            request_report(survey.pk)
+            path = latest_report(survey.pk)
+        return path.open('rb') if path is not None else None
+
+    async def get(self, request, *args, **kwargs):
+        survey = await self.get_survey()
+        report = await sync_to_async(self.open_report)(survey)
+        if report is None:
+            messages.info(request, 'Звіт ще формується. Спробуйте завантажити його за кілька хвилин.')
+            return redirect('surveys:manage-list')
+        return FileResponse(
+            report,
+            as_attachment=True,
+            filename=f'survey-{survey.pk}-report.html',
+            content_type='text/html; charset=utf-8',
+        )
+
+
+def _summarize(responses: int, value_sum: int, value_square_sum: int) -> dict:
+    mean = value_sum / responses
+    variance = max(value_square_sum / responses - mean * mean, 0.0)
+    return {'responses': responses, 'mean': mean, 'std': variance ** 0.5}
+
+
+class ComparisonView(AsyncAdminRequiredMixin, TemplateView):
+    """Scale results of one question template across semesters, by discipline, teacher or faculty.
+
+    Reads only the pre-aggregated ``ScaleFact`` rollup (``manage.py refresh_rollups``).
+    """
+
+    template_name = 'analytics/comparison.html'
+
+    async def get(self, request, *args, **kwargs):
+        context = self.get_context_data(**kwargs)
+        form = await self.get_form()
+        context['form'] = form
+        if form.is_valid():
+            context.update(await self.get_table(form.cleaned_data))
+        return self.render_to_response(context)
+
+    async def get_form(self) -> ComparisonForm:
+        # Filter choices come from the small dimension tables, not the facts.
+        templates = QuestionTemplate.objects.filter(
+            Exists(ScaleFact.objects.filter(question_template=OuterRef('pk'))),
+        ).order_by('text')
+        template_choices = [(template.pk, template.text[:120]) async for template in templates]
+        disciplines = Survey.objects.exclude(discipline='').order_by('discipline').values_list('discipline', flat=True).distinct()
+        faculties = User.objects.exclude(faculty='').order_by('faculty').values_list('faculty', flat=True).distinct()
+        authors = User.objects.filter(Exists(Survey.objects.filter(author=OuterRef('pk')))).order_by('last_name', 'username')
+        data = self.request.GET.copy()
+        if 'question_template' not in data and template_choices:
+            data['question_template'] = str(template_choices[0][0])
+        data.setdefault('group_by', 'discipline')
+        return ComparisonForm(
+            data,
+            templates=template_choices,
+            disciplines=[value async for value in disciplines],
+            authors=[(user.pk, user.get_full_name() or user.username) async for user in authors],
+            faculties=[value async for value in faculties],
+        )
+
+    async def get_table(self, filters: dict) -> dict:
+        facts = ScaleFact.objects.filter(question_template_id=filters['question_template'])
+        for field in ('discipline', 'author', 'faculty'):
+            if filters[field]:
+                facts = facts.filter(**{field: filters[field]})
+        group_by = filters['group_by']
+        rows = facts.values(group_by, 'semester').annotate(
+            responses=Sum('responses'),
+            value_sum=Sum('value_sum'),
+            value_square_sum=Sum('value_square_sum'),
+        )
+        cells = {}
+        row_totals = {}
+        semester_totals = {}
+        async for row in rows:
+            key = row[group_by]
+            totals = (row['responses'], row['value_sum'], row['value_square_sum'])
+            cells[key, row['semester']] = _summarize(*totals)
+            for bucket, bucket_key in ((row_totals, key), (semester_totals, row['semester'])):
+                previous = bucket.get(bucket_key, (0, 0, 0))
+                bucket[bucket_key] = tuple(a + b for a, b in zip(previous, totals))
+
+        semesters = sorted(semester_totals)
+        labels = {key: key or '—' for key in row_totals}
+        if group_by == 'author':
+            async for user in User.objects.filter(pk__in=list(row_totals)):
+                labels[user.pk] = user.get_full_name() or user.username
+        table = [
+            {
+                'label': labels[key],
+                'cells': [cells.get((key, semester)) for semester in semesters],
+                'total': _summarize(*row_totals[key]),
+            }
+            for key in sorted(row_totals, key=lambda key: str(labels[key]))
+        ]
+        return {
+            'semesters': [semester_label(semester) for semester in semesters],
+            'rows': table,
+            'semester_totals': [_summarize(*semester_totals[semester]) for semester in semesters],
+            'group_by_label': dict(ComparisonForm.base_fields['group_by'].choices)[group_by],
+        }
@@ -0,0 +1,192 @@
+"""Per-endpoint concurrency gates with a bounded wait queue.
+
+Gates are configured in ADMISSION_GATES and apply to student traffic only;
+teacher and admin requests bypass them, so whatever worker threads and DB
+connections the gates leave free stay reserved for staff pages. A gate admits
+up to ``limit`` concurrent requests, parks up to ``queue`` more for at most
+``timeout`` seconds and rejects the rest. Counters are kept per process and
+published to the default cache every few seconds so ``get_admission_metrics``
+can report every worker.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import cache
+
+METRICS_KEY_PREFIX = 'admission'
+METRICS_WORKERS_KEY = f'{METRICS_KEY_PREFIX}:workers'
+PUBLISH_INTERVAL = 5.0
+COUNTERS = ('admitted', 'queued', 'rejected', 'timed_out')
+
+
+class _Waiter:
+    __slots__ = ('wake', 'granted')
+
+    def __init__(self, wake):
+        self.wake = wake
+        self.granted = False
+
+
+class AdmissionGate:
+    def __init__(self, name: str, limit: int, queue: int, timeout: float):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue
+        self.timeout = timeout
+        self.active = 0
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    def _enter(self, waiter):
+        """Take a free slot (True), join the queue (False) or reject (None); call with the lock held."""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.counters['admitted'] += 1
+            return True
+        if len(self._waiters) >= self.queue_size:
+            self.counters['rejected'] += 1
+            return None
+        self._waiters.append(waiter)
+        self.counters['queued'] += 1
+        return False
+
+    def _abandon(self, waiter, timed_out: bool = True) -> bool:
+        """Leave the queue after a timeout unless a slot was handed over meanwhile."""
+        with self._lock:
+            if waiter.granted:
+                return True
+            self._waiters.remove(waiter)
+            if timed_out:
+                self.counters['timed_out'] += 1
+            return False
+
+    def acquire(self) -> bool:
+        event = threading.Event()
+        waiter = _Waiter(event.set)
+        with self._lock:
+            entered = self._enter(waiter)
+        if entered is not False:
+            return bool(entered)
+        if event.wait(self.timeout):
+            return True
+        return self._abandon(waiter)
+
+    async def aacquire(self) -> bool:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        waiter = _Waiter(wake)
+        with self._lock:
+            entered = self._enter(waiter)
+        if entered is not False:
+            return bool(entered)
+        try:
+            await asyncio.wait_for(future, self.timeout)
+            return True
+        except asyncio.TimeoutError:
+            return self._abandon(waiter)
+        except BaseException:
+            # Cancelled (the client went away): leave the queue, or pass on
+            # a slot that was already handed over, so it isn't leaked.
+            if self._abandon(waiter, timed_out=False):
+                self.release()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            if self._waiters:
+                # Hand the slot straight to the next waiter; ``active`` is unchanged.
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                self.counters['admitted'] += 1
+                waiter.wake()
+                return
+            self.active -= 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'queue': self.queue_size,
+                'active': self.active,
+                'waiting': len(self._waiters),
+                **self.counters,
+            }
+
+
+_gates = {}
+_gates_lock = threading.Lock()
+_last_publish = 0.0
+
+
+def get_gate(key: str) -> AdmissionGate | None:
+    config = settings.ADMISSION_GATES.get(key)
+    if config is None:
+        return None
+    with _gates_lock:
+        gate = _gates.get(key)
+        if gate is None:
+            gate = _gates[key] = AdmissionGate(
+                key,
+                limit=config['limit'],
+                queue=config.get('queue', 0),
+                timeout=config.get('timeout', settings.ADMISSION_QUEUE_TIMEOUT),
+            )
+        return gate
+
+
+def gate_key_for(match, method: str) -> str | None:
+    """Gate configured for ``<method> <view name>``, falling back to ``<view name>``, then ``*``.
+
+    A string value shares the gate of the key it names.
+    """
+    for key in (f'{method} {match.view_name}', match.view_name, '*'):
+        if key in settings.ADMISSION_GATES:
+            config = settings.ADMISSION_GATES[key]
+            return config if isinstance(config, str) else key
+    return None
+
+
+def local_metrics() -> dict:
+    with _gates_lock:
+        gates = list(_gates.values())
+    return {gate.name: gate.snapshot() for gate in gates}
+
+
+def publish_metrics(force: bool = False) -> None:
+    global _last_publish
+    now = time.monotonic()
+    if not force and now - _last_publish < PUBLISH_INTERVAL:
+        return
+    _last_publish = now
+    worker = str(os.getpid())
+    timeout = PUBLISH_INTERVAL * 12
+    cache.set(f'{METRICS_KEY_PREFIX}:{worker}', {'at': time.time(), 'gates': local_metrics()}, timeout)
+    workers = set(cache.get(METRICS_WORKERS_KEY) or ())
+    if worker not in workers:
+        cache.set(METRICS_WORKERS_KEY, sorted(workers | {worker}), None)
+
+
+def get_admission_metrics() -> dict:
+    """Gate counters summed over every worker that published recently, plus the per-worker breakdown."""
+    workers = {}
+    totals = {}
+    for worker in cache.get(METRICS_WORKERS_KEY) or ():
+        published = cache.get(f'{METRICS_KEY_PREFIX}:{worker}')
+        if published is None:
+            continue
+        workers[worker] = published
+        for name, gate in published['gates'].items():
+            total = totals.setdefault(name, dict.fromkeys(gate, 0))
+            for field, value in gate.items():
+                total[field] += value
+    return {'gates': totals, 'workers': workers}
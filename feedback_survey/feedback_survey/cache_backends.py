@@ -0,0 +1,89 @@
+"""Cache backends that count hits and misses per key namespace.
+
+Counters are buffered in-process and flushed into the cache itself every few
+seconds, so with a shared backend (file-based, Redis, Memcached) the numbers
+reported by ``manage.py cache_stats`` cover every worker. Any other backend can
+be instrumented the same way by mixing ``CacheStatsMixin`` into it.
+"""
+
+import time
+from collections import Counter
+from threading import Lock
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+
+STATS_KEY_PREFIX = 'cache-stats'
+STATS_BUCKETS_KEY = f'{STATS_KEY_PREFIX}:buckets'
+FLUSH_INTERVAL = 5.0
+FRAGMENT_KEY_PREFIX = 'template.cache.'
+
+_pending = Counter()
+_pending_lock = Lock()
+_last_flush = time.monotonic()
+_missing = object()
+
+
+def _bucket_for(key: str) -> str:
+    if key.startswith(FRAGMENT_KEY_PREFIX):
+        return 'fragment:' + key[len(FRAGMENT_KEY_PREFIX):].split('.', 1)[0]
+    return key.split(':', 1)[0]
+
+
+class CacheStatsMixin:
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _missing, version)
+        self._record(key, value is not _missing)
+        return default if value is _missing else value
+
+    def _record(self, key, hit):
+        global _last_flush
+        if key.startswith(STATS_KEY_PREFIX):
+            return
+        with _pending_lock:
+            _pending[(_bucket_for(key), 'hits' if hit else 'misses')] += 1
+            now = time.monotonic()
+            if now - _last_flush < FLUSH_INTERVAL:
+                return
+            pending = dict(_pending)
+            _pending.clear()
+            _last_flush = now
+        self._flush(pending)
+
+    def _flush(self, pending):
+        buckets = set(super().get(STATS_BUCKETS_KEY, None) or ())
+        for (bucket, kind), count in pending.items():
+            buckets.add(bucket)
+            stat_key = f'{STATS_KEY_PREFIX}:{bucket}:{kind}'
+            if not self.add(stat_key, count, timeout=None):
+                try:
+                    self.incr(stat_key, count)
+                except ValueError:
+                    self.set(stat_key, count, timeout=None)
+        self.set(STATS_BUCKETS_KEY, sorted(buckets), timeout=None)
+
+
+class InstrumentedLocMemCache(CacheStatsMixin, LocMemCache):
+    pass
+
+
+class InstrumentedFileBasedCache(CacheStatsMixin, FileBasedCache):
+    pass
+
+
+def get_cache_stats(cache) -> dict[str, dict[str, int]]:
+    stats = {}
+    for bucket in cache.get(STATS_BUCKETS_KEY) or ():
+        stats[bucket] = {
+            kind: cache.get(f'{STATS_KEY_PREFIX}:{bucket}:{kind}') or 0
+            for kind in ('hits', 'misses')
+        }
+    return stats
+
+
+def reset_cache_stats(cache) -> None:
+    buckets = cache.get(STATS_BUCKETS_KEY) or ()
+    cache.delete_many(
+        [f'{STATS_KEY_PREFIX}:{bucket}:{kind}' for bucket in buckets for kind in ('hits', 'misses')]
+        + [STATS_BUCKETS_KEY]
+    )
@@ -0,0 +1,62 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def get_replica_alias() -> str | None:
+    alias = getattr(settings, 'REPLICA_DATABASE_ALIAS', 'replica')
+    return alias if alias in settings.DATABASES else None
+
+
+def activate_replica_reads(enabled: bool = True):
+    return _replica_reads.set(enabled)
+
+
+def deactivate_replica_reads(token) -> None:
+    _replica_reads.reset(token)
+
+
+def replica_reads_active() -> bool:
+    return _replica_reads.get()
+
+
+def read_alias() -> str:
+    """Where a read issued now should go; for raw SQL, which the router never sees."""
+    # Reads inside a write transaction must see its writes.
+    if _replica_reads.get() and not connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return get_replica_alias() or DEFAULT_DB_ALIAS
+    return DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def replica_reads(enabled: bool = True):
+    """Route reads in this block to the read replica, if one is configured.
+
+    Reads inside a transaction on ``default`` stay on the primary.
+    """
+    token = activate_replica_reads(enabled)
+    try:
+        yield
+    finally:
+        deactivate_replica_reads(token)
+
+
+class PrimaryReplicaRouter:
+    """Writes always go to ``default``; reads use the replica only inside ``replica_reads()``."""
+
+    def db_for_read(self, model, **hints):
+        alias = read_alias()
+        return None if alias == DEFAULT_DB_ALIAS else alias
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != get_replica_alias()
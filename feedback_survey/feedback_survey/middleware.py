@@ -0,0 +1,189 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import MiddlewareNotUsed
+from django.shortcuts import render
+from django.urls import Resolver404, resolve
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .admission import gate_key_for, get_gate, publish_metrics
+from .db_routers import activate_replica_reads, deactivate_replica_reads, get_replica_alias
+
+User = get_user_model()
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise that stays in the async chain under ASGI.
+
+    WhiteNoise's middleware is sync-only, which would run it and every
+    middleware above it in a thread. Without autorefresh the lookup is a dict
+    hit, so only actual static files leave the event loop.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+class ReplicaRoutingMiddleware:
+    """Send read-only analytics and admin changelist requests to the replica.
+
+    After any successful write the client is pinned to the primary for
+    REPLICA_STICKY_SECONDS so it reads its own writes despite replication lag.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    replica_app_names = ('analytics',)
+    pin_cookie_name = 'pin_primary'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = activate_replica_reads(self.should_use_replica(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            deactivate_replica_reads(token)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        token = activate_replica_reads(self.should_use_replica(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            deactivate_replica_reads(token)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400 and get_replica_alias():
+            response.set_cookie(
+                self.pin_cookie_name,
+                '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def should_use_replica(self, request) -> bool:
+        if request.method not in SAFE_METHODS or not get_replica_alias():
+            return False
+        if self.pin_cookie_name in request.COOKIES:
+            return False
+        try:
+            match = resolve(request.path_info, getattr(request, 'urlconf', None))
+        except Resolver404:
+            return False
+        if match.app_name in self.replica_app_names:
+            return True
+        return match.namespace == 'admin' and (match.url_name or '').endswith('_changelist')
+
+
+class AdmissionControlMiddleware:
+    """Queue or turn away student requests once their endpoint's gate is full.
+
+    Rejected requests get a 503 with Retry-After; a rejected form submission is
+    echoed back as a page that re-posts the same data, so no answers are lost.
+    Teacher and admin requests are never gated.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    privileged_roles = (User.Role.TEACHER, User.Role.ADMIN)
+
+    def __init__(self, get_response):
+        if not settings.ADMISSION_GATES:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        gate = self.get_gate(request)
+        if gate is None or self.is_privileged(request.user):
+            return self.get_response(request)
+        admitted = gate.acquire()
+        publish_metrics()
+        if not admitted:
+            return self.reject(request)
+        try:
+            return self.get_response(request)
+        finally:
+            gate.release()
+
+    async def __acall__(self, request):
+        gate = self.get_gate(request)
+        if gate is None:
+            return await self.get_response(request)
+        request.user = await request.auser()
+        if self.is_privileged(request.user):
+            return await self.get_response(request)
+        admitted = await gate.aacquire()
+        publish_metrics()
+        if not admitted:
+            return self.reject(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            gate.release()
+
+    def get_gate(self, request):
+        try:
+            match = resolve(request.path_info, getattr(request, 'urlconf', None))
+        except Resolver404:
+            return None
+        key = gate_key_for(match, request.method)
+        return get_gate(key) if key else None
+
+    def is_privileged(self, user) -> bool:
+        return user.is_authenticated and (user.is_staff or user.role in self.privileged_roles)
+
+    def reject(self, request):
+        retry_after = settings.ADMISSION_RETRY_AFTER
+        resubmit = [
+            (name, value)
+            for name, values in request.POST.lists()
+            if name != 'csrfmiddlewaretoken'
+            for value in values
+        ] if request.method == 'POST' else None
+        response = render(
+            request,
+            'retry_later.html',
+            {'retry_after': retry_after, 'resubmit': resubmit},
+            status=503,
+        )
+        response['Retry-After'] = str(retry_after)
+        return response
@@ -43,21 +43,29 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    'whitenoise.runserver_nostatic',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'accounts',
     'surveys',
     'responses',
     'analytics',
+    'monitoring',
 ]
 
 MIDDLEWARE = [
+    'monitoring.middleware.ProfilingMiddleware',
+    'monitoring.middleware.QueryAttributionMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'feedback_survey.middleware.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'feedback_survey.middleware.AdmissionControlMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'feedback_survey.middleware.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'feedback_survey.urls'
@@ -94,6 +102,136 @@ DATABASES = {
     }
 }
 
+# Optional read replica for analytics, exports and admin changelists. Point
+# POSTGRES_REPLICA_HOST at the primary itself to exercise the routing locally.
+if os.environ.get('POSTGRES_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ.get('POSTGRES_REPLICA_DB', DATABASES['default']['NAME']),
+        'USER': os.environ.get('POSTGRES_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.environ.get('POSTGRES_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        'HOST': os.environ['POSTGRES_REPLICA_HOST'],
+        'PORT': os.environ.get('POSTGRES_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['feedback_survey.db_routers.PrimaryReplicaRouter']
+REPLICA_DATABASE_ALIAS = 'replica'
+# How long a client reads from the primary after a write (read-your-writes).
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', '15'))
+
+# Text search configuration used by the tsvector triggers and search queries.
+# PostgreSQL ships no Ukrainian stemmer, so 'simple' is the default; point this
+# at a custom 'ukrainian' configuration (hunspell dictionary) when installed.
+SEARCH_CONFIG = os.environ.get('SEARCH_CONFIG', 'simple')
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# File-based by default so hit/miss counters are shared between workers; set
+# CACHE_BACKEND to 'feedback_survey.cache_backends.InstrumentedLocMemCache' or
+# any other backend (mix in CacheStatsMixin to keep the counters).
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'feedback_survey.cache_backends.InstrumentedFileBasedCache',
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / 'var' / 'cache')),
+        'TIMEOUT': 300,
+    }
+}
+
+
+# Request profiling (monitoring.middleware.ProfilingMiddleware)
+
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '') == '1'
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', '0.01'))
+PROFILING_SLOW_MS = int(os.environ.get('PROFILING_SLOW_MS', '1000'))
+PROFILING_DIR = os.environ.get('PROFILING_DIR', str(BASE_DIR / 'var' / 'profiles'))
+PROFILING_MAX_CAPTURES = int(os.environ.get('PROFILING_MAX_CAPTURES', '500'))
+
+
+# Slow-query log (monitoring.slow_queries); set SLOW_QUERY_MS=0 to disable.
+# Report with `python manage.py slow_queries`.
+
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '200'))
+SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG', str(BASE_DIR / 'var' / 'log' / 'slow_queries.jsonl'))
+SLOW_QUERY_LOG_MAX_BYTES = int(os.environ.get('SLOW_QUERY_LOG_MAX_BYTES', str(20 * 1024 * 1024)))
+SLOW_QUERY_APPS = ('surveys', 'responses', 'analytics')
+
+
+# Admission control (feedback_survey.middleware.AdmissionControlMiddleware)
+# Per-process gates for student traffic, keyed by '<METHOD> <view name>', '<view name>'
+# or '*' for everything else; a key set to another key's name shares its gate.
+# Teacher and admin requests are never gated. Keep the sum of the limits below
+# the worker's threads / DB connections so the remainder stays available to
+# staff pages. Metrics: /admin/monitoring/admission/.
+
+ADMISSION_QUEUE_TIMEOUT = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT', '5'))
+ADMISSION_RETRY_AFTER = int(os.environ.get('ADMISSION_RETRY_AFTER', '5'))
+ADMISSION_GATES = {
+    'POST responses:take-survey': {
+        'limit': int(os.environ.get('ADMISSION_SUBMIT_LIMIT', '8')),
+        'queue': int(os.environ.get('ADMISSION_SUBMIT_QUEUE', '32')),
+    },
+    'POST responses:api-submit': 'POST responses:take-survey',
+    '*': {
+        'limit': int(os.environ.get('ADMISSION_DEFAULT_LIMIT', '16')),
+        'queue': int(os.environ.get('ADMISSION_DEFAULT_QUEUE', '64')),
+    },
+}
+
+
+# Live results (analytics.live): one shared poller per survey and worker; needs
+# the ASGI app (uvicorn feedback_survey.asgi:application) to hold streams open.
+# Under WSGI the page falls back to polling a one-off snapshot.
+
+LIVE_RESULTS_INTERVAL = float(os.environ.get('LIVE_RESULTS_INTERVAL', '2'))
+LIVE_RESULTS_KEEPALIVE = float(os.environ.get('LIVE_RESULTS_KEEPALIVE', '15'))
+
+
+# Survey reports (analytics.reports): rendered by `manage.py render_reports`
+# (schedule `--pending` every few minutes), never inside a web request.
+
+REPORT_DIR = os.environ.get('REPORT_DIR', str(BASE_DIR / 'var' / 'reports'))
+
+# Leave sessions flagged by `manage.py detect_low_quality` out of reports and
+# SurveyAggregate rows (analytics.aggregates.exclude_low_quality).
+ANALYTICS_EXCLUDE_LOW_QUALITY = os.environ.get('ANALYTICS_EXCLUDE_LOW_QUALITY', '0') == '1'
+
+# Survey scheduler (`manage.py run_scheduler`): sleeps until the next scheduled
+# publish/close, but never longer than this, to notice newly scheduled surveys.
+SCHEDULER_POLL_SECONDS = float(os.environ.get('SCHEDULER_POLL_SECONDS', '30'))
+
+# Progress of an interrupted `manage.py recompute_analytics` run.
+ANALYTICS_CHECKPOINT_FILE = os.environ.get(
+    'ANALYTICS_CHECKPOINT_FILE', str(BASE_DIR / 'var' / 'analytics_checkpoint.json'),
+)
+
+# E-mail. The console backend prints messages; set EMAIL_BACKEND to
+# django.core.mail.backends.filebased.EmailBackend (with EMAIL_FILE_PATH) to
+# keep them as files, or to the smtp backend with EMAIL_HOST/EMAIL_PORT, e.g. a
+# local stand-in started with `python -m aiosmtpd -n -l localhost:1025`.
+
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_FILE_PATH = os.environ.get('EMAIL_FILE_PATH', str(BASE_DIR / 'var' / 'mail'))
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', '25'))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', '') == '1'
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'feedback@localhost')
+# Absolute links in e-mails.
+SITE_URL = os.environ.get('SITE_URL', 'http://localhost:8000')
+
+# Survey reminders (`manage.py send_reminders`): messages per SMTP batch, the
+# sending rate the mail server accepts, and the age (seconds) after which an
+# unsent claim counts as left by a crashed run; keep it well above one batch.
+REMINDER_BATCH_SIZE = int(os.environ.get('REMINDER_BATCH_SIZE', '100'))
+REMINDER_RATE_PER_SECOND = float(os.environ.get('REMINDER_RATE_PER_SECOND', '10'))
+REMINDER_CLAIM_TIMEOUT = int(os.environ.get('REMINDER_CLAIM_TIMEOUT', '900'))
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -131,6 +269,19 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
+STATIC_ROOT = BASE_DIR / 'var' / 'static'
+
+# collectstatic writes content-hashed copies of every asset with gzip and
+# brotli variants; WhiteNoise serves the hashed names with a far-future
+# immutable Cache-Control and picks the variant from Accept-Encoding.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -139,6 +290,20 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'accounts.User'
 
+# The cached backend serves request.user from the cache; ModelBackend stays
+# listed so sessions created before the switch remain valid.
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+# Sessions are read from the cache and written through to the database;
+# flash messages travel in a signed cookie instead of the session.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
 LOGIN_URL = 'accounts:login'
 LOGIN_REDIRECT_URL = 'accounts:post-login-redirect'
 LOGOUT_REDIRECT_URL = 'accounts:login'
+# Lifetime of the activation links issued by `manage.py provision_students`.
+PASSWORD_RESET_TIMEOUT = 14 * 24 * 60 * 60
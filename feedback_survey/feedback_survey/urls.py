@@ -20,6 +20,7 @@ from django.urls import include, path
 from accounts.views import RoleRedirectView
 
 urlpatterns = [
+    path('admin/monitoring/', include('monitoring.urls')),
     path('admin/', admin.site.urls),
     path('accounts/', include('accounts.urls')),
     path('surveys/', include(('surveys.urls', 'surveys'), namespace='surveys')),
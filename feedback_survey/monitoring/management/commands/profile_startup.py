@@ -0,0 +1,96 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Executed in a fresh interpreter under ``-X importtime`` so that nothing this
+# process has already imported skews the numbers.
+BOOT_SCRIPT = '''
+import io, json, os, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+setup_done = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+app_done = time.perf_counter()
+
+def request(path):
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost',
+        'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'http',
+    }
+    status = []
+    began = time.perf_counter()
+    body = b''.join(application(environ, lambda s, h, e=None: status.append(s)))
+    return time.perf_counter() - began, status[0]
+
+first, first_status = request(sys.argv[1])
+second, _ = request(sys.argv[1])
+print(json.dumps({
+    'setup': setup_done - started,
+    'application': app_done - setup_done,
+    'first_request': first,
+    'second_request': second,
+    'status': first_status,
+    'loaded_heavy': sorted(m for m in ('numpy', 'pandas', 'sklearn', 'scipy') if m in sys.modules),
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = 'Report the import-time breakdown and the time to first request for a cold worker.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/accounts/login/', help='URL requested as the first request.')
+        parser.add_argument('--top', type=int, default=15, help='Number of packages and modules to list.')
+
+    def handle(self, *args, **options):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'feedback_survey.settings')}
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT, options['path']],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(f'Boot script failed:\n{result.stderr[-2000:]}')
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        modules = self.parse_importtime(result.stderr)
+
+        by_package = defaultdict(int)
+        for name, self_us, _ in modules:
+            by_package[name.split('.', 1)[0]] += self_us
+        total_us = sum(by_package.values())
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Cold start'))
+        self.stdout.write(f"  imports (all modules)   {total_us / 1e6:8.3f} s")
+        self.stdout.write(f"  django.setup()          {timings['setup']:8.3f} s")
+        self.stdout.write(f"  WSGI application        {timings['application']:8.3f} s")
+        self.stdout.write(f"  first request           {timings['first_request']:8.3f} s  ({timings['status']})")
+        self.stdout.write(f"  second request          {timings['second_request']:8.3f} s")
+        if timings['loaded_heavy']:
+            self.stdout.write(self.style.WARNING(f"  heavy modules loaded at boot: {', '.join(timings['loaded_heavy'])}"))
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Import time by top-level package (self time)'))
+        for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:options['top']]:
+            self.stdout.write(f'  {package:<40} {self_us / 1000:9.1f} ms {self_us / total_us:6.1%}')
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Slowest modules (cumulative)'))
+        for name, _, cumulative_us in sorted(modules, key=lambda item: -item[2])[:options['top']]:
+            self.stdout.write(f'  {name:<60} {cumulative_us / 1000:9.1f} ms')
+
+    def parse_importtime(self, stderr: str):
+        modules = []
+        for line in stderr.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+            modules.append((name.strip(), int(self_us), int(cumulative_us)))
+        return modules
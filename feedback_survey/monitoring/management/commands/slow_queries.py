@@ -0,0 +1,62 @@
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from monitoring.slow_queries import get_log_path, read_records
+
+SORT_KEYS = {
+    'total': lambda group: group['total'],
+    'count': lambda group: group['count'],
+    'mean': lambda group: group['total'] / group['count'],
+    'max': lambda group: group['max'],
+}
+
+
+class Command(BaseCommand):
+    help = 'Top-N report of logged slow SQL statements grouped by fingerprint, with views and call sites.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20, help='Number of fingerprints to list.')
+        parser.add_argument('--sort', choices=sorted(SORT_KEYS), default='total', help='Ranking metric.')
+        parser.add_argument('--hours', type=float, help='Only include statements logged in the last N hours.')
+        parser.add_argument('--view', help='Only include statements issued by this view.')
+        parser.add_argument('--log', help='Log file to read (defaults to SLOW_QUERY_LOG).')
+
+    def handle(self, *args, **options):
+        path = Path(options['log']) if options['log'] else get_log_path()
+        since = time.time() - options['hours'] * 3600 if options['hours'] else None
+        groups = defaultdict(lambda: {'count': 0, 'total': 0.0, 'max': 0.0, 'durations': [], 'views': Counter(), 'sites': Counter()})
+
+        for record in read_records(path):
+            if since is not None and record['at'] < since:
+                continue
+            if options['view'] and record.get('view') != options['view']:
+                continue
+            group = groups[record['fingerprint']]
+            group['sql'] = record['sql']
+            group['count'] += 1
+            group['total'] += record['ms']
+            group['max'] = max(group['max'], record['ms'])
+            group['durations'].append(record['ms'])
+            group['views'][record.get('view') or '-'] += 1
+            group['sites'][record.get('site') or '-'] += 1
+
+        if not groups:
+            self.stdout.write(f'No slow queries recorded in {path}.')
+            return
+
+        ranked = sorted(groups.items(), key=lambda item: SORT_KEYS[options['sort']](item[1]), reverse=True)
+        for fingerprint, group in ranked[:options['top']]:
+            durations = sorted(group['durations'])
+            p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{fingerprint}  count={group['count']}  total={group['total']:.0f} ms  "
+                f"mean={group['total'] / group['count']:.1f} ms  p95={p95:.1f} ms  max={group['max']:.1f} ms"
+            ))
+            self.stdout.write(f"  {group['sql'][:500]}")
+            for view, count in group['views'].most_common(3):
+                self.stdout.write(f'  view  {count:>6}  {view}')
+            for site, count in group['sites'].most_common(3):
+                self.stdout.write(f'  site  {count:>6}  {site}')
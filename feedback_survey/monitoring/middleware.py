@@ -0,0 +1,166 @@
+import asyncio
+import cProfile
+import random
+import sys
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .profiling import StackSampler, current_recorder, write_capture
+from .slow_queries import current_request, current_task
+
+
+def get_view_label(request) -> str:
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    func = getattr(match.func, 'view_class', match.func)
+    return getattr(func, '__name__', match.view_name)
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'ms': round((time.perf_counter() - started) * 1000, 2),
+            })
+
+
+class ProfilingMiddleware:
+    """Capture cProfile output for a sample of requests and stack samples for slow ones.
+
+    Enabled with PROFILING_ENABLED. A PROFILING_SAMPLE_RATE fraction of requests
+    runs under cProfile; any other request slower than PROFILING_SLOW_MS is
+    captured from stack samples. Every capture also stores the request's SQL.
+    Captures rotate in PROFILING_DIR and are browsable at /admin/monitoring/profiles/.
+
+    Under ASGI, cProfile runs in the event loop's thread: it sees the async view
+    and whatever other requests the loop runs meanwhile, while ORM calls made
+    through sync_to_async only show up as time spent awaiting them. Slow
+    requests are sampled from their task's suspended coroutines.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    sampler = None
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.slow_seconds = settings.PROFILING_SLOW_MS / 1000
+        if ProfilingMiddleware.sampler is None:
+            ProfilingMiddleware.sampler = StackSampler(self.slow_seconds)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        profiler, stacks = self.start()
+        recorder = QueryRecorder()
+        token = current_recorder.set(recorder)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            duration = time.perf_counter() - started
+            current_recorder.reset(token)
+            self.stop(profiler)
+        self.capture(request, response, duration, recorder, profiler, stacks)
+        return response
+
+    async def __acall__(self, request):
+        task = asyncio.current_task()
+        profiler, stacks = self.start(task)
+        recorder = QueryRecorder()
+        token = current_recorder.set(recorder)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            duration = time.perf_counter() - started
+            current_recorder.reset(token)
+            self.stop(profiler, task)
+        await sync_to_async(self.capture)(request, response, duration, recorder, profiler, stacks)
+        return response
+
+    def start(self, task=None):
+        """The request's profiler if it is sampled, else the stack counter of the sampler."""
+        # One profiler per thread: a request sampled while another one is
+        # profiled in the same thread (the event loop's) falls back to stacks.
+        if random.random() < self.sample_rate and sys.getprofile() is None:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+                return profiler, None
+            except ValueError:
+                pass
+        return None, self.sampler.register(task)
+
+    def stop(self, profiler, task=None):
+        if profiler is not None:
+            profiler.disable()
+        else:
+            self.sampler.unregister(task)
+
+    def capture(self, request, response, duration, recorder, profiler, stacks):
+        if profiler is None and duration < self.slow_seconds:
+            return
+        write_capture(
+            {
+                'view': get_view_label(request),
+                'path': request.path,
+                'method': request.method,
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 1),
+                'captured_at': time.time(),
+                'sampled': profiler is not None,
+                'queries': recorder.queries,
+            },
+            profiler=profiler,
+            stacks=stacks,
+        )
+
+
+class QueryAttributionMiddleware:
+    """Expose the current request to the slow-query log so entries carry the view name."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = current_request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            current_request.reset(token)
+
+    async def __acall__(self, request):
+        token = current_request.set(request)
+        task_token = current_task.set(asyncio.current_task())
+        try:
+            return await self.get_response(request)
+        finally:
+            current_task.reset(task_token)
+            current_request.reset(token)
@@ -0,0 +1,197 @@
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+
+from .slow_queries import awaiting_frames
+
+STACK_SAMPLE_INTERVAL = 0.005
+MAX_STACK_DEPTH = 60
+
+# QueryRecorder of the profiled request; a context variable, so that queries
+# the ORM runs in sync_to_async worker threads are recorded too.
+current_recorder = ContextVar('current_recorder', default=None)
+
+
+def get_profile_dir() -> Path:
+    return Path(settings.PROFILING_DIR)
+
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    base_dir = str(settings.BASE_DIR)
+    if filename.startswith(base_dir):
+        filename = os.path.relpath(filename, base_dir)
+    else:
+        filename = os.path.basename(filename)
+    return f'{filename}:{code.co_name}'
+
+
+class StackSampler:
+    """One background thread that samples the stacks of slow in-flight requests.
+
+    Requests register their thread on entry, or under ASGI their task, whose
+    suspended coroutines are sampled instead; once a request has been running
+    longer than the slow-request threshold its stack is sampled every few
+    milliseconds, so slow requests get a call tree without paying for cProfile.
+    """
+
+    def __init__(self, threshold: float, interval: float = STACK_SAMPLE_INTERVAL):
+        self.threshold = threshold
+        self.interval = interval
+        self._active = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='request-stack-sampler', daemon=True)
+        self._thread.start()
+
+    def register(self, task=None) -> Counter:
+        stacks = Counter()
+        with self._lock:
+            self._active[task or threading.get_ident()] = (time.perf_counter(), stacks)
+        return stacks
+
+    def unregister(self, task=None) -> None:
+        with self._lock:
+            self._active.pop(task or threading.get_ident(), None)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            now = time.perf_counter()
+            with self._lock:
+                due = [
+                    (key, stacks)
+                    for key, (started, stacks) in self._active.items()
+                    if now - started >= self.threshold
+                ]
+            if not due:
+                continue
+            frames = sys._current_frames()
+            for key, stacks in due:
+                if isinstance(key, int):
+                    labels = []
+                    frame = frames.get(key)
+                    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+                        labels.append(frame_label(frame))
+                        frame = frame.f_back
+                else:
+                    labels = [frame_label(frame) for frame in awaiting_frames(key)][:MAX_STACK_DEPTH]
+                if labels:
+                    stacks[';'.join(reversed(labels))] += 1
+
+
+def record_queries(execute, sql, params, many, context):
+    """``execute_wrapper`` passing the statement to the profiled request's recorder, if any."""
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install(connection) -> None:
+    if settings.PROFILING_ENABLED and record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_queries)
+
+
+def write_capture(meta: dict, profiler=None, stacks: Counter | None = None) -> str:
+    directory = get_profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    now = time.time()
+    capture_id = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}-{int(now * 1000) % 1000:03d}-{os.getpid()}-{meta['view']}"
+    if profiler is not None:
+        profiler.dump_stats(directory / f'{capture_id}.prof')
+        meta['profile'] = True
+    if stacks:
+        meta['stacks'] = dict(stacks.most_common(500))
+    (directory / f'{capture_id}.json').write_text(json.dumps(meta, ensure_ascii=False))
+    rotate(directory, settings.PROFILING_MAX_CAPTURES)
+    return capture_id
+
+
+def rotate(directory: Path, keep: int) -> None:
+    captures = sorted(directory.glob('*.json'), key=lambda path: path.stat().st_mtime, reverse=True)
+    for stale in captures[keep:]:
+        stale.unlink(missing_ok=True)
+        stale.with_suffix('.prof').unlink(missing_ok=True)
+
+
+def load_captures() -> list[dict]:
+    captures = []
+    for path in get_profile_dir().glob('*.json'):
+        try:
+            meta = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        meta['id'] = path.stem
+        captures.append(meta)
+    return captures
+
+
+def load_capture(capture_id: str) -> dict | None:
+    path = get_profile_dir() / f'{capture_id}.json'
+    if '/' in capture_id or not path.is_file():
+        return None
+    meta = json.loads(path.read_text())
+    meta['id'] = capture_id
+    return meta
+
+
+def profile_call_tree(capture_id: str, max_depth: int = 15, min_fraction: float = 0.01) -> list[str]:
+    """Indented callee tree built from a cProfile dump, pruned below ``min_fraction`` of the total."""
+    stats = pstats.Stats(str(get_profile_dir() / f'{capture_id}.prof')).stats
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, (_, _, _, cumulative) in callers.items():
+            callees.setdefault(caller, []).append((cumulative, func))
+    # Calls made from the frame that enabled the profiler have no caller
+    # entry, so the entry points are the functions with unattributed calls.
+    roots = [
+        func for func, (_, calls, _, _, callers) in stats.items()
+        if calls > sum(caller_calls for _, caller_calls, _, _ in callers.values())
+    ]
+    total = sum(stats[func][3] for func in roots) or 1
+    lines = []
+
+    def walk(func, cumulative, depth, seen):
+        if cumulative / total < min_fraction or depth > max_depth or func in seen:
+            return
+        filename, lineno, name = func
+        location = f'{os.path.basename(filename)}:{lineno}' if lineno else filename
+        lines.append(f"{'  ' * depth}{cumulative * 1000:8.1f} ms  {name}  ({location})")
+        for child_cumulative, child in sorted(callees.get(func, ()), reverse=True):
+            walk(child, child_cumulative, depth + 1, seen | {func})
+
+    for root in sorted(roots, key=lambda func: -stats[func][3]):
+        walk(root, stats[root][3], 0, frozenset())
+    return lines
+
+
+def stack_call_tree(stacks: dict[str, int], min_fraction: float = 0.01) -> list[str]:
+    """Indented tree of collapsed stack samples with the share of samples per node."""
+    tree = {}
+    total = sum(stacks.values()) or 1
+    for stack, count in stacks.items():
+        node = tree
+        for label in stack.split(';'):
+            entry = node.setdefault(label, [0, {}])
+            entry[0] += count
+            node = entry[1]
+    lines = []
+
+    def walk(node, depth):
+        for label, (count, children) in sorted(node.items(), key=lambda item: -item[1][0]):
+            if count / total < min_fraction:
+                continue
+            lines.append(f"{'  ' * depth}{count / total:6.1%}  {label}")
+            walk(children, depth + 1)
+
+    walk(tree, 0)
+    return lines
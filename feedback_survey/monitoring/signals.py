@@ -0,0 +1,10 @@
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from . import profiling, slow_queries
+
+
+@receiver(connection_created)
+def install_execute_wrappers(sender, connection, **kwargs):
+    slow_queries.install(connection)
+    profiling.install(connection)
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+
+current_request = ContextVar('current_request', default=None)
+current_task = ContextVar('current_task', default=None)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|%\(\w+\)s')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_VALUES_LIST = re.compile(r'(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+')
+_WHITESPACE = re.compile(r'\s+')
+
+_write_lock = threading.Lock()
+_this_file = os.path.normcase(__file__)
+
+
+def normalize_sql(sql: str) -> str:
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _PLACEHOLDER_LIST.sub('(...)', sql)
+    sql = _VALUES_LIST.sub(r'\1', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def fingerprint(normalized_sql: str) -> str:
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()[:12]
+
+
+def awaiting_frames(task):
+    # Frames of the coroutines suspended in the request task, innermost first.
+    frames = []
+    awaitable = task.get_coro()
+    while awaitable is not None and getattr(awaitable, 'cr_frame', None) is not None:
+        frames.append(awaitable.cr_frame)
+        awaitable = awaitable.cr_await
+    return reversed(frames)
+
+
+def find_call_site() -> str | None:
+    """First frame of project code in SLOW_QUERY_APPS that led to the query.
+
+    Async ORM calls execute in a worker thread whose stack ends in asgiref, so
+    the suspended coroutines of the request task are searched as well.
+    """
+    base_dir = str(settings.BASE_DIR)
+    prefixes = tuple(os.path.join(base_dir, app) + os.sep for app in settings.SLOW_QUERY_APPS)
+
+    def frames():
+        frame = sys._getframe(2)
+        while frame is not None:
+            yield frame
+            frame = frame.f_back
+        task = current_task.get()
+        if task is not None:
+            yield from awaiting_frames(task)
+
+    for frame in frames():
+        filename = frame.f_code.co_filename
+        if filename.startswith(prefixes) and os.path.normcase(filename) != _this_file:
+            return f'{os.path.relpath(filename, base_dir)}:{frame.f_lineno} in {frame.f_code.co_name}'
+    return None
+
+
+def get_log_path() -> Path:
+    return Path(settings.SLOW_QUERY_LOG)
+
+
+def write_record(record: dict) -> None:
+    path = get_log_path()
+    line = json.dumps(record, ensure_ascii=False) + '\n'
+    with _write_lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            if path.stat().st_size >= settings.SLOW_QUERY_LOG_MAX_BYTES:
+                os.replace(path, path.with_name(path.name + '.1'))
+        except FileNotFoundError:
+            pass
+        with open(path, 'a', encoding='utf-8') as log:
+            log.write(line)
+
+
+def read_records(path: Path | None = None):
+    path = path or get_log_path()
+    for candidate in (path.with_name(path.name + '.1'), path):
+        try:
+            log = open(candidate, encoding='utf-8')
+        except FileNotFoundError:
+            continue
+        with log:
+            for line in log:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def log_slow_queries(execute, sql, params, many, context):
+    """``execute_wrapper`` that appends statements slower than SLOW_QUERY_MS to SLOW_QUERY_LOG."""
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration_ms = (time.perf_counter() - started) * 1000
+        if duration_ms >= settings.SLOW_QUERY_MS:
+            from .middleware import get_view_label
+
+            request = current_request.get()
+            normalized = normalize_sql(sql)
+            write_record({
+                'at': time.time(),
+                'fingerprint': fingerprint(normalized),
+                'sql': normalized[:4000],
+                'ms': round(duration_ms, 2),
+                'many': many,
+                'alias': context['connection'].alias,
+                'view': get_view_label(request) if request is not None else None,
+                'site': find_call_site(),
+            })
+
+
+def install(connection) -> None:
+    # connection_created can fire inside an ``execute_wrapper()`` block, whose
+    # exit pops the last wrapper: put this one first, out of the way of LIFO pops.
+    if settings.SLOW_QUERY_MS > 0 and log_slow_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, log_slow_queries)
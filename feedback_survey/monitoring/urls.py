@@ -0,0 +1,12 @@
+from django.contrib import admin
+from django.urls import path
+
+from .views import AdmissionMetricsView, ProfileDetailView, ProfileListView
+
+app_name = 'monitoring'
+
+urlpatterns = [
+    path('profiles/', admin.site.admin_view(ProfileListView.as_view()), name='profile-list'),
+    path('profiles/<str:capture_id>/', admin.site.admin_view(ProfileDetailView.as_view()), name='profile-detail'),
+    path('admission/', admin.site.admin_view(AdmissionMetricsView.as_view()), name='admission-metrics'),
+]
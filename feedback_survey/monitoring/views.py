@@ -0,0 +1,62 @@
+from collections import defaultdict
+
+from django.contrib import admin
+from django.http import Http404, JsonResponse
+from django.views.generic import TemplateView, View
+
+from feedback_survey.admission import get_admission_metrics
+
+from .profiling import load_capture, load_captures, profile_call_tree, stack_call_tree
+
+
+class AdminContextMixin:
+    title = ''
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(admin.site.each_context(self.request))
+        context['title'] = self.title
+        return context
+
+
+class ProfileListView(AdminContextMixin, TemplateView):
+    template_name = 'admin/monitoring/profile_list.html'
+    title = 'Captured request profiles'
+    per_view = 10
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        by_view = defaultdict(list)
+        for capture in load_captures():
+            by_view[capture['view']].append(capture)
+        context['views'] = sorted(
+            (
+                (view, sorted(captures, key=lambda item: -item['duration_ms'])[:self.per_view], len(captures))
+                for view, captures in by_view.items()
+            ),
+            key=lambda item: -item[1][0]['duration_ms'],
+        )
+        return context
+
+
+class ProfileDetailView(AdminContextMixin, TemplateView):
+    template_name = 'admin/monitoring/profile_detail.html'
+    title = 'Request profile'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        capture = load_capture(self.kwargs['capture_id'])
+        if capture is None:
+            raise Http404('Capture not found.')
+        if capture.get('profile'):
+            context['call_tree'] = profile_call_tree(capture['id'])
+        elif capture.get('stacks'):
+            context['call_tree'] = stack_call_tree(capture['stacks'])
+        context['capture'] = capture
+        context['sql_ms'] = round(sum(query['ms'] for query in capture['queries']), 1)
+        return context
+
+
+class AdmissionMetricsView(View):
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(get_admission_metrics())
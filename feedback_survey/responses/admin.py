@@ -1,23 +1,128 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.forms.models import BaseInlineFormSet
+
+from surveys.search import FullTextSearchAdminMixin
 
 from .models import Answer, ResponseSession
+from .paginators import EstimatedCountPaginator
+
+
+class SurveyIdListFilter(admin.SimpleListFilter):
+    """Filter by survey id typed into an input instead of a dropdown of every survey."""
+
+    title = 'опитуванням (ID)'
+    parameter_name = 'survey_id'
+    template = 'admin/responses/input_filter.html'
+    survey_lookup = 'survey_id'
+
+    def lookups(self, request, model_admin):
+        # A non-empty placeholder so the filter is rendered; the input
+        # replaces the usual list of choices.
+        return ((None, None),)
+
+    def choices(self, changelist):
+        query_parts = []
+        for key, values in changelist.get_filters_params().items():
+            if key == self.parameter_name:
+                continue
+            for value in values if isinstance(values, list) else [values]:
+                query_parts.append((key, value))
+        yield {'query_parts': query_parts}
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if value and value.isdigit():
+            return queryset.filter(**{self.survey_lookup: int(value)})
+        return queryset
+
+
+class AnswerSurveyIdListFilter(SurveyIdListFilter):
+    survey_lookup = 'question__survey_id'
+
+
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    per_page = 25
+    page_number = 1
+
+    def get_queryset(self):
+        if not hasattr(self, '_page_queryset'):
+            paginator = Paginator(super().get_queryset(), self.per_page)
+            self.page = paginator.get_page(self.page_number)
+            self._page_queryset = self.page.object_list
+        return self._page_queryset
 
 
 class AnswerInline(admin.TabularInline):
     model = Answer
+    formset = PaginatedInlineFormSet
+    template = 'admin/responses/paginated_tabular.html'
+    fields = ('question_text', 'choice_text', 'text_answer', 'created_at')
+    readonly_fields = fields
     extra = 0
+    can_delete = False
+    per_page = 25
+    page_param = 'answers_page'
+
+    def get_queryset(self, request):
+        return (
+            super().get_queryset(request)
+            .select_related('question__survey', 'selected_choice')
+            .prefetch_related('question__choices')
+        )
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.per_page = self.per_page
+        formset.page_number = request.GET.get(self.page_param, 1)
+        formset.page_param = self.page_param
+        return formset
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description='Питання')
+    def question_text(self, obj):
+        return obj.question.text[:80]
+
+    @admin.display(description='Варіант')
+    def choice_text(self, obj):
+        if obj.selected_choices:
+            texts = {choice.pk: choice.text for choice in obj.question.choices.all()}
+            return '; '.join(texts.get(choice_id, str(choice_id)) for choice_id in obj.selected_choices)
+        return obj.selected_choice.text if obj.selected_choice_id else '—'
 
 
 @admin.register(ResponseSession)
 class ResponseSessionAdmin(admin.ModelAdmin):
     list_display = ('id', 'survey', 'user', 'status', 'started_at', 'completed_at')
-    list_filter = ('status', 'started_at', 'completed_at', 'survey')
+    list_filter = ('status', 'started_at', 'completed_at', SurveyIdListFilter)
+    list_select_related = ('survey', 'user')
     search_fields = ('user__username', 'survey__title')
+    autocomplete_fields = ('survey', 'user')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
     inlines = [AnswerInline]
 
 
 @admin.register(Answer)
-class AnswerAdmin(admin.ModelAdmin):
-    list_display = ('id', 'response_session', 'question', 'selected_choice', 'text_answer')
-    list_filter = ('question__survey',)
-    search_fields = ('response_session__user__username', 'question__text', 'text_answer')
+class AnswerAdmin(FullTextSearchAdminMixin, admin.ModelAdmin):
+    list_display = ('id', 'response_session', 'question', 'selected_choice', 'selected_choices', 'text_answer')
+    list_filter = (AnswerSurveyIdListFilter,)
+    list_select_related = (
+        'response_session__user',
+        'response_session__survey',
+        'question__survey',
+        'selected_choice__question',
+    )
+    search_fields = ('=response_session__user__username', '^question__text', 'text_answer')
+    search_help_text = 'Повнотекстовий пошук у текстових відповідях, а також за логіном студента і початком тексту питання.'
+    raw_id_fields = ('response_session',)
+    autocomplete_fields = ('question', 'selected_choice')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
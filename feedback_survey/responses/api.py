@@ -0,0 +1,221 @@
+"""JSON API for taking surveys from the mobile wrapper and kiosk tablets.
+
+``GET api/surveys/<id>/`` returns the survey's questions and choices as
+compact JSON. The body, its gzip encoding and a strong ETag (a hash of the
+body) are cached under the survey's form version, which ``surveys.signals``
+bumps on every edit. A repeat open therefore costs two cache reads, and with
+``If-None-Match`` a 304 without a body.
+
+``POST api/surveys/<id>/answers/`` takes ``{"answers": {"<question id>": value}}``,
+with a list of choice ids for multiple-choice questions, and validates and
+saves it through :mod:`responses.services` exactly like ``TakeSurveyView``.
+"""
+
+import gzip
+import hashlib
+import json
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponse, HttpResponseNotModified, JsonResponse
+from django.middleware.csrf import get_token
+from django.urls import reverse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from django.utils.regex_helper import _lazy_re_compile
+from django.views import View
+
+from accounts.mixins import AsyncStudentRequiredMixin
+from surveys.cache import asurvey_form_version
+from surveys.models import Question, Survey
+
+from .services import (
+    aget_or_create_session,
+    ahas_completed,
+    save_answers,
+    survey_closed_reason,
+    validate_answers,
+)
+
+STRUCTURE_CACHE_KEY = 'survey-structure:{}:{}'
+STRUCTURE_CACHE_TIMEOUT = 3600
+# When the student first opened the survey through the API, so that the
+# session's started_at reflects the time spent answering.
+OPENED_COOKIE = 'survey_opened_{}'
+OPENED_COOKIE_SALT = 'responses.api.opened'
+OPENED_COOKIE_MAX_AGE = 24 * 60 * 60
+
+re_accepts_gzip = _lazy_re_compile(r'\bgzip\b')
+
+
+def build_structure(survey_id: int) -> dict | None:
+    survey = Survey.objects.filter(pk=survey_id).first()
+    if survey is None:
+        return None
+    questions = list(survey.questions.prefetch_related('choices'))
+    payload = {
+        'id': survey.pk,
+        'title': survey.title,
+        'description': survey.description,
+        'start_date': survey.start_date,
+        'end_date': survey.end_date,
+        'questions': [
+            {
+                'id': question.pk,
+                'type': question.question_type,
+                'text': question.text,
+                **(
+                    {'choices': [[choice.pk, choice.text] for choice in question.choices.all()]}
+                    if question.question_type in (Question.QuestionType.SINGLE, Question.QuestionType.MULTIPLE)
+                    else {}
+                ),
+            }
+            for question in questions
+        ],
+    }
+    body = json.dumps(payload, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':')).encode()
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    for question in questions:
+        # Only the structure itself is needed from the cache.
+        question._prefetched_objects_cache = {}
+    return {
+        'survey': survey,
+        'questions': questions,
+        'body': body,
+        # mtime=0 keeps the compressed bytes identical across rebuilds.
+        'gzip_body': gzip.compress(body, mtime=0),
+        'etag': f'"{digest}"',
+        'gzip_etag': f'"{digest}-gzip"',
+    }
+
+
+async def aget_structure(survey_id: int) -> dict:
+    """The cached structure of the survey; Http404 unless it is published."""
+    key = STRUCTURE_CACHE_KEY.format(survey_id, await asurvey_form_version(survey_id))
+    structure = await cache.aget(key)
+    if structure is None:
+        structure = await sync_to_async(build_structure)(survey_id)
+        if structure is None:
+            raise Http404('No Survey matches the given query.')
+        await cache.aset(key, structure, STRUCTURE_CACHE_TIMEOUT)
+    if structure['survey'].status != Survey.Status.PUBLISHED:
+        raise Http404('No Survey matches the given query.')
+    return structure
+
+
+def unavailable_reason(structure: dict) -> str | None:
+    if not structure['questions']:
+        return 'Це опитування поки не містить питань.'
+    return survey_closed_reason(structure['survey'])
+
+
+def error_response(status: int, *errors: str) -> JsonResponse:
+    return JsonResponse({'errors': list(errors)}, status=status, json_dumps_params={'ensure_ascii': False})
+
+
+class SurveyStructureView(AsyncStudentRequiredMixin, View):
+    raise_exception = True
+
+    async def get(self, request, *args, **kwargs):
+        structure = await aget_structure(self.kwargs['survey_id'])
+        reason = unavailable_reason(structure)
+        if reason:
+            return error_response(403, reason)
+
+        compressed = bool(re_accepts_gzip.search(request.headers.get('Accept-Encoding', '')))
+        etag = structure['gzip_etag' if compressed else 'etag']
+        if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+        if '*' in if_none_match or structure['etag'] in if_none_match or structure['gzip_etag'] in if_none_match:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(
+                structure['gzip_body'] if compressed else structure['body'],
+                content_type='application/json',
+            )
+            if compressed:
+                response['Content-Encoding'] = 'gzip'
+            response['Content-Length'] = len(response.content)
+        response['ETag'] = etag
+        # Clients keep the body but revalidate on every open.
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Accept-Encoding',))
+        cookie = OPENED_COOKIE.format(structure['survey'].pk)
+        if cookie not in request.COOKIES:
+            response.set_signed_cookie(
+                cookie,
+                str(int(time.time())),
+                salt=OPENED_COOKIE_SALT,
+                max_age=OPENED_COOKIE_MAX_AGE,
+                httponly=True,
+                samesite='Lax',
+            )
+        # The submission endpoint is CSRF-protected like the form.
+        get_token(request)
+        return response
+
+
+def answers_from_json(questions, data) -> tuple[dict[int, list[str]], list[str]]:
+    """Answers of a JSON submission, and errors for values of the wrong type."""
+    answers = {}
+    errors = []
+    for question in questions:
+        value = data.get(str(question.pk))
+        if question.question_type == Question.QuestionType.MULTIPLE:
+            values = value if isinstance(value, list) else [] if value is None else None
+        else:
+            values = [] if value is None else [value]
+        if values is None or any(
+            isinstance(item, bool) or not isinstance(item, (int, str)) for item in values
+        ):
+            errors.append(f'Некоректна відповідь на питання "{question.text[:50]}...".')
+            continue
+        answers[question.pk] = [str(item) for item in values if item != '']
+    return answers, errors
+
+
+class SubmitAnswersView(AsyncStudentRequiredMixin, View):
+    raise_exception = True
+
+    async def post(self, request, *args, **kwargs):
+        structure = await aget_structure(self.kwargs['survey_id'])
+        survey, questions = structure['survey'], structure['questions']
+        # The client rendered an older version of the survey.
+        if_match = parse_etags(request.headers.get('If-Match', ''))
+        if if_match and '*' not in if_match and not {structure['etag'], structure['gzip_etag']} & set(if_match):
+            return error_response(412, 'Опитування змінилося. Оновіть сторінку.')
+        reason = unavailable_reason(structure)
+        if reason:
+            return error_response(403, reason)
+        if await ahas_completed(request.user, survey):
+            return error_response(409, 'Ви вже пройшли це опитування.')
+
+        try:
+            data = json.loads(request.body)['answers']
+            if not isinstance(data, dict):
+                raise TypeError
+        except (ValueError, KeyError, TypeError):
+            return error_response(400, 'Некоректний формат запиту.')
+        answers, errors = answers_from_json(questions, data)
+        errors += validate_answers([question for question in questions if question.pk in answers], answers)
+        if errors:
+            return error_response(400, *errors)
+
+        cookie = OPENED_COOKIE.format(survey.pk)
+        opened = request.get_signed_cookie(cookie, default='', salt=OPENED_COOKIE_SALT, max_age=OPENED_COOKIE_MAX_AGE)
+        started_at = datetime.fromtimestamp(int(opened), tz=dt_timezone.utc) if opened.isdigit() else None
+        session = await aget_or_create_session(request.user, survey, started_at=started_at)
+        try:
+            await sync_to_async(save_answers)(session, questions, answers)
+        except (Http404, ValueError, ValidationError) as e:
+            return error_response(400, f'Помилка збереження відповідей: {str(e)}')
+
+        response = JsonResponse(
+            {'session': session.pk, 'redirect': reverse('responses:thank-you', kwargs={'survey_id': survey.pk})},
+            status=201,
+        )
+        response.delete_cookie(cookie)
+        return response
@@ -0,0 +1,326 @@
+"""Bulk import of historical responses from CSV or JSON lines.
+
+One input row is one completed response: a ``respondent`` column with the
+username, an optional ``completed_at`` column (rows without one get a fixed
+default, so that a re-import recognizes them) and one column per question,
+headed by the question id or its text. Choices are given by text or id,
+several choices of a multiple-choice question separated by ``;`` (or as a
+JSON list). Each chunk is validated with vectorized pandas operations, copied
+into a temporary staging table with COPY and merged with two set-based
+INSERTs; rows that fail validation are reported and skipped.
+"""
+
+import csv
+import io
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+
+from analytics.aggregates import SCALE_RANGE
+from analytics.lazy import pd
+from surveys.models import Question
+
+from .models import ResponseSession
+from .partitions import ensure_partitions
+
+User = get_user_model()
+
+RESPONDENT_COLUMN = 'respondent'
+COMPLETED_AT_COLUMN = 'completed_at'
+RESERVED_COLUMNS = (RESPONDENT_COLUMN, COMPLETED_AT_COLUMN)
+CHOICE_SEPARATOR = ';'
+SESSION_STAGE = 'responses_import_sessions'
+ANSWER_STAGE = 'responses_import_answers'
+SESSION_STAGE_COLUMNS = ('session_id', 'user_id', 'started_at', 'completed_at')
+ANSWER_STAGE_COLUMNS = ('session_id', 'question_id', 'selected_choice_id', 'packed', 'text_answer')
+
+CREATE_STAGE_SQL = f"""
+CREATE TEMPORARY TABLE IF NOT EXISTS {SESSION_STAGE} (
+    session_id bigint NOT NULL,
+    user_id bigint NOT NULL,
+    started_at timestamptz NOT NULL,
+    completed_at timestamptz NOT NULL
+) ON COMMIT DELETE ROWS;
+CREATE TEMPORARY TABLE IF NOT EXISTS {ANSWER_STAGE} (
+    session_id bigint NOT NULL,
+    question_id bigint NOT NULL,
+    selected_choice_id bigint,
+    packed boolean NOT NULL,
+    text_answer text
+) ON COMMIT DELETE ROWS;
+"""
+
+MERGE_SESSIONS_SQL = f"""
+INSERT INTO responses_responsesession (id, user_id, survey_id, status, started_at, completed_at)
+SELECT session_id, user_id, %s, %s, started_at, completed_at FROM {SESSION_STAGE}
+ON CONFLICT (user_id, survey_id, started_at) DO NOTHING
+RETURNING user_id
+"""
+
+# Sessions skipped as duplicates above were never inserted, so the join drops
+# their answers; preallocated ids cannot match any pre-existing session.
+# Multiple-choice selections arrive one row per choice and are packed here.
+MERGE_ANSWERS_SQL = f"""
+INSERT INTO responses_answer (response_session_id, question_id, selected_choice_id, selected_choices, text_answer, created_at)
+SELECT stage.session_id, stage.question_id,
+       CASE WHEN stage.packed THEN NULL ELSE min(stage.selected_choice_id) END,
+       CASE WHEN stage.packed
+            THEN array_agg(DISTINCT stage.selected_choice_id ORDER BY stage.selected_choice_id)
+            ELSE '{{}}' END,
+       coalesce(min(stage.text_answer), ''), session.completed_at
+FROM {ANSWER_STAGE} stage
+JOIN responses_responsesession session ON session.id = stage.session_id
+GROUP BY stage.session_id, stage.question_id, stage.packed, session.completed_at
+"""
+
+
+def normalize_text(text) -> str:
+    return ' '.join(str(text).split()).casefold()
+
+
+def _normalize_series(values):
+    return values.str.split().str.join(' ').str.casefold()
+
+
+@dataclass
+class ImportStats:
+    rows: int = 0
+    sessions: int = 0
+    answers: int = 0
+    duplicates: int = 0
+    error_rows: int = 0
+    user_ids: set = field(default_factory=set)
+
+
+class ErrorReport:
+    """Per-row problems written as CSV (row, column, value, message)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(['row', 'column', 'value', 'message'])
+
+    def add(self, rows, column, values, message):
+        for row, value in zip(rows, values):
+            self._writer.writerow([row, column, value, message])
+
+    def close(self):
+        self._file.close()
+
+
+def _normalize_json_value(value):
+    if isinstance(value, list):
+        return CHOICE_SEPARATOR.join(str(_normalize_json_value(item)) for item in value)
+    if isinstance(value, float):
+        if value != value:
+            return ''
+        if value.is_integer():
+            return int(value)
+    if value is None:
+        return ''
+    return value
+
+
+def read_chunks(path, file_format: str, chunk_size: int):
+    """Yield DataFrames of strings indexed by the row's line number in the file."""
+    if file_format == 'csv':
+        reader = pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunk_size)
+        first_line = 2
+    else:
+        reader = pd.read_json(path, lines=True, dtype=False, chunksize=chunk_size)
+        first_line = 1
+    offset = first_line
+    for chunk in reader:
+        if file_format != 'csv':
+            chunk = chunk.map(_normalize_json_value)
+        chunk = chunk.astype(str)
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        offset += len(chunk)
+        yield chunk
+
+
+class ResponseImporter:
+    def __init__(self, survey, errors: ErrorReport, fallback_user=None, default_completed_at: datetime | None = None):
+        self.survey = survey
+        self.errors = errors
+        self.fallback_user_id = fallback_user.pk if fallback_user else None
+        self.default_completed_at = default_completed_at
+        self.questions = {}
+        self.choice_lookups = {}
+        self.stats = ImportStats()
+        for question in survey.questions.prefetch_related('choices'):
+            lookup = {str(choice.pk): choice.pk for choice in question.choices.all()}
+            lookup.update({normalize_text(choice.text): choice.pk for choice in question.choices.all()})
+            self.questions[question.pk] = question
+            self.choice_lookups[question.pk] = lookup
+
+    def map_columns(self, columns) -> tuple[dict[str, Question], list[str]]:
+        """Question per column (matched by id, then by text), and the columns that matched nothing."""
+        by_text = {}
+        for question in self.questions.values():
+            key = normalize_text(question.text)
+            # Texts shared by several questions are ambiguous; such columns must use the id.
+            by_text[key] = None if key in by_text else question
+        mapping, unmapped = {}, []
+        for column in columns:
+            if column in RESERVED_COLUMNS:
+                continue
+            key = column.strip()
+            question = self.questions.get(int(key)) if key.isdigit() else None
+            question = question or by_text.get(normalize_text(key))
+            if question is None:
+                unmapped.append(column)
+            else:
+                mapping[column] = question
+        return mapping, unmapped
+
+    def validate(self, chunk, mapping):
+        """Return (sessions, answers) DataFrames for the rows of ``chunk`` that passed validation."""
+        bad_rows = pd.Index([], dtype='int64')
+        answers = []
+
+        for column, question in mapping.items():
+            values = chunk[column].str.strip()
+            present = values != ''
+            qtype = question.question_type
+            if qtype == Question.QuestionType.SINGLE:
+                ids = _normalize_series(values[present]).map(self.choice_lookups[question.pk])
+                invalid = ids.isna()
+                self.errors.add(ids.index[invalid], column, values[present][invalid], 'Невідомий варіант відповіді.')
+                bad_rows = bad_rows.union(ids.index[invalid])
+                ids = ids[~invalid].astype('int64')
+                answers.append(pd.DataFrame({'row': ids.index, 'question_id': question.pk, 'selected_choice_id': ids.values}))
+            elif qtype == Question.QuestionType.MULTIPLE:
+                parts = values[present].str.split(CHOICE_SEPARATOR).explode().str.strip()
+                parts = parts[parts != '']
+                ids = _normalize_series(parts).map(self.choice_lookups[question.pk])
+                invalid = ids.index[ids.isna()].unique()
+                self.errors.add(invalid, column, values[invalid], 'Невідомий варіант відповіді.')
+                bad_rows = bad_rows.union(invalid)
+                # One staged row per selected choice; the merge packs them into selected_choices.
+                ids = ids.drop(invalid).astype('int64')
+                answers.append(pd.DataFrame({
+                    'row': ids.index, 'question_id': question.pk, 'selected_choice_id': ids.values, 'packed': True,
+                }))
+            elif qtype == Question.QuestionType.SCALE:
+                numbers = pd.to_numeric(values[present], errors='coerce')
+                invalid = ~numbers.isin(SCALE_RANGE)
+                self.errors.add(
+                    numbers.index[invalid],
+                    column,
+                    values[present][invalid],
+                    f'Очікується ціле число від {SCALE_RANGE.start} до {SCALE_RANGE.stop - 1}.',
+                )
+                bad_rows = bad_rows.union(numbers.index[invalid])
+                # Stored like the form's values: '7', not '7.0' or ' 7'.
+                text = numbers[~invalid].astype('int64').astype(str)
+                answers.append(pd.DataFrame({'row': text.index, 'question_id': question.pk, 'text_answer': text.values}))
+            else:
+                text = values[present]
+                answers.append(pd.DataFrame({'row': text.index, 'question_id': question.pk, 'text_answer': text.values}))
+
+        answers = pd.concat(answers, ignore_index=True) if answers else pd.DataFrame(columns=['row', 'question_id'])
+        without_answers = chunk.index.difference(answers['row'])
+        self.errors.add(without_answers, '', [''] * len(without_answers), 'Рядок не містить жодної відповіді.')
+        bad_rows = bad_rows.union(without_answers)
+
+        sessions = pd.DataFrame(index=chunk.index)
+        sessions['user_id'], invalid_users = self._resolve_users(chunk)
+        bad_rows = bad_rows.union(invalid_users)
+        sessions['completed_at'], invalid_dates = self._parse_completed_at(chunk)
+        bad_rows = bad_rows.union(invalid_dates)
+
+        self.stats.error_rows += len(bad_rows)
+        sessions = sessions.drop(bad_rows)
+        sessions['user_id'] = sessions['user_id'].astype('int64')
+        answers = answers[~answers['row'].isin(bad_rows)]
+        # (user, survey, started_at) is unique: rows attributed to the shared
+        # fallback account are spread by their line number so a re-import of
+        # the same file still maps every row to the same session.
+        is_fallback = (sessions['user_id'] == self.fallback_user_id).to_numpy()
+        offsets = pd.to_timedelta(sessions.index.where(is_fallback, 0).to_numpy(), unit='us')
+        sessions['started_at'] = sessions['completed_at'] - offsets
+        return sessions, answers
+
+    def _resolve_users(self, chunk):
+        if RESPONDENT_COLUMN not in chunk:
+            usernames = pd.Series('', index=chunk.index)
+        else:
+            usernames = chunk[RESPONDENT_COLUMN].str.strip()
+        known = dict(
+            User.objects.filter(username__in=usernames[usernames != ''].unique().tolist()).values_list('username', 'pk')
+        )
+        user_ids = usernames.map(known)
+        if self.fallback_user_id is not None:
+            user_ids = user_ids.fillna(self.fallback_user_id)
+        invalid = user_ids.index[user_ids.isna()]
+        self.errors.add(invalid, RESPONDENT_COLUMN, usernames[invalid], 'Користувача не знайдено.')
+        return user_ids, invalid
+
+    def _parse_completed_at(self, chunk):
+        if COMPLETED_AT_COLUMN not in chunk:
+            return pd.Series(pd.Timestamp(self.default_completed_at), index=chunk.index), pd.Index([], dtype='int64')
+        raw = chunk[COMPLETED_AT_COLUMN].str.strip()
+        parsed = pd.to_datetime(raw.where(raw != ''), utc=True, errors='coerce', format='ISO8601')
+        invalid = parsed.index[parsed.isna() & (raw != '')]
+        self.errors.add(invalid, COMPLETED_AT_COLUMN, raw[invalid], 'Некоректна дата (очікується ISO 8601).')
+        return parsed.fillna(pd.Timestamp(self.default_completed_at)), invalid
+
+    def load(self, sessions, answers) -> None:
+        if sessions.empty:
+            return
+        ensure_partitions(
+            connection,
+            until=sessions['completed_at'].max().to_pydatetime(),
+            since=sessions['completed_at'].min().to_pydatetime(),
+        )
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(CREATE_STAGE_SQL)
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence('responses_responsesession', 'id')) FROM generate_series(1, %s)",
+                [len(sessions)],
+            )
+            sessions = sessions.assign(session_id=[row[0] for row in cursor.fetchall()])
+            answers = answers.join(sessions['session_id'], on='row', how='inner')
+            # Columns of question types the survey doesn't have are missing altogether.
+            answers = answers.reindex(columns=ANSWER_STAGE_COLUMNS)
+            answers = answers.assign(
+                selected_choice_id=answers['selected_choice_id'].astype('Int64'),
+                packed=answers['packed'].fillna(False).astype(bool),
+                text_answer=answers['text_answer'].fillna(''),
+            )
+            # Naive UTC timestamps: formatting tz-aware ones is several times slower,
+            # and the connection's time zone is UTC.
+            for column in ('started_at', 'completed_at'):
+                sessions[column] = sessions[column].dt.tz_convert('UTC').dt.tz_localize(None)
+            self._copy(cursor, SESSION_STAGE, sessions, SESSION_STAGE_COLUMNS)
+            self._copy(cursor, ANSWER_STAGE, answers, ANSWER_STAGE_COLUMNS)
+            cursor.execute(MERGE_SESSIONS_SQL, [self.survey.pk, ResponseSession.Status.COMPLETED])
+            inserted = [row[0] for row in cursor.fetchall()]
+            cursor.execute(MERGE_ANSWERS_SQL)
+            self.stats.answers += cursor.rowcount
+        self.stats.sessions += len(inserted)
+        self.stats.duplicates += len(sessions) - len(inserted)
+        self.stats.user_ids.update(inserted)
+
+    def _copy(self, cursor, table, frame, columns):
+        buffer = io.StringIO()
+        frame.to_csv(buffer, columns=list(columns), header=False, index=False)
+        buffer.seek(0)
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '')", buffer)
+
+    def run(self, chunks, dry_run: bool = False) -> ImportStats:
+        mapping = None
+        for chunk in chunks:
+            if mapping is None:
+                mapping, unmapped = self.map_columns(chunk.columns)
+                if unmapped:
+                    raise ValueError(f"Columns match no question of the survey (or several): {', '.join(unmapped)}")
+            self.stats.rows += len(chunk)
+            sessions, answers = self.validate(chunk, mapping)
+            if not dry_run:
+                self.load(sessions, answers)
+        return self.stats
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from responses.partitions import (
+    ARCHIVE_TABLE,
+    PARENT_TABLE,
+    ensure_partitions,
+    list_partitions,
+    semester_start,
+)
+from surveys.models import Survey
+
+
+class Command(BaseCommand):
+    help = (
+        'Create upcoming semester partitions of responses_answer and move past partitions '
+        'whose surveys are all closed under responses_answer_archive.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, default=1, help='Future semesters to create partitions for.')
+        parser.add_argument('--compact', action='store_true', help='VACUUM FULL each partition after archiving it.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be archived.')
+
+    def handle(self, *args, **options):
+        now = datetime.now(timezone.utc)
+        if not options['dry_run']:
+            for name in ensure_partitions(connection, until=now + timedelta(days=183 * options['ahead'])):
+                self.stdout.write(f'Created partition {name}')
+
+        current = semester_start(now)
+        with connection.cursor() as cursor:
+            candidates = [
+                (name, lower, upper)
+                for name, lower, upper in list_partitions(cursor)
+                if upper is not None and upper <= current
+            ]
+        if not candidates:
+            self.stdout.write('No past partitions left in the live table.')
+
+        for name, lower, upper in candidates:
+            open_surveys = self.open_surveys(name)
+            if open_surveys:
+                self.stdout.write(f'{name}: kept, {open_surveys} survey(s) not closed yet')
+                continue
+            size = self.relation_size(name)
+            if options['dry_run']:
+                self.stdout.write(f'{name}: would be archived ({size})')
+                continue
+            self.archive(name, lower, upper)
+            if options['compact']:
+                with connection.cursor() as cursor:
+                    cursor.execute(f'VACUUM (FULL, ANALYZE) {name}')
+            self.stdout.write(self.style.SUCCESS(f'{name}: archived ({size} → {self.relation_size(name)})'))
+
+    def open_surveys(self, partition: str) -> int:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT count(DISTINCT question.survey_id)
+                FROM {partition} answer
+                JOIN surveys_question question ON question.id = answer.question_id
+                JOIN surveys_survey survey ON survey.id = question.survey_id
+                WHERE survey.status <> %s
+                """,
+                [Survey.Status.CLOSED],
+            )
+            return cursor.fetchone()[0]
+
+    def archive(self, partition: str, lower, upper) -> None:
+        with transaction.atomic(), connection.cursor() as cursor:
+            # DETACH needs an ACCESS EXCLUSIVE lock on the live table; give up
+            # rather than queue every request behind a long-running query.
+            cursor.execute("SET LOCAL lock_timeout = '5s'")
+            cursor.execute(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION {partition}')
+            # Archived rows are immutable and must not block deleting old surveys.
+            cursor.execute(
+                "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+                [partition],
+            )
+            for (constraint,) in cursor.fetchall():
+                cursor.execute(f'ALTER TABLE {partition} DROP CONSTRAINT {constraint}')
+            cursor.execute(
+                f'ALTER TABLE {ARCHIVE_TABLE} ATTACH PARTITION {partition} FOR VALUES FROM (%s) TO (%s)',
+                [lower, upper],
+            )
+
+    def relation_size(self, name: str) -> str:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_size_pretty(pg_total_relation_size(%s::regclass))', [name])
+            return cursor.fetchone()[0]
@@ -0,0 +1,75 @@
+import time
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from responses.importing import ErrorReport, ResponseImporter, read_chunks
+from surveys.cache import bump_user_list_version
+from surveys.models import Survey
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Import historical responses to a survey from CSV or JSON lines: one row per respondent, '
+        'a "respondent" (username) and optional "completed_at" column, one column per question '
+        '(question id or text). Rows without "completed_at" take the file\'s modification time, so '
+        're-importing the unchanged file skips them. Invalid rows are written to an error report and skipped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (.csv) or JSON lines (.jsonl, .json) file.')
+        parser.add_argument('--survey', type=int, required=True, help='Id of the survey the responses belong to.')
+        parser.add_argument('--format', choices=('csv', 'jsonl'), help='Input format (default: by extension).')
+        parser.add_argument('--chunk-size', type=int, default=50000, help='Rows validated and loaded per batch.')
+        parser.add_argument('--fallback-user', help='Username to attribute rows with an unknown or empty respondent to.')
+        parser.add_argument('--errors', help='Error report path (default: <path>.errors.csv).')
+        parser.add_argument('--dry-run', action='store_true', help='Validate only; nothing is written to the database.')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.is_file():
+            raise CommandError(f'{path} does not exist.')
+        file_format = options['format'] or ('csv' if path.suffix.lower() == '.csv' else 'jsonl')
+        try:
+            survey = Survey.objects.get(pk=options['survey'])
+        except Survey.DoesNotExist:
+            raise CommandError(f"Survey {options['survey']} does not exist.")
+        fallback_user = None
+        if options['fallback_user']:
+            try:
+                fallback_user = User.objects.get(username=options['fallback_user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User {options['fallback_user']} does not exist.")
+
+        errors_path = Path(options['errors'] or f'{path}.errors.csv')
+        errors = ErrorReport(errors_path)
+        # Deterministic, unlike now(): sessions are deduplicated by their started_at.
+        default_completed_at = datetime.fromtimestamp(path.stat().st_mtime, tz=dt_timezone.utc)
+        importer = ResponseImporter(
+            survey, errors, fallback_user=fallback_user, default_completed_at=default_completed_at,
+        )
+        started = time.perf_counter()
+        try:
+            stats = importer.run(read_chunks(path, file_format, options['chunk_size']), dry_run=options['dry_run'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        finally:
+            errors.close()
+        elapsed = time.perf_counter() - started
+
+        for user_id in stats.user_ids:
+            bump_user_list_version(user_id)
+
+        self.stdout.write(
+            f'{stats.rows} rows in {elapsed:.1f} s ({stats.rows / elapsed if elapsed else 0:.0f} rows/s): '
+            f'{stats.sessions} responses and {stats.answers} answers imported, '
+            f'{stats.duplicates} already present, {stats.error_rows} rejected.'
+        )
+        if stats.error_rows:
+            self.stdout.write(self.style.WARNING(f'Rejected rows are listed in {errors_path}.'))
+        else:
+            errors_path.unlink(missing_ok=True)
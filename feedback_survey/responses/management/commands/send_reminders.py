@@ -0,0 +1,57 @@
+import time
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand, CommandError
+
+from responses.reminders import RateLimiter, open_surveys, send_reminders
+
+
+class Command(BaseCommand):
+    help = (
+        'E-mail a reminder to every active student who has not completed an open published survey. '
+        'Each (survey, student, round) is mailed at most once, so the command is safe to re-run.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--survey', type=int, action='append', dest='surveys', help='Survey id; repeatable (default: every open survey).')
+        parser.add_argument('--round', type=int, default=1, help='Reminder round; a new round reminds the same students again.')
+        parser.add_argument('--batch-size', type=int, default=settings.REMINDER_BATCH_SIZE, help='Recipients claimed and sent per batch.')
+        parser.add_argument('--rate', type=float, default=settings.REMINDER_RATE_PER_SECOND, help='Messages per second; 0 for no limit.')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the recipients.')
+
+    def handle(self, *args, **options):
+        surveys = open_surveys().order_by('pk')
+        if options['surveys']:
+            surveys = surveys.filter(pk__in=options['surveys'])
+            missing = set(options['surveys']) - {survey.pk for survey in surveys}
+            if missing:
+                raise CommandError(f"Not open published surveys: {', '.join(map(str, sorted(missing)))}")
+
+        started = time.perf_counter()
+        limiter = RateLimiter(options['rate'])
+        totals = {'targeted': 0, 'sent': 0, 'skipped': 0}
+        # One mail connection for the whole run.
+        with nullcontext() if options['dry_run'] else get_connection() as connection:
+            for survey in surveys:
+                stats = send_reminders(
+                    survey,
+                    round=options['round'],
+                    batch_size=options['batch_size'],
+                    limiter=limiter,
+                    connection=connection,
+                    dry_run=options['dry_run'],
+                )
+                for key in totals:
+                    totals[key] += getattr(stats, key)
+                if options['verbosity'] > 1:
+                    self.stdout.write(
+                        f'survey {survey.pk}: {stats.targeted} to remind, {stats.sent} sent, {stats.skipped} skipped'
+                    )
+
+        action = 'would be reminded' if options['dry_run'] else f"reminded ({totals['sent']} sent, {totals['skipped']} already claimed)"
+        self.stdout.write(
+            f"{totals['targeted']} student(s) {action}, round {options['round']}, "
+            f'in {time.perf_counter() - started:.1f}s'
+        )
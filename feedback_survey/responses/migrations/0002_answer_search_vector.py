@@ -0,0 +1,70 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+SEARCH_CONFIG = getattr(settings, 'SEARCH_CONFIG', 'simple')
+BACKFILL_BATCH_SIZE = 20000
+
+CREATE_TRIGGER_SQL = f"""
+CREATE OR REPLACE FUNCTION responses_answer_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    IF coalesce(NEW.text_answer, '') = '' THEN
+        NEW.search_vector := NULL;
+    ELSE
+        NEW.search_vector := to_tsvector('{SEARCH_CONFIG}', NEW.text_answer);
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER responses_answer_search_vector_trigger
+BEFORE INSERT OR UPDATE OF text_answer, search_vector
+ON responses_answer
+FOR EACH ROW EXECUTE FUNCTION responses_answer_search_vector_update();
+"""
+
+DROP_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS responses_answer_search_vector_trigger ON responses_answer;
+DROP FUNCTION IF EXISTS responses_answer_search_vector_update();
+"""
+
+
+def backfill_search_vectors(apps, schema_editor):
+    # Non-atomic migration: every batch commits on its own so the answer
+    # table is never locked for the whole backfill.
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('SELECT min(id), max(id) FROM responses_answer')
+        low, high = cursor.fetchone()
+        if low is None:
+            return
+        for start in range(low, high + 1, BACKFILL_BATCH_SIZE):
+            cursor.execute(
+                "UPDATE responses_answer SET text_answer = text_answer "
+                "WHERE id >= %s AND id < %s AND text_answer <> ''",
+                [start, start + BACKFILL_BATCH_SIZE],
+            )
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('responses', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answer',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER_SQL, DROP_TRIGGER_SQL),
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='answer',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='responses_answer_search_gin'),
+        ),
+    ]
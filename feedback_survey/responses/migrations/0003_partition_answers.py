@@ -0,0 +1,167 @@
+from datetime import datetime, timedelta, timezone
+
+import django.db.models.deletion
+from django.db import migrations, models, transaction
+
+from responses.partitions import ARCHIVE_TABLE, DEFAULT_PARTITION, ensure_partitions
+
+COPY_BATCH_SIZE = 20000
+NEW_TABLE = 'responses_answer_partitioned'
+CHANGED_IDS_TABLE = 'responses_answer_partition_changed'
+MIRROR_TRIGGER = 'responses_answer_partition_mirror'
+
+# While the batches are copied, every write to the old table is mirrored into
+# the new one and the ids of updated/deleted rows are logged, so the final swap
+# only has to re-copy those rows under lock.
+CREATE_MIRROR_SQL = f"""
+CREATE TABLE {CHANGED_IDS_TABLE} (id bigint NOT NULL);
+
+CREATE FUNCTION {MIRROR_TRIGGER}() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO {CHANGED_IDS_TABLE} VALUES (OLD.id);
+        DELETE FROM {NEW_TABLE} WHERE id = OLD.id AND created_at = OLD.created_at;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO {NEW_TABLE} SELECT NEW.* ON CONFLICT DO NOTHING;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER {MIRROR_TRIGGER}
+AFTER INSERT OR UPDATE OR DELETE ON responses_answer
+FOR EACH ROW EXECUTE FUNCTION {MIRROR_TRIGGER}();
+"""
+
+
+def create_partitioned_table(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TABLE {NEW_TABLE} (LIKE responses_answer INCLUDING DEFAULTS INCLUDING STORAGE) '
+            'PARTITION BY RANGE (created_at)'
+        )
+        cursor.execute(f'ALTER TABLE {NEW_TABLE} ADD CONSTRAINT {NEW_TABLE}_pkey PRIMARY KEY (id, created_at)')
+        # Same indexes and foreign keys as the current table; indexes get a
+        # temporary name and are renamed once the old table is gone.
+        cursor.execute(
+            """
+            SELECT indexname, indexdef FROM pg_indexes
+            WHERE tablename = 'responses_answer' AND indexname <> 'responses_answer_pkey'
+            """
+        )
+        for name, definition in cursor.fetchall():
+            definition = definition.replace(f'INDEX {name} ON', f'INDEX {name[:55]}_new ON', 1)
+            definition = definition.replace(' ON public.responses_answer ', f' ON {NEW_TABLE} ', 1)
+            cursor.execute(definition)
+        cursor.execute(
+            """
+            SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+            WHERE conrelid = 'responses_answer'::regclass AND contype = 'f'
+            """
+        )
+        for name, definition in cursor.fetchall():
+            cursor.execute(f'ALTER TABLE {NEW_TABLE} ADD CONSTRAINT {name} {definition}')
+        cursor.execute(f'CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {NEW_TABLE} DEFAULT')
+        cursor.execute('SELECT min(created_at) FROM responses_answer')
+        oldest = cursor.fetchone()[0]
+    now = datetime.now(timezone.utc)
+    ensure_partitions(connection, until=now + timedelta(days=183), since=oldest or now, parent=NEW_TABLE)
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_MIRROR_SQL)
+
+
+def copy_answers(apps, schema_editor):
+    # Non-atomic migration: every batch commits on its own, so the answer
+    # table stays writable while it is copied.
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('SELECT min(id), max(id) FROM responses_answer')
+        low, high = cursor.fetchone()
+        if low is None:
+            return
+        for start in range(low, high + 1, COPY_BATCH_SIZE):
+            cursor.execute(
+                f'INSERT INTO {NEW_TABLE} SELECT * FROM responses_answer '
+                'WHERE id >= %s AND id < %s ON CONFLICT DO NOTHING',
+                [start, start + COPY_BATCH_SIZE],
+            )
+
+
+def swap_tables(apps, schema_editor):
+    connection = schema_editor.connection
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute("SET LOCAL lock_timeout = '30s'")
+        cursor.execute('LOCK TABLE responses_answer IN EXCLUSIVE MODE')
+        cursor.execute(f'DELETE FROM {NEW_TABLE} WHERE id IN (SELECT id FROM {CHANGED_IDS_TABLE})')
+        cursor.execute(
+            f'INSERT INTO {NEW_TABLE} SELECT * FROM responses_answer '
+            f'WHERE id IN (SELECT id FROM {CHANGED_IDS_TABLE}) ON CONFLICT DO NOTHING'
+        )
+        cursor.execute(f'DROP TRIGGER {MIRROR_TRIGGER} ON responses_answer')
+        cursor.execute(f'DROP FUNCTION {MIRROR_TRIGGER}()')
+        cursor.execute(f'DROP TABLE {CHANGED_IDS_TABLE}')
+
+        cursor.execute('SELECT coalesce(max(id), 0) + 1 FROM responses_answer')
+        next_id = cursor.fetchone()[0]
+        cursor.execute(
+            "SELECT indexname FROM pg_indexes WHERE tablename = 'responses_answer' "
+            "AND indexname <> 'responses_answer_pkey'"
+        )
+        index_names = [row[0] for row in cursor.fetchall()]
+        cursor.execute('DROP TABLE responses_answer')
+
+        cursor.execute(f'ALTER TABLE {NEW_TABLE} RENAME TO responses_answer')
+        cursor.execute(f'ALTER TABLE responses_answer RENAME CONSTRAINT {NEW_TABLE}_pkey TO responses_answer_pkey')
+        for name in index_names:
+            cursor.execute(f'ALTER INDEX {name[:55]}_new RENAME TO {name}')
+        # A plain owned sequence rather than an identity column, which
+        # partitioned tables only support from PostgreSQL 17.
+        cursor.execute(f'CREATE SEQUENCE responses_answer_id_seq START WITH {next_id}')
+        cursor.execute("ALTER TABLE responses_answer ALTER COLUMN id SET DEFAULT nextval('responses_answer_id_seq')")
+        cursor.execute('ALTER SEQUENCE responses_answer_id_seq OWNED BY responses_answer.id')
+        cursor.execute(
+            'CREATE TRIGGER responses_answer_search_vector_trigger '
+            'BEFORE INSERT OR UPDATE OF text_answer, search_vector ON responses_answer '
+            'FOR EACH ROW EXECUTE FUNCTION responses_answer_search_vector_update()'
+        )
+
+
+CREATE_ARCHIVE_SQL = f"""
+CREATE TABLE {ARCHIVE_TABLE} (LIKE responses_answer INCLUDING DEFAULTS INCLUDING STORAGE)
+PARTITION BY RANGE (created_at);
+CREATE INDEX {ARCHIVE_TABLE}_question_id ON {ARCHIVE_TABLE} (question_id);
+CREATE INDEX {ARCHIVE_TABLE}_response_session_id ON {ARCHIVE_TABLE} (response_session_id);
+"""
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('responses', '0002_answer_search_vector'),
+        ('surveys', '0003_survey_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_partitioned_table),
+        migrations.RunPython(copy_answers),
+        migrations.RunPython(swap_tables),
+        migrations.RunSQL(CREATE_ARCHIVE_SQL, f'DROP TABLE {ARCHIVE_TABLE}'),
+        migrations.CreateModel(
+            name='ArchivedAnswer',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('text_answer', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField()),
+                ('question', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='surveys.question')),
+                ('response_session', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='responses.responsesession')),
+                ('selected_choice', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='surveys.choice')),
+            ],
+            options={
+                'db_table': 'responses_answer_archive',
+                'managed': False,
+            },
+        ),
+    ]
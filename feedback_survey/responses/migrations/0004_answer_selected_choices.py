@@ -0,0 +1,129 @@
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+from responses.partitions import ARCHIVE_TABLE, list_partitions
+
+CONVERT_BATCH_SIZE = 5000
+INDEX_NAME = 'responses_answer_choices_gin'
+
+# Folds the one-row-per-choice answers of a range of sessions into a single
+# row per (session, question) carrying every selected choice id.
+PACK_SQL = """
+WITH packed AS (
+    SELECT answer.response_session_id, answer.question_id, min(answer.id) AS keep_id,
+           array_agg(answer.selected_choice_id ORDER BY answer.selected_choice_id) AS choices
+    FROM responses_answer answer
+    JOIN surveys_question question ON question.id = answer.question_id
+    WHERE question.question_type = 'multiple'
+      AND answer.selected_choice_id IS NOT NULL
+      AND answer.response_session_id >= %s AND answer.response_session_id < %s
+    GROUP BY answer.response_session_id, answer.question_id
+), kept AS (
+    UPDATE responses_answer answer
+    SET selected_choices = packed.choices, selected_choice_id = NULL
+    FROM packed
+    WHERE answer.id = packed.keep_id AND answer.response_session_id = packed.response_session_id
+)
+DELETE FROM responses_answer answer
+USING packed
+WHERE answer.response_session_id = packed.response_session_id
+  AND answer.question_id = packed.question_id
+  AND answer.selected_choice_id IS NOT NULL
+  AND answer.id <> packed.keep_id
+"""
+
+UNPACK_SQL = """
+WITH packed AS (
+    SELECT id, response_session_id, question_id, text_answer, created_at, selected_choices
+    FROM responses_answer
+    WHERE selected_choices <> '{}'
+      AND response_session_id >= %s AND response_session_id < %s
+), expanded AS (
+    INSERT INTO responses_answer (response_session_id, question_id, selected_choice_id, selected_choices, text_answer, created_at)
+    SELECT response_session_id, question_id, unnest(selected_choices[2:]), '{}', text_answer, created_at FROM packed
+)
+UPDATE responses_answer answer
+SET selected_choice_id = packed.selected_choices[1], selected_choices = '{}'
+FROM packed
+WHERE answer.id = packed.id AND answer.response_session_id = packed.response_session_id
+"""
+
+
+def session_ranges(cursor):
+    cursor.execute('SELECT min(id), max(id) FROM responses_responsesession')
+    low, high = cursor.fetchone()
+    if low is None:
+        return
+    for start in range(low, high + 1, CONVERT_BATCH_SIZE):
+        yield start, start + CONVERT_BATCH_SIZE
+
+
+def pack_multiple_choice_answers(apps, schema_editor):
+    # Non-atomic migration: each batch of sessions commits on its own.
+    with schema_editor.connection.cursor() as cursor:
+        for start, end in list(session_ranges(cursor)):
+            cursor.execute(PACK_SQL, [start, end])
+
+
+def unpack_multiple_choice_answers(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        for start, end in list(session_ranges(cursor)):
+            cursor.execute(UNPACK_SQL, [start, end])
+
+
+def create_choices_index(apps, schema_editor):
+    # CREATE INDEX CONCURRENTLY is not supported on a partitioned table, so the
+    # index is built concurrently per partition and attached to a parent index
+    # created ON ONLY the partitioned table.
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON ONLY responses_answer USING gin (selected_choices)')
+        for partition, _, _ in list_partitions(cursor):
+            partition_index = f'{partition[:40]}_choices_gin'
+            cursor.execute(
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {partition_index} ON {partition} USING gin (selected_choices)'
+            )
+            cursor.execute(f'ALTER INDEX {INDEX_NAME} ATTACH PARTITION {partition_index}')
+
+
+def drop_choices_index(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('responses', '0003_partition_answers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answer',
+            name='selected_choices',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, default=list, size=None),
+        ),
+        migrations.RunSQL(
+            f"ALTER TABLE {ARCHIVE_TABLE} ADD COLUMN selected_choices bigint[] NOT NULL DEFAULT '{{}}'",
+            f'ALTER TABLE {ARCHIVE_TABLE} DROP COLUMN selected_choices',
+        ),
+        migrations.AddField(
+            model_name='archivedanswer',
+            name='selected_choices',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, default=list, size=None),
+        ),
+        migrations.RunPython(pack_multiple_choice_answers, unpack_multiple_choice_answers),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(create_choices_index, drop_choices_index),
+            ],
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='answer',
+                    index=django.contrib.postgres.indexes.GinIndex(fields=['selected_choices'], name=INDEX_NAME),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('responses', '0004_answer_selected_choices'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='responsesession',
+            index=models.Index(fields=['user', 'status', '-completed_at', '-id'], name='responses_session_history'),
+        ),
+    ]
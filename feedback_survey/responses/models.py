@@ -1,4 +1,7 @@
 from django.conf import settings
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 
@@ -24,6 +27,13 @@ class ResponseSession(models.Model):
 
     class Meta:
         unique_together = ('user', 'survey', 'started_at')
+        indexes = [
+            # Student history: keyset pagination over (completed_at, id) per status.
+            models.Index(
+                fields=['user', 'status', '-completed_at', '-id'],
+                name='responses_session_history',
+            ),
+        ]
 
     def __str__(self) -> str:
         return f'Session #{self.pk} — {self.user} / {self.survey}'
@@ -47,11 +57,91 @@ class Answer(models.Model):
         on_delete=models.SET_NULL,
         related_name='answers',
     )
+    # Multiple-choice answers are stored as one row per (session, question)
+    # with every selected choice id here; rows written before migration 0004
+    # used one row per choice in selected_choice instead.
+    selected_choices = ArrayField(models.BigIntegerField(), default=list, blank=True)
     text_answer = models.TextField(blank=True)
+    # Maintained by a database trigger, see migration 0002.
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Partition key of responses_answer (one partition per semester), see
+    # responses.partitions and migration 0003.
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['question', 'pk']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='responses_answer_search_gin'),
+            GinIndex(fields=['selected_choices'], name='responses_answer_choices_gin'),
+        ]
 
     def __str__(self) -> str:
         return f'Answer #{self.pk} to {self.question}'
+
+
+class ArchivedAnswer(models.Model):
+    """Read-only answers of closed surveys moved out of the live table.
+
+    Backed by the ``responses_answer_archive`` partitioned table, which
+    ``manage.py archive_answers`` fills by detaching past semester partitions.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    response_session = models.ForeignKey(
+        ResponseSession,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+    )
+    question = models.ForeignKey(
+        'surveys.Question',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+    )
+    selected_choice = models.ForeignKey(
+        'surveys.Choice',
+        null=True,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+    )
+    selected_choices = ArrayField(models.BigIntegerField(), default=list, blank=True)
+    text_answer = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = 'responses_answer_archive'
+
+    def __str__(self) -> str:
+        return f'Archived answer #{self.pk} to {self.question}'
+
+
+class ReminderSend(models.Model):
+    """A reminder e-mail to a student who has not completed a survey.
+
+    The row is written before the message goes out and its unique
+    (survey, user, round) key keeps a retried ``send_reminders`` from mailing
+    anyone twice; rows of messages that failed to send are deleted again, and
+    pending rows older than ``REMINDER_CLAIM_TIMEOUT`` can be claimed anew.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        SENT = 'sent', 'Sent'
+
+    survey = models.ForeignKey('surveys.Survey', on_delete=models.CASCADE, related_name='reminders')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    round = models.PositiveSmallIntegerField(default=1)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['survey', 'round', 'user'], name='responses_reminder_once'),
+        ]
+
+    def __str__(self) -> str:
+        return f'Reminder #{self.round} — {self.user_id} / {self.survey_id}'
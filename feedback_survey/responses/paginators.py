@@ -0,0 +1,46 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that never runs an unbounded COUNT(*) on large tables.
+
+    Unfiltered querysets use the planner's row estimate from pg_class;
+    filtered ones are counted exactly, but only up to ``max_exact_count``.
+    """
+
+    max_exact_count = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = self._estimate_table_rows(queryset)
+            if estimate is not None:
+                return estimate
+        return queryset.order_by()[:self.max_exact_count].count()
+
+    def _estimate_table_rows(self, queryset):
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            # A partitioned parent has no rows of its own; sum its leaf partitions.
+            cursor.execute(
+                """
+                SELECT CASE parent.relkind WHEN 'p' THEN (
+                    SELECT sum(greatest(leaf.reltuples, 0))
+                    FROM pg_partition_tree(parent.oid) tree
+                    JOIN pg_class leaf ON leaf.oid = tree.relid
+                    WHERE tree.isleaf
+                ) ELSE parent.reltuples END::bigint
+                FROM pg_class parent WHERE parent.oid = %s::regclass
+                """,
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        # reltuples is -1 (or 0 on older servers) until the table is analyzed.
+        if not row or row[0] is None or row[0] <= 0:
+            return None
+        return row[0]
@@ -0,0 +1,123 @@
+"""Semester range partitions of ``responses_answer``.
+
+Answers are partitioned on ``created_at`` into half-year partitions (spring:
+February–July, autumn: August–January) named ``responses_answer_<year>_<half>``,
+plus a default partition that only catches rows no partition was created for.
+Past partitions whose surveys are all closed are moved under
+``responses_answer_archive`` by ``manage.py archive_answers``.
+"""
+
+import re
+from datetime import datetime, timezone
+
+from django.db import transaction
+
+PARENT_TABLE = 'responses_answer'
+DEFAULT_PARTITION = 'responses_answer_default'
+ARCHIVE_TABLE = 'responses_answer_archive'
+
+SPRING_MONTH = 2
+AUTUMN_MONTH = 8
+
+_BOUND_RE = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+def semester_start(moment: datetime) -> datetime:
+    moment = moment.astimezone(timezone.utc)
+    if moment.month >= AUTUMN_MONTH:
+        return datetime(moment.year, AUTUMN_MONTH, 1, tzinfo=timezone.utc)
+    if moment.month >= SPRING_MONTH:
+        return datetime(moment.year, SPRING_MONTH, 1, tzinfo=timezone.utc)
+    return datetime(moment.year - 1, AUTUMN_MONTH, 1, tzinfo=timezone.utc)
+
+
+def next_semester(start: datetime) -> datetime:
+    if start.month == SPRING_MONTH:
+        return start.replace(month=AUTUMN_MONTH)
+    return start.replace(year=start.year + 1, month=SPRING_MONTH)
+
+
+def partition_name(start: datetime) -> str:
+    half = 'spring' if start.month == SPRING_MONTH else 'autumn'
+    return f'{PARENT_TABLE}_{start.year}_{half}'
+
+
+def semesters(first: datetime, last: datetime):
+    """``(start, end)`` of every semester from the one containing ``first`` to the one containing ``last``."""
+    start = semester_start(first)
+    while start <= last:
+        end = next_semester(start)
+        yield start, end
+        start = end
+
+
+def list_partitions(cursor, parent: str = PARENT_TABLE) -> list[tuple[str, datetime | None, datetime | None]]:
+    """``(name, lower, upper)`` of the partitions attached to ``parent``; bounds are None for the default."""
+    cursor.execute(
+        """
+        SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = %s::regclass
+        ORDER BY child.relname
+        """,
+        [parent],
+    )
+    partitions = []
+    for name, bound in cursor.fetchall():
+        match = _BOUND_RE.search(bound)
+        if match is None:
+            partitions.append((name, None, None))
+        else:
+            lower, upper = (datetime.fromisoformat(value) for value in match.groups())
+            partitions.append((name, lower, upper))
+    return partitions
+
+
+def create_partition(cursor, start: datetime, end: datetime, parent: str = PARENT_TABLE) -> str:
+    """Create and attach the partition for ``[start, end)``, moving any matching rows out of the default.
+
+    Must run inside a transaction: the default partition stays locked against
+    inserts until the new partition is attached.
+    """
+    name = partition_name(start)
+    cursor.execute(f'LOCK TABLE {DEFAULT_PARTITION} IN SHARE ROW EXCLUSIVE MODE')
+    cursor.execute(f'CREATE TABLE {name} (LIKE {parent} INCLUDING DEFAULTS INCLUDING STORAGE)')
+    cursor.execute(
+        f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= %s AND created_at < %s RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+        """,
+        [start, end],
+    )
+    cursor.execute(f'ALTER TABLE {parent} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)', [start, end])
+    return name
+
+
+def ensure_partitions(connection, until: datetime, since: datetime | None = None, parent: str = PARENT_TABLE) -> list[str]:
+    """Create the missing semester partitions from ``since`` through ``until``.
+
+    ``since`` defaults to now, or to the oldest row stranded in the default partition.
+    """
+    created = []
+    with connection.cursor() as cursor:
+        if since is None:
+            cursor.execute(f'SELECT min(created_at) FROM {DEFAULT_PARTITION}')
+            stranded = cursor.fetchone()[0]
+            since = min(stranded, datetime.now(timezone.utc)) if stranded else datetime.now(timezone.utc)
+        existing = {name for name, _, _ in list_partitions(cursor, parent)}
+        if _relation_exists(cursor, ARCHIVE_TABLE):
+            existing.update(name for name, _, _ in list_partitions(cursor, ARCHIVE_TABLE))
+        for start, end in semesters(since, until):
+            if partition_name(start) in existing:
+                continue
+            with transaction.atomic(using=connection.alias):
+                created.append(create_partition(cursor, start, end, parent))
+    return created
+
+
+def _relation_exists(cursor, name: str) -> bool:
+    cursor.execute('SELECT to_regclass(%s) IS NOT NULL', [name])
+    return cursor.fetchone()[0]
@@ -0,0 +1,164 @@
+"""Reminder e-mails to students who have not completed a published survey.
+
+The recipients of a survey are one anti-join: active students with an e-mail
+address, minus those with a completed session and those already reminded in
+this round. They are mailed in batches over one reused connection, no faster
+than the configured rate. Each batch is claimed first with
+``INSERT ... ON CONFLICT`` on ``ReminderSend``, so overlapping or retried runs
+never mail a student twice; claims of messages that were not sent are released
+again. A claim still pending after ``REMINDER_CLAIM_TIMEOUT`` seconds was left
+by a run that died mid-batch and is taken over by the next run.
+"""
+
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection as db_connection
+from django.db.models import Exists, OuterRef
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from surveys.models import Survey
+
+from .models import ReminderSend, ResponseSession
+
+User = get_user_model()
+
+_CLAIM_SQL = f"""
+INSERT INTO {ReminderSend._meta.db_table} AS reminder (survey_id, user_id, round, status, created_at)
+SELECT %(survey)s, user_id, %(round)s, %(pending)s, now() FROM unnest(%(users)s::bigint[]) AS user_id
+ON CONFLICT ON CONSTRAINT responses_reminder_once DO UPDATE SET created_at = now()
+WHERE reminder.status = %(pending)s AND reminder.created_at < now() - make_interval(secs => %(timeout)s)
+RETURNING user_id
+"""
+
+
+@dataclass
+class ReminderStats:
+    survey_id: int
+    targeted: int = 0
+    sent: int = 0
+    # Claimed by another run in the meantime.
+    skipped: int = 0
+
+
+class RateLimiter:
+    """Spaces calls to :meth:`wait` at least ``1 / rate`` seconds apart; no limit if ``rate`` is 0."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self.next_at = time.monotonic()
+
+    def wait(self) -> None:
+        now = time.monotonic()
+        if self.next_at > now:
+            time.sleep(self.next_at - now)
+            now = self.next_at
+        self.next_at = now + self.interval
+
+
+def open_surveys():
+    # surveys.scheduler closes surveys at their end_date.
+    return Survey.objects.filter(status=Survey.Status.PUBLISHED)
+
+
+def stale_claims_before():
+    return timezone.now() - timedelta(seconds=settings.REMINDER_CLAIM_TIMEOUT)
+
+
+def reminder_targets(survey: Survey, round: int = 1):
+    """Students to remind about ``survey`` in ``round``, as one NOT EXISTS anti-join."""
+    completed = ResponseSession.objects.filter(
+        survey=survey,
+        user=OuterRef('pk'),
+        status=ResponseSession.Status.COMPLETED,
+    )
+    reminded = ReminderSend.objects.filter(survey=survey, round=round, user=OuterRef('pk')).exclude(
+        status=ReminderSend.Status.PENDING,
+        created_at__lt=stale_claims_before(),
+    )
+    return (
+        User.objects.filter(role=User.Role.STUDENT, is_active=True)
+        .exclude(email='')
+        .filter(~Exists(completed), ~Exists(reminded))
+        .order_by('pk')
+    )
+
+
+def build_message(survey: Survey, name: str, email: str, connection) -> EmailMessage:
+    context = {
+        'survey': survey,
+        'name': name,
+        'url': settings.SITE_URL.rstrip('/') + reverse('responses:take-survey', kwargs={'survey_id': survey.pk}),
+    }
+    subject = render_to_string('responses/emails/reminder_subject.txt', context).strip()
+    body = render_to_string('responses/emails/reminder.txt', context)
+    return EmailMessage(subject, body, to=[email], connection=connection)
+
+
+def _claim(survey: Survey, round: int, user_ids: list[int]) -> set[int]:
+    with db_connection.cursor() as cursor:
+        cursor.execute(
+            _CLAIM_SQL,
+            {
+                'survey': survey.pk,
+                'round': round,
+                'pending': ReminderSend.Status.PENDING,
+                'users': user_ids,
+                'timeout': settings.REMINDER_CLAIM_TIMEOUT,
+            },
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def send_reminders(
+    survey: Survey,
+    round: int = 1,
+    batch_size: int | None = None,
+    limiter: RateLimiter | None = None,
+    connection=None,
+    dry_run: bool = False,
+) -> ReminderStats:
+    """Remind every target of ``survey``; pass ``connection`` to share one mail connection across surveys."""
+    batch_size = batch_size or settings.REMINDER_BATCH_SIZE
+    limiter = limiter or RateLimiter(settings.REMINDER_RATE_PER_SECOND)
+    targets = list(reminder_targets(survey, round).values_list('pk', 'email', 'first_name', 'last_name', 'username'))
+    stats = ReminderStats(survey.pk, targeted=len(targets))
+    if dry_run or not targets:
+        return stats
+
+    # A shared connection stays open for the caller's next survey.
+    with nullcontext(connection) if connection is not None else get_connection() as mail:
+        for start in range(0, len(targets), batch_size):
+            batch = targets[start:start + batch_size]
+            claimed = _claim(survey, round, [row[0] for row in batch])
+            stats.skipped += len(batch) - len(claimed)
+            sent = []
+            try:
+                for user_id, email, first_name, last_name, username in batch:
+                    if user_id not in claimed:
+                        continue
+                    name = f'{first_name} {last_name}'.strip() or username
+                    limiter.wait()
+                    if mail.send_messages([build_message(survey, name, email, mail)]):
+                        sent.append(user_id)
+            finally:
+                ReminderSend.objects.filter(survey=survey, round=round, user_id__in=sent).update(
+                    status=ReminderSend.Status.SENT,
+                    sent_at=timezone.now(),
+                )
+                # Released so that the next run retries them.
+                ReminderSend.objects.filter(
+                    survey=survey,
+                    round=round,
+                    user_id__in=claimed.difference(sent),
+                    status=ReminderSend.Status.PENDING,
+                ).delete()
+                stats.sent += len(sent)
+    return stats
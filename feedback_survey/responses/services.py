@@ -0,0 +1,118 @@
+"""Taking a survey, shared by :class:`~responses.views.TakeSurveyView` and the JSON API.
+
+Answers are passed around as ``{question_id: [values]}``: the selected choice
+ids of a multiple-choice question, or a single value for any other type.
+"""
+
+from django.db import transaction
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+
+from surveys.models import Choice, Question, Survey
+
+from .models import Answer, ResponseSession
+
+
+def survey_closed_reason(survey: Survey, now=None) -> str | None:
+    """Why the survey can't be taken right now, or None if it can."""
+    now = now or timezone.now()
+    if survey.start_date and survey.start_date > now:
+        return 'Опитування ще не розпочалось.'
+    if survey.end_date and survey.end_date < now:
+        return 'Опитування вже завершено.'
+    return None
+
+
+async def ahas_completed(user, survey: Survey) -> bool:
+    return await ResponseSession.objects.filter(
+        user=user,
+        survey=survey,
+        status=ResponseSession.Status.COMPLETED,
+    ).aexists()
+
+
+async def aget_or_create_session(user, survey: Survey, started_at=None) -> ResponseSession:
+    """The student's in-progress session of the survey; a new one (started at ``started_at``) if there is none."""
+    session = await ResponseSession.objects.filter(
+        user=user,
+        survey=survey,
+        status=ResponseSession.Status.IN_PROGRESS,
+    ).order_by('-started_at').afirst()
+    if session is None:
+        session = await ResponseSession.objects.acreate(
+            user=user,
+            survey=survey,
+            status=ResponseSession.Status.IN_PROGRESS,
+            started_at=started_at or timezone.now(),
+        )
+    return session
+
+
+def answers_from_post(questions, data) -> dict[int, list[str]]:
+    """Answers of a ``take_survey.html`` form submission."""
+    answers = {}
+    for question in questions:
+        key = f'question_{question.pk}'
+        if question.question_type == Question.QuestionType.MULTIPLE:
+            answers[question.pk] = data.getlist(key)
+        else:
+            answers[question.pk] = [data[key]] if data.get(key) else []
+    return answers
+
+
+def validate_answers(questions, answers: dict[int, list[str]]) -> list[str]:
+    """Error messages for unanswered questions; every question is required."""
+    errors = []
+    for question in questions:
+        values = answers.get(question.pk) or []
+        if question.question_type == Question.QuestionType.TEXT:
+            missing = not values or not values[0].strip()
+        else:
+            missing = not values
+        if missing:
+            errors.append(f'Питання "{question.text[:50]}..." потребує відповіді.')
+    return errors
+
+
+def save_answers(session: ResponseSession, questions, answers: dict[int, list[str]]) -> None:
+    """Replace the session's answers and complete it; Http404 on a choice of another question."""
+    # Transactions are sync-only, so the whole write runs in one thread.
+    with transaction.atomic():
+        # Delete existing answers for this session (in case of resubmission)
+        Answer.objects.filter(
+            response_session=session,
+            created_at__gte=session.started_at,
+        ).delete()
+
+        for question in questions:
+            values = answers[question.pk]
+            if question.question_type == Question.QuestionType.MULTIPLE:
+                choice_ids = sorted(
+                    Choice.objects.filter(question=question, pk__in=values).values_list('pk', flat=True)
+                )
+                if len(choice_ids) != len(set(values)):
+                    raise Http404('No Choice matches the given query.')
+                Answer.objects.create(
+                    response_session=session,
+                    question=question,
+                    selected_choices=choice_ids,
+                )
+            elif question.question_type == Question.QuestionType.SINGLE:
+                choice = get_object_or_404(Choice, pk=values[0], question=question)
+                Answer.objects.create(
+                    response_session=session,
+                    question=question,
+                    selected_choice=choice,
+                )
+            else:
+                # Scale values are stored as text_answer as well.
+                Answer.objects.create(
+                    response_session=session,
+                    question=question,
+                    text_answer=values[0],
+                )
+
+        session.status = ResponseSession.Status.COMPLETED
+        session.completed_at = timezone.now()
+        session.save()
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from surveys.cache import bump_user_list_version
+
+from .models import ResponseSession
+
+
+@receiver([post_save, post_delete], sender=ResponseSession)
+def invalidate_student_list(sender, instance, **kwargs):
+    bump_user_list_version(instance.user_id)
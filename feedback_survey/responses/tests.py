@@ -1,3 +1,56 @@
-from django.test import TestCase
+import json
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from surveys.models import Choice, Question, Survey
+
+from .models import Answer, ResponseSession
+
+User = get_user_model()
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ResponseViewsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user('teacher', password='x', role=User.Role.TEACHER)
+        cls.student = User.objects.create_user('student', password='x', role=User.Role.STUDENT)
+        cls.survey = Survey.objects.create(title='Курс', author=cls.teacher, status=Survey.Status.PUBLISHED)
+        cls.single = Question.objects.create(survey=cls.survey, text='Оцінка', question_type=Question.QuestionType.SINGLE)
+        cls.choice = Choice.objects.create(question=cls.single, text='Добре')
+        cls.text = Question.objects.create(survey=cls.survey, text='Коментар', question_type=Question.QuestionType.TEXT)
+
+    def submit(self):
+        return self.client.post(
+            reverse('responses:api-submit', kwargs={'survey_id': self.survey.pk}),
+            json.dumps({'answers': {str(self.single.pk): self.choice.pk, str(self.text.pk): 'цікаві лабораторні'}}),
+            content_type='application/json',
+        )
+
+    def test_search(self):
+        self.client.force_login(self.student)
+        self.assertEqual(self.submit().status_code, 201)
+        self.client.force_login(self.teacher)
+        response = self.client.get(reverse('responses:search'))
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse('responses:search'), {'q': 'лабораторні'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([answer.question_id for answer in response.context['answers']], [self.text.pk])
+
+    def test_api_structure(self):
+        self.client.force_login(self.student)
+        url = reverse('responses:api-survey', kwargs={'survey_id': self.survey.pk})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([question['id'] for question in json.loads(response.content)['questions']], [self.single.pk, self.text.pk])
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': response['ETag']}).status_code, 304)
+
+    def test_api_submit(self):
+        self.client.force_login(self.student)
+        self.assertEqual(self.submit().status_code, 201)
+        session = ResponseSession.objects.get(user=self.student, survey=self.survey)
+        self.assertEqual(session.status, ResponseSession.Status.COMPLETED)
+        self.assertEqual(Answer.objects.filter(response_session=session).count(), 2)
+        self.assertEqual(self.submit().status_code, 409)
@@ -1,10 +1,15 @@
 from django.urls import path
 
-from .views import TakeSurveyView, ThankYouView
+from .api import SubmitAnswersView, SurveyStructureView
+from .views import ResponseHistoryView, ResponseSearchView, TakeSurveyView, ThankYouView
 
 app_name = 'responses'
 
 urlpatterns = [
     path('take/<int:survey_id>/', TakeSurveyView.as_view(), name='take-survey'),
     path('thank-you/<int:survey_id>/', ThankYouView.as_view(), name='thank-you'),
+    path('history/', ResponseHistoryView.as_view(), name='history'),
+    path('search/', ResponseSearchView.as_view(), name='search'),
+    path('api/surveys/<int:survey_id>/', SurveyStructureView.as_view(), name='api-survey'),
+    path('api/surveys/<int:survey_id>/answers/', SubmitAnswersView.as_view(), name='api-submit'),
 ]
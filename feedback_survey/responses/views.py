@@ -1,80 +1,98 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
 from django.contrib import messages
-from django.db import transaction
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect
-from django.utils import timezone
-from django.views.generic import TemplateView
+from django.views.generic import ListView, TemplateView
 
-from accounts.mixins import StudentRequiredMixin
-from surveys.models import Choice, Question, Survey
+from accounts.mixins import (
+    AsyncStudentRequiredMixin,
+    StudentRequiredMixin,
+    TeacherOrAdminRequiredMixin,
+)
+from surveys.cache import ais_fragment_cached, asurvey_form_version
+from surveys.models import Question, Survey
+from surveys.search import search_queryset
 
 from .models import Answer, ResponseSession
+from .services import (
+    aget_or_create_session,
+    ahas_completed,
+    answers_from_post,
+    save_answers,
+    survey_closed_reason,
+    validate_answers,
+)
+
+User = get_user_model()
+
+HISTORY_CURSOR_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
 
 
-class TakeSurveyView(StudentRequiredMixin, TemplateView):
+class TakeSurveyView(AsyncStudentRequiredMixin, TemplateView):
     template_name = 'responses/take_survey.html'
 
-    def dispatch(self, request, *args, **kwargs):
-        self.survey = get_object_or_404(
-            Survey,
-            pk=self.kwargs['survey_id'],
-            status=Survey.Status.PUBLISHED,
-        )
+    async def prepare(self, request):
+        """Load the survey and the student's session; return a redirect if it can't be taken."""
+        try:
+            self.survey = await Survey.objects.aget(
+                pk=self.kwargs['survey_id'],
+                status=Survey.Status.PUBLISHED,
+            )
+        except Survey.DoesNotExist:
+            raise Http404('No Survey matches the given query.')
         
-        # Check if survey is within date range
-        now = timezone.now()
-        if self.survey.start_date and self.survey.start_date > now:
-            messages.error(request, 'Опитування ще не розпочалось.')
-            return redirect('surveys:student-survey-list')
-        if self.survey.end_date and self.survey.end_date < now:
-            messages.error(request, 'Опитування вже завершено.')
+        closed_reason = survey_closed_reason(self.survey)
+        if closed_reason:
+            messages.error(request, closed_reason)
             return redirect('surveys:student-survey-list')
         
         # Check if survey has questions
-        if not self.survey.questions.exists():
+        if not await self.survey.questions.aexists():
             messages.error(request, 'Це опитування поки не містить питань.')
             return redirect('surveys:student-survey-list')
         
         # Check if already completed
-        completed_session = ResponseSession.objects.filter(
-            user=request.user,
-            survey=self.survey,
-            status=ResponseSession.Status.COMPLETED,
-        ).first()
-        
-        if completed_session:
+        if await ahas_completed(request.user, self.survey):
             messages.info(request, 'Ви вже пройшли це опитування.')
             return redirect('responses:thank-you', survey_id=self.survey.pk)
         
         # Get or create in-progress session (reuse existing if any)
-        self.session = ResponseSession.objects.filter(
-            user=request.user,
-            survey=self.survey,
-            status=ResponseSession.Status.IN_PROGRESS,
-        ).order_by('-started_at').first()
-        
-        if not self.session:
-            self.session = ResponseSession.objects.create(
-                user=request.user,
-                survey=self.survey,
-                status=ResponseSession.Status.IN_PROGRESS,
-                started_at=timezone.now(),
-            )
-        
-        return super().dispatch(request, *args, **kwargs)
+        self.session = await aget_or_create_session(request.user, self.survey)
+        return None
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
+    async def get(self, request, *args, **kwargs):
+        response = await self.prepare(request)
+        if response is not None:
+            return response
+        return await self.render_form(**kwargs)
+
+    async def render_form(self, **kwargs):
+        context = self.get_context_data(**kwargs)
         context['survey'] = self.survey
-        context['questions'] = self.survey.questions.all().prefetch_related('choices')
         context['session'] = self.session
-        
+        context['form_version'] = await asurvey_form_version(self.survey.pk)
+        questions = self.survey.questions.all().prefetch_related('choices')
+        if not await ais_fragment_cached('survey_form', self.survey.pk, context['form_version']):
+            questions = [question async for question in questions]
+        context['questions'] = questions
+        context['existing_answers'] = await self.get_existing_answers()
+        return self.render_to_response(context)
+
+    async def get_existing_answers(self):
         # Pre-fill existing answers if any (use string keys for template access)
         existing_answers = {}
-        for answer in self.session.answers.select_related('selected_choice').all():
+        # The created_at bound lets Postgres skip older semester partitions.
+        answers = self.session.answers.filter(created_at__gte=self.session.started_at).select_related('question')
+        async for answer in answers:
             q_id = str(answer.question_id)
             if answer.question.question_type == Question.QuestionType.MULTIPLE:
                 if q_id not in existing_answers:
                     existing_answers[q_id] = []
+                existing_answers[q_id].extend(str(choice_id) for choice_id in answer.selected_choices)
                 if answer.selected_choice_id:
                     existing_answers[q_id].append(str(answer.selected_choice_id))
             else:
@@ -82,87 +100,26 @@ class TakeSurveyView(StudentRequiredMixin, TemplateView):
                     existing_answers[q_id] = str(answer.selected_choice_id)
                 elif answer.text_answer:
                     existing_answers[q_id] = answer.text_answer
-        context['existing_answers'] = existing_answers
-        
-        return context
+        return existing_answers
 
-    def post(self, request, *args, **kwargs):
-        questions = self.survey.questions.all()
-        errors = []
-        
-        # Validate all questions are answered
-        for question in questions:
-            if question.question_type == Question.QuestionType.MULTIPLE:
-                selected = request.POST.getlist(f'question_{question.pk}')
-                if not selected:
-                    errors.append(f'Питання "{question.text[:50]}..." потребує відповіді.')
-            elif question.question_type == Question.QuestionType.SINGLE:
-                selected = request.POST.get(f'question_{question.pk}')
-                if not selected:
-                    errors.append(f'Питання "{question.text[:50]}..." потребує відповіді.')
-            elif question.question_type == Question.QuestionType.SCALE:
-                value = request.POST.get(f'question_{question.pk}')
-                if not value:
-                    errors.append(f'Питання "{question.text[:50]}..." потребує відповіді.')
-            elif question.question_type == Question.QuestionType.TEXT:
-                value = request.POST.get(f'question_{question.pk}')
-                if not value or not value.strip():
-                    errors.append(f'Питання "{question.text[:50]}..." потребує відповіді.')
+    async def post(self, request, *args, **kwargs):
+        response = await self.prepare(request)
+        if response is not None:
+            return response
+        questions = [question async for question in self.survey.questions.all()]
+        answers = answers_from_post(questions, request.POST)
+        errors = validate_answers(questions, answers)
         
         if errors:
             for error in errors:
                 messages.error(request, error)
-            return self.get(request, *args, **kwargs)
+            return await self.render_form(**kwargs)
         
-        # Save answers in transaction
         try:
-            with transaction.atomic():
-                # Delete existing answers for this session (in case of resubmission)
-                Answer.objects.filter(response_session=self.session).delete()
-                
-                # Create new answers
-                for question in questions:
-                    if question.question_type == Question.QuestionType.MULTIPLE:
-                        selected_choice_ids = request.POST.getlist(f'question_{question.pk}')
-                        for choice_id in selected_choice_ids:
-                            choice = get_object_or_404(Choice, pk=choice_id, question=question)
-                            Answer.objects.create(
-                                response_session=self.session,
-                                question=question,
-                                selected_choice=choice,
-                            )
-                    elif question.question_type == Question.QuestionType.SINGLE:
-                        choice_id = request.POST.get(f'question_{question.pk}')
-                        choice = get_object_or_404(Choice, pk=choice_id, question=question)
-                        Answer.objects.create(
-                            response_session=self.session,
-                            question=question,
-                            selected_choice=choice,
-                        )
-                    elif question.question_type == Question.QuestionType.SCALE:
-                        value = request.POST.get(f'question_{question.pk}')
-                        # For scale, we'll store the value as text_answer
-                        Answer.objects.create(
-                            response_session=self.session,
-                            question=question,
-                            text_answer=value,
-                        )
-                    elif question.question_type == Question.QuestionType.TEXT:
-                        text_value = request.POST.get(f'question_{question.pk}')
-                        Answer.objects.create(
-                            response_session=self.session,
-                            question=question,
-                            text_answer=text_value,
-                        )
-                
-                # Mark session as completed
-                self.session.status = ResponseSession.Status.COMPLETED
-                self.session.completed_at = timezone.now()
-                self.session.save()
-                
+            await sync_to_async(save_answers)(self.session, questions, answers)
         except Exception as e:
             messages.error(request, f'Помилка збереження відповідей: {str(e)}')
-            return self.get(request, *args, **kwargs)
+            return await self.render_form(**kwargs)
         
         messages.success(request, 'Дякуємо за проходження опитування!')
         return redirect('responses:thank-you', survey_id=self.survey.pk)
@@ -175,3 +132,77 @@ class ThankYouView(StudentRequiredMixin, TemplateView):
         context = super().get_context_data(**kwargs)
         context['survey'] = get_object_or_404(Survey, pk=self.kwargs['survey_id'])
         return context
+
+
+class ResponseHistoryView(AsyncStudentRequiredMixin, TemplateView):
+    """The student's in-progress and completed sessions, newest completion first.
+
+    Completed sessions are paged with a ``(completed_at, id)`` keyset cursor so
+    every page is a short range scan of the ``responses_session_history`` index.
+    """
+
+    template_name = 'responses/history.html'
+    page_size = 20
+
+    async def get(self, request, *args, **kwargs):
+        context = self.get_context_data(**kwargs)
+        cursor = self.parse_cursor(request.GET.get('after', ''))
+        sessions = ResponseSession.objects.filter(user=request.user).select_related('survey')
+        if cursor is None:
+            in_progress = sessions.filter(status=ResponseSession.Status.IN_PROGRESS).order_by('-started_at')
+            context['in_progress'] = [session async for session in in_progress]
+        completed = sessions.filter(status=ResponseSession.Status.COMPLETED)
+        if cursor is not None:
+            completed_at, session_id = cursor
+            completed = completed.filter(
+                Q(completed_at__lt=completed_at) | Q(completed_at=completed_at, pk__lt=session_id),
+                completed_at__lte=completed_at,
+            )
+        completed = completed.order_by('-completed_at', '-pk')[:self.page_size + 1]
+        page = [session async for session in completed]
+        if len(page) > self.page_size:
+            page = page[:self.page_size]
+            context['next_cursor'] = self.format_cursor(page[-1])
+        context['completed'] = page
+        context['is_first_page'] = cursor is None
+        return self.render_to_response(context)
+
+    @staticmethod
+    def format_cursor(session) -> str:
+        micros = (session.completed_at - HISTORY_CURSOR_EPOCH) // timedelta(microseconds=1)
+        return f'{micros}_{session.pk}'
+
+    @staticmethod
+    def parse_cursor(value: str):
+        try:
+            micros, session_id = (int(part) for part in value.split('_'))
+            completed_at = HISTORY_CURSOR_EPOCH + timedelta(microseconds=micros)
+        except (ValueError, OverflowError):
+            return None
+        return completed_at, session_id
+
+
+class ResponseSearchView(TeacherOrAdminRequiredMixin, ListView):
+    template_name = 'responses/search.html'
+    context_object_name = 'answers'
+    paginate_by = 20
+
+    def get_search_text(self) -> str:
+        return self.request.GET.get('q', '').strip()[:200]
+
+    def get_queryset(self):
+        search_text = self.get_search_text()
+        if not search_text:
+            return Answer.objects.none()
+        queryset = Answer.objects.select_related(
+            'question__survey',
+            'response_session__user',
+        )
+        if self.request.user.role != User.Role.ADMIN:
+            queryset = queryset.filter(question__survey__author=self.request.user)
+        return search_queryset(queryset, search_text)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.get_search_text()
+        return context
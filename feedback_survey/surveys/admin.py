@@ -1,6 +1,7 @@
 from django.contrib import admin
 
 from .models import Choice, Question, Survey
+from .search import FullTextSearchAdminMixin
 
 
 class ChoiceInline(admin.TabularInline):
@@ -14,7 +15,7 @@ class QuestionInline(admin.TabularInline):
 
 
 @admin.register(Survey)
-class SurveyAdmin(admin.ModelAdmin):
+class SurveyAdmin(FullTextSearchAdminMixin, admin.ModelAdmin):
     list_display = ('title', 'author', 'status', 'start_date', 'end_date', 'target')
     list_filter = ('status', 'start_date', 'end_date')
     search_fields = ('title', 'description', 'target')
@@ -25,6 +26,7 @@ class SurveyAdmin(admin.ModelAdmin):
 class QuestionAdmin(admin.ModelAdmin):
     list_display = ('text', 'survey', 'question_type', 'order')
     list_filter = ('question_type', 'survey')
+    search_fields = ('text',)
     ordering = ('survey', 'order')
     inlines = [ChoiceInline]
 
@@ -32,4 +34,5 @@ class QuestionAdmin(admin.ModelAdmin):
 @admin.register(Choice)
 class ChoiceAdmin(admin.ModelAdmin):
     list_display = ('text', 'question', 'order')
+    search_fields = ('text',)
     ordering = ('question', 'order')
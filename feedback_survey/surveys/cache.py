@@ -0,0 +1,65 @@
+import time
+
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+SURVEY_VERSION_KEY = 'survey-version:{}'
+SURVEY_LIST_VERSION_KEY = 'survey-list-version'
+USER_LIST_VERSION_KEY = 'user-list-version:{}'
+
+
+def _new_version() -> int:
+    # Timestamps rather than counters: a version evicted from the cache can
+    # never come back as an older value and revive stale fragments.
+    return time.time_ns()
+
+
+def _get_version(key: str) -> int:
+    return cache.get_or_set(key, _new_version, timeout=None)
+
+
+def survey_form_version(survey_id: int) -> int:
+    return _get_version(SURVEY_VERSION_KEY.format(survey_id))
+
+
+def student_list_versions(user_id: int) -> tuple[int, int]:
+    return (
+        _get_version(SURVEY_LIST_VERSION_KEY),
+        _get_version(USER_LIST_VERSION_KEY.format(user_id)),
+    )
+
+
+async def _aget_version(key: str) -> int:
+    return await cache.aget_or_set(key, _new_version, timeout=None)
+
+
+async def asurvey_form_version(survey_id: int) -> int:
+    return await _aget_version(SURVEY_VERSION_KEY.format(survey_id))
+
+
+async def astudent_list_versions(user_id: int) -> tuple[int, int]:
+    return (
+        await _aget_version(SURVEY_LIST_VERSION_KEY),
+        await _aget_version(USER_LIST_VERSION_KEY.format(user_id)),
+    )
+
+
+async def ais_fragment_cached(fragment_name: str, *vary_on) -> bool:
+    # Lets async views skip their queries when the template will be served
+    # from the {% cache %} fragment anyway.
+    key = make_template_fragment_key(fragment_name, vary_on)
+    return await cache.aget(key) is not None
+
+
+def bump_survey_version(survey_id: int) -> None:
+    cache.set_many(
+        {
+            SURVEY_VERSION_KEY.format(survey_id): _new_version(),
+            SURVEY_LIST_VERSION_KEY: _new_version(),
+        },
+        timeout=None,
+    )
+
+
+def bump_user_list_version(user_id: int) -> None:
+    cache.set(USER_LIST_VERSION_KEY.format(user_id), _new_version(), timeout=None)
@@ -5,6 +5,7 @@ from .models import Choice, Question, Survey
 
 
 class SurveyFilterForm(forms.Form):
+    q = forms.CharField(required=False, label='Пошук', max_length=200)
     status = forms.ChoiceField(
         choices=[('', 'Усі статуси'), *Survey.Status.choices],
         required=False,
@@ -44,10 +45,15 @@ class SurveyForm(forms.ModelForm):
         input_formats=[datetime_format],
         label='Дата завершення',
     )
+    auto_publish = forms.BooleanField(
+        required=False,
+        label='Опублікувати автоматично',
+        help_text='Чернетку буде опубліковано в дату початку; опитування закривається в дату завершення.',
+    )
 
     class Meta:
         model = Survey
-        fields = ['title', 'description', 'target', 'discipline', 'start_date', 'end_date']
+        fields = ['title', 'description', 'target', 'discipline', 'start_date', 'end_date', 'auto_publish']
         widgets = {
             'description': forms.Textarea(attrs={'rows': 3}),
         }
@@ -58,6 +64,8 @@ class SurveyForm(forms.ModelForm):
         end = cleaned_data.get('end_date')
         if start and end and start > end:
             self.add_error('end_date', 'Дата завершення має бути після дати початку.')
+        if cleaned_data.get('auto_publish') and not start:
+            self.add_error('start_date', 'Вкажіть дату початку для автоматичної публікації.')
         return cleaned_data
 
 
@@ -0,0 +1,171 @@
+"""Load-test a running deployment with many concurrent keep-alive connections.
+
+Run the same benchmark against both deployments and compare the output, e.g.:
+
+    gunicorn feedback_survey.wsgi -w 4 -b 127.0.0.1:8001
+    uvicorn feedback_survey.asgi:application --workers 1 --port 8002
+
+    manage.py benchmark_concurrency http://127.0.0.1:8001/surveys/student/ \\
+        --as-user student1 --concurrency 200 --pid <gunicorn master pid>
+    manage.py benchmark_concurrency http://127.0.0.1:8002/surveys/student/ \\
+        --as-user student1 --concurrency 200 --pid <uvicorn pid>
+"""
+
+import asyncio
+import statistics
+import time
+from importlib import import_module
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+
+def read_rss_kb(pid: int) -> int:
+    """Resident memory of ``pid`` and all of its descendants (Linux /proc)."""
+    children = {}
+    for stat_path in Path('/proc').glob('[0-9]*/stat'):
+        try:
+            fields = stat_path.read_text().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        children.setdefault(int(fields[1]), []).append(int(stat_path.parent.name))
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        pending.extend(children.get(current, ()))
+        try:
+            for line in Path(f'/proc/{current}/status').read_text().splitlines():
+                if line.startswith('VmRSS:'):
+                    total += int(line.split()[1])
+        except OSError:
+            continue
+    return total
+
+
+async def read_response(reader) -> tuple[int, bool]:
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('connection closed')
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    else:
+        await reader.readexactly(int(headers.get('content-length', 0)))
+    return status, headers.get('connection', '').lower() != 'close'
+
+
+class Command(BaseCommand):
+    help = 'Measure throughput, latency and server memory per connection for a URL under concurrency.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('url')
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--duration', type=float, default=15.0, help='Seconds to run.')
+        parser.add_argument('--as-user', help='Username to authenticate as (a session is created for it).')
+        parser.add_argument('--pid', type=int, help='Server PID; RSS of it and its children is sampled.')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http':
+            raise CommandError('Only plain http:// URLs are supported.')
+        cookie = self.create_session_cookie(options['as_user']) if options['as_user'] else ''
+        pid = options['pid']
+        rss_before = read_rss_kb(pid) if pid else None
+        latencies, errors, peak_rss = asyncio.run(
+            self.run(url, cookie, options['concurrency'], options['duration'], pid),
+        )
+        self.report(latencies, errors, options, rss_before, peak_rss)
+
+    def create_session_cookie(self, username: str) -> str:
+        user = get_user_model().objects.filter(username=username).first()
+        if user is None:
+            raise CommandError(f'User "{username}" does not exist.')
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.save()
+        return f'{settings.SESSION_COOKIE_NAME}={session.session_key}'
+
+    async def run(self, url, cookie, concurrency, duration, pid):
+        path = url.path or '/'
+        if url.query:
+            path += f'?{url.query}'
+        request = (
+            f'GET {path} HTTP/1.1\r\nHost: {url.netloc}\r\n'
+            + (f'Cookie: {cookie}\r\n' if cookie else '')
+            + 'Connection: keep-alive\r\n\r\n'
+        ).encode()
+        deadline = time.perf_counter() + duration
+        latencies = []
+        errors = []
+        peak_rss = 0
+
+        async def worker():
+            reader = writer = None
+            while time.perf_counter() < deadline:
+                try:
+                    if writer is None:
+                        reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+                    started = time.perf_counter()
+                    writer.write(request)
+                    status, keep_alive = await read_response(reader)
+                    latencies.append(time.perf_counter() - started)
+                    if status >= 400:
+                        errors.append(status)
+                    if not keep_alive:
+                        # Sync WSGI workers close after every response.
+                        writer.close()
+                        reader = writer = None
+                except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError) as exc:
+                    errors.append(type(exc).__name__)
+                    if writer is not None:
+                        writer.close()
+                    reader = writer = None
+            if writer is not None:
+                writer.close()
+
+        async def sample_memory():
+            nonlocal peak_rss
+            while time.perf_counter() < deadline:
+                peak_rss = max(peak_rss, read_rss_kb(pid))
+                await asyncio.sleep(0.5)
+
+        tasks = [worker() for _ in range(concurrency)]
+        if pid:
+            tasks.append(sample_memory())
+        await asyncio.gather(*tasks)
+        return latencies, errors, peak_rss
+
+    def report(self, latencies, errors, options, rss_before, peak_rss):
+        duration = options['duration']
+        self.stdout.write(f"URL:          {options['url']}")
+        self.stdout.write(f"Concurrency:  {options['concurrency']}")
+        self.stdout.write(f'Requests:     {len(latencies)} ({len(errors)} errors)')
+        self.stdout.write(f'Throughput:   {len(latencies) / duration:.1f} req/s')
+        if len(latencies) >= 2:
+            cuts = statistics.quantiles(latencies, n=100)
+            self.stdout.write(
+                f'Latency ms:   p50={cuts[49] * 1000:.1f} p95={cuts[94] * 1000:.1f} p99={cuts[98] * 1000:.1f}'
+            )
+        if rss_before is not None:
+            per_connection = (peak_rss - rss_before) / options['concurrency']
+            self.stdout.write(f'Server RSS:   {rss_before / 1024:.1f} MiB idle, {peak_rss / 1024:.1f} MiB peak')
+            self.stdout.write(f'Memory/conn:  {per_connection:.1f} KiB')
+        if errors:
+            self.stdout.write(self.style.WARNING(f'First errors: {errors[:5]}'))
@@ -0,0 +1,27 @@
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+
+from feedback_survey.cache_backends import get_cache_stats, reset_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Show cache hit/miss counters per key namespace (fragments are listed as fragment:<name>).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alias', default='default', help='Cache alias to inspect.')
+        parser.add_argument('--reset', action='store_true', help='Clear the counters after printing them.')
+
+    def handle(self, *args, **options):
+        cache = caches[options['alias']]
+        stats = get_cache_stats(cache)
+        if not stats:
+            self.stdout.write('No cache statistics recorded yet.')
+        for bucket, counts in sorted(stats.items()):
+            total = counts['hits'] + counts['misses']
+            ratio = counts['hits'] / total if total else 0
+            self.stdout.write(
+                f"{bucket:<40} hits={counts['hits']:<8} misses={counts['misses']:<8} hit ratio={ratio:.1%}"
+            )
+        if options['reset']:
+            reset_cache_stats(cache)
+            self.stdout.write(self.style.SUCCESS('Counters reset.'))
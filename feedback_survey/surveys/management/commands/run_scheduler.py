@@ -0,0 +1,51 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from surveys.scheduler import advance_due, next_transition_at
+
+
+class Command(BaseCommand):
+    help = (
+        'Publish scheduled drafts at their start date and close published surveys at their end date, '
+        'finalizing the results of closed surveys. Runs until interrupted, or once with --once.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Apply the due transitions and exit (for cron).')
+        parser.add_argument(
+            '--poll',
+            type=float,
+            default=settings.SCHEDULER_POLL_SECONDS,
+            help='Longest sleep in seconds; picks up surveys scheduled while sleeping.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                close_old_connections()
+                for transition in advance_due():
+                    self.report(transition)
+                if options['once']:
+                    return
+                due = next_transition_at()
+                sleep = options['poll']
+                if due is not None:
+                    sleep = min(sleep, max((due - timezone.now()).total_seconds(), 0))
+                time.sleep(sleep)
+        except KeyboardInterrupt:
+            pass
+
+    def report(self, transition):
+        line = f'survey {transition.survey_id}: {transition.from_status} → {transition.to_status}'
+        if transition.abandoned:
+            line += f', {transition.abandoned} in-progress session(s) abandoned'
+        if transition.finalize_seconds:
+            line += f', finalized in {transition.finalize_seconds:.2f}s'
+        if transition.error:
+            self.stderr.write(f'{line}; finalizing failed: {transition.error}')
+        else:
+            self.stdout.write(line)
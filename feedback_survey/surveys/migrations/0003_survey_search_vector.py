@@ -0,0 +1,50 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+SEARCH_CONFIG = getattr(settings, 'SEARCH_CONFIG', 'simple')
+
+CREATE_TRIGGER_SQL = f"""
+CREATE OR REPLACE FUNCTION surveys_survey_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.discipline, '') || ' ' || coalesce(NEW.target, '')), 'B') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.description, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER surveys_survey_search_vector_trigger
+BEFORE INSERT OR UPDATE OF title, description, target, discipline, search_vector
+ON surveys_survey
+FOR EACH ROW EXECUTE FUNCTION surveys_survey_search_vector_update();
+
+UPDATE surveys_survey SET title = title;
+"""
+
+DROP_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS surveys_survey_search_vector_trigger ON surveys_survey;
+DROP FUNCTION IF EXISTS surveys_survey_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0002_survey_discipline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='survey',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER_SQL, DROP_TRIGGER_SQL),
+        migrations.AddIndex(
+            model_name='survey',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='surveys_survey_search_gin'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+# A published survey is now always open: ones that have not started yet go
+# back to drafts that publish at their start date, and the rest close at their
+# end date. Other drafts have auto_publish off.
+SCHEDULE_PUBLISHED_SQL = """
+UPDATE surveys_survey SET status = 'draft', auto_publish = true, next_transition_at = start_date
+WHERE status = 'published' AND start_date > now();
+UPDATE surveys_survey SET next_transition_at = end_date
+WHERE status = 'published' AND end_date IS NOT NULL;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0003_survey_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='survey',
+            name='auto_publish',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='survey',
+            name='next_transition_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunSQL(SCHEDULE_PUBLISHED_SQL, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='survey',
+            index=models.Index(condition=models.Q(('next_transition_at__isnull', False)), fields=['next_transition_at'], name='surveys_survey_transition'),
+        ),
+    ]
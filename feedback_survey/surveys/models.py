@@ -1,4 +1,6 @@
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 
@@ -29,12 +31,43 @@ class Survey(models.Model):
         help_text='Назва дисципліни або курсу',
     )
 
+    # Publish the draft at start_date; see surveys.scheduler.
+    auto_publish = models.BooleanField(default=False)
+    # When surveys.scheduler moves the survey to its next status; kept by save().
+    next_transition_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    # Maintained by a database trigger, see migration 0003.
+    search_vector = SearchVectorField(null=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='surveys_survey_search_gin'),
+            models.Index(
+                fields=['next_transition_at'],
+                condition=models.Q(next_transition_at__isnull=False),
+                name='surveys_survey_transition',
+            ),
+        ]
+
     def __str__(self) -> str:
         return f'{self.title} ({self.get_status_display()})'
 
+    def get_next_transition_at(self):
+        if self.status == self.Status.DRAFT and self.auto_publish:
+            return self.start_date
+        if self.status == self.Status.PUBLISHED:
+            return self.end_date
+        return None
+
+    def save(self, *args, update_fields=None, **kwargs):
+        self.next_transition_at = self.get_next_transition_at()
+        if update_fields is not None:
+            update_fields = {*update_fields, 'next_transition_at'}
+        super().save(*args, update_fields=update_fields, **kwargs)
+
 
 class Question(models.Model):
     class QuestionType(models.TextChoices):
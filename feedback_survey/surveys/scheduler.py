@@ -0,0 +1,96 @@
+"""Moves surveys through DRAFT → PUBLISHED → CLOSED at their start and end dates.
+
+``Survey.next_transition_at`` holds the time of a survey's next scheduled
+transition (kept by ``Survey.save``) under a partial index, so finding the
+due surveys and the time to sleep until are index lookups. A published
+survey is therefore always open, and read paths only check ``status``.
+
+Closing a survey abandons its in-progress sessions, then finalizes the
+results: the survey's aggregate is recomputed and frozen, and its report is
+rendered so that the first download is served from disk.
+"""
+
+import time
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.utils import timezone
+
+from analytics.aggregates import response_watermark
+from analytics.recompute import compute_aggregate
+from analytics.reports import render_report
+from responses.models import ResponseSession
+
+from .models import Survey
+
+
+@dataclass
+class Transition:
+    survey_id: int
+    from_status: str
+    to_status: str
+    abandoned: int = 0
+    finalize_seconds: float = 0.0
+    error: str = ''
+
+
+def next_transition_at():
+    return (
+        Survey.objects.filter(next_transition_at__isnull=False)
+        .order_by('next_transition_at')
+        .values_list('next_transition_at', flat=True)
+        .first()
+    )
+
+
+def _advance(survey: Survey) -> Transition:
+    transition = Transition(survey.pk, survey.status, survey.status)
+    if survey.status == Survey.Status.DRAFT:
+        if survey.questions.exists():
+            survey.status = Survey.Status.PUBLISHED
+        else:
+            # Nothing to publish; the author has to schedule it again.
+            survey.auto_publish = False
+    elif survey.status == Survey.Status.PUBLISHED:
+        transition.abandoned = survey.response_sessions.filter(
+            status=ResponseSession.Status.IN_PROGRESS,
+        ).update(status=ResponseSession.Status.ABANDONED)
+        survey.status = Survey.Status.CLOSED
+    transition.to_status = survey.status
+    # Also clears a stale next_transition_at.
+    survey.save(update_fields=['status', 'auto_publish'])
+    return transition
+
+
+def finalize(survey: Survey) -> None:
+    """Freeze the closed survey's aggregate and render its report."""
+    aggregate = compute_aggregate(survey, response_watermark(survey))
+    aggregate.is_final = True
+    aggregate.save()
+    render_report(survey.pk)
+
+
+def advance_due(now=None) -> list[Transition]:
+    """Apply every transition due at ``now``; safe to run from several processes."""
+    now = now or timezone.now()
+    transitions = []
+    while True:
+        with transaction.atomic():
+            survey = (
+                Survey.objects.select_for_update(skip_locked=True)
+                .filter(next_transition_at__lte=now)
+                .order_by('next_transition_at')
+                .first()
+            )
+            if survey is None:
+                return transitions
+            transition = _advance(survey)
+        transitions.append(transition)
+        if transition.to_status == Survey.Status.CLOSED and transition.from_status != Survey.Status.CLOSED:
+            started = time.perf_counter()
+            try:
+                finalize(survey)
+            except Exception as exc:
+                # The survey stays closed; recompute_analytics and render_reports catch up.
+                transition.error = f'{type(exc).__name__}: {exc}'
+            transition.finalize_seconds = time.perf_counter() - started
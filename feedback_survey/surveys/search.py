@@ -0,0 +1,83 @@
+from django.conf import settings
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, Q
+
+# Lookups of the admin's '=' and '^' search fields, matched beside the tsvector.
+LOOKUPS = {'=': 'iexact', '^': 'istartswith'}
+# Related rows matched by such a field that are passed on as a list of ids;
+# broader matches become a subquery.
+LOOKUP_ID_LIMIT = 1000
+
+
+def get_search_config() -> str:
+    return getattr(settings, 'SEARCH_CONFIG', 'simple')
+
+
+def search_matches(queryset, text: str, vector_field: str = 'search_vector', also=None):
+    """Rows matching ``text``, annotated with ``search_rank``; ``also`` is a Q of further rows to include."""
+    query = SearchQuery(text, config=get_search_config(), search_type='websearch')
+    return queryset.filter(Q(**{vector_field: query}) | (also or Q())).annotate(
+        search_rank=SearchRank(F(vector_field), query),
+    )
+
+
+def search_queryset(queryset, text: str, vector_field: str = 'search_vector'):
+    """Rows matching ``text``, best first."""
+    return search_matches(queryset, text, vector_field).order_by('-search_rank', '-pk')
+
+
+class SearchRankChangeList(ChangeList):
+    """Order search results by rank unless a column ordering was picked."""
+
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        if self.query.strip() and ORDER_VAR not in self.params:
+            queryset = queryset.order_by('-search_rank', '-pk')
+        return queryset
+
+
+class FullTextSearchAdminMixin:
+    """Replace the admin's ILIKE scans with a ranked match on the GIN-indexed tsvector.
+
+    Plain ``search_fields`` are expected to be in the tsvector. Fields prefixed
+    with '=' or '^' are matched case-insensitively, exactly or by prefix, on the
+    related table; no index covers these UPPER() comparisons, so keep them to
+    small tables such as users and questions. Up to ``LOOKUP_ID_LIMIT`` matched
+    ids are passed to the foreign key as a list, which lets the searched table
+    combine its foreign key index with the tsvector's; more become a subquery,
+    which makes the search scan the table.
+    """
+
+    search_vector_field = 'search_vector'
+
+    def get_changelist(self, request, **kwargs):
+        return SearchRankChangeList
+
+    def lookup_matches(self, request, search_term):
+        matches = Q()
+        for field in self.get_search_fields(request):
+            lookup = LOOKUPS.get(field[0])
+            if lookup is None:
+                continue
+            relation, _, path = field[1:].partition('__')
+            if not path:
+                matches |= Q(**{f'{relation}__{lookup}': search_term})
+                continue
+            related = self.model._meta.get_field(relation).related_model
+            matched = related._default_manager.filter(**{f'{path}__{lookup}': search_term}).values('pk')
+            ids = [row['pk'] for row in matched[:LOOKUP_ID_LIMIT + 1]]
+            if len(ids) > LOOKUP_ID_LIMIT:
+                matches |= Q(**{f'{relation}__in': matched})
+            elif ids:
+                matches |= Q(**{f'{relation}__in': ids})
+        return matches
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        results = search_matches(
+            queryset, search_term, self.search_vector_field, self.lookup_matches(request, search_term),
+        )
+        return results, False
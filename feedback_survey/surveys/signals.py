@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bump_survey_version
+from .models import Choice, Question, Survey
+
+
+@receiver([post_save, post_delete], sender=Survey)
+def invalidate_survey(sender, instance, **kwargs):
+    bump_survey_version(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Question)
+def invalidate_question(sender, instance, **kwargs):
+    bump_survey_version(instance.survey_id)
+
+
+@receiver([post_save, post_delete], sender=Choice)
+def invalidate_choice(sender, instance, **kwargs):
+    try:
+        survey_id = instance.question.survey_id
+    except Question.DoesNotExist:
+        # Deleted in a cascade; the question's own signal covers it.
+        return
+    bump_survey_version(survey_id)
@@ -1,34 +1,41 @@
 from django.contrib import messages
-from django.db.models import Q
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse_lazy
 from django.utils import timezone
 from django.views.generic import CreateView, ListView, TemplateView, UpdateView
 
 from accounts.mixins import (
-    StudentRequiredMixin,
+    AsyncStudentRequiredMixin,
     TeacherOrAdminRequiredMixin,
 )
 
+from .cache import ais_fragment_cached, astudent_list_versions
 from .forms import ChoiceFormSet, QuestionFormSet, SurveyFilterForm, SurveyForm
 from .models import Survey
+from .search import search_queryset
 
 
-class StudentSurveyListView(StudentRequiredMixin, TemplateView):
+class StudentSurveyListView(AsyncStudentRequiredMixin, TemplateView):
     template_name = 'surveys/student_survey_list.html'
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        now = timezone.now()
+    async def get(self, request, *args, **kwargs):
+        context = self.get_context_data(**kwargs)
+        list_version, user_list_version = await astudent_list_versions(request.user.pk)
+        surveys = self.get_available_surveys()
+        if not await ais_fragment_cached(
+            'student_survey_list', request.user.pk, list_version, user_list_version,
+        ):
+            surveys = [survey async for survey in surveys]
+        context['surveys'] = surveys
+        context['list_version'] = list_version
+        context['user_list_version'] = user_list_version
+        return self.render_to_response(context)
+
+    def get_available_surveys(self):
         from responses.models import ResponseSession
         
-        # Get published surveys within date range
-        available_surveys = Survey.objects.filter(
-            status=Survey.Status.PUBLISHED,
-        ).filter(
-            Q(start_date__lte=now) | Q(start_date__isnull=True),
-            Q(end_date__gte=now) | Q(end_date__isnull=True),
-        )
+        # surveys.scheduler publishes and closes surveys at their dates.
+        available_surveys = Survey.objects.filter(status=Survey.Status.PUBLISHED)
         
         # Exclude surveys already completed by this student
         completed_survey_ids = ResponseSession.objects.filter(
@@ -37,8 +44,7 @@ class StudentSurveyListView(StudentRequiredMixin, TemplateView):
             survey__in=available_surveys,
         ).values_list('survey_id', flat=True)
         
-        context['surveys'] = available_surveys.exclude(id__in=completed_survey_ids)
-        return context
+        return available_surveys.exclude(id__in=completed_survey_ids)
 
 
 class TeacherDashboardView(TeacherOrAdminRequiredMixin, TemplateView):
@@ -100,6 +106,9 @@ class SurveyManageListView(SurveyAuthorMixin, ListView):
             end_date = form.cleaned_data.get('end_date')
             if end_date:
                 queryset = queryset.filter(end_date__date__lte=end_date)
+            search_text = form.cleaned_data.get('q', '').strip()
+            if search_text:
+                queryset = search_queryset(queryset, search_text)
         return queryset
 
     def get_context_data(self, **kwargs):
@@ -111,7 +120,22 @@ class SurveyManageListView(SurveyAuthorMixin, ListView):
         return context
 
 
-class SurveyCreateView(SurveyAuthorMixin, CreateView):
+class ScheduledPublishMixin:
+    def _schedule_future_publish(self, desired_status):
+        # A survey is only ever PUBLISHED while it is open: publishing before
+        # start_date leaves a draft that surveys.scheduler publishes on time.
+        start_date = self.object.start_date
+        if desired_status == Survey.Status.PUBLISHED and start_date and start_date > timezone.now():
+            self.object.auto_publish = True
+            messages.info(
+                self.request,
+                f'Опитування буде опубліковано {timezone.localtime(start_date):%d.%m.%Y %H:%M}.',
+            )
+            return Survey.Status.DRAFT
+        return desired_status
+
+
+class SurveyCreateView(ScheduledPublishMixin, SurveyAuthorMixin, CreateView):
     template_name = 'surveys/survey_form.html'
     success_url = reverse_lazy('surveys:manage-list')
 
@@ -127,6 +151,7 @@ class SurveyCreateView(SurveyAuthorMixin, CreateView):
         action = self.request.POST.get('action', 'draft')
         desired_status = Survey.Status.PUBLISHED if action == 'publish' else Survey.Status.DRAFT
         self.object = form.save(commit=False)
+        desired_status = self._schedule_future_publish(desired_status)
         self.object.status = desired_status
         self.object.author = getattr(self.object, 'author', self.request.user)
         self.object.save()
@@ -140,7 +165,7 @@ class SurveyCreateView(SurveyAuthorMixin, CreateView):
         return None
 
 
-class SurveyUpdateView(SurveyAuthorMixin, UpdateView):
+class SurveyUpdateView(ScheduledPublishMixin, SurveyAuthorMixin, UpdateView):
     template_name = 'surveys/survey_form.html'
     success_url = reverse_lazy('surveys:manage-list')
 
@@ -155,6 +180,7 @@ class SurveyUpdateView(SurveyAuthorMixin, UpdateView):
         action = self.request.POST.get('action', 'draft')
         desired_status = Survey.Status.PUBLISHED if action == 'publish' else Survey.Status.DRAFT
         self.object = form.save(commit=False)
+        desired_status = self._schedule_future_publish(desired_status)
         self.object.status = desired_status
         self.object.save()
         form.save_m2m()